@@ -0,0 +1,57 @@
+import re
+from collections import namedtuple
+
+###############################
+#  Incremental Action Parser  #
+###############################
+# Each pattern only matches once its action string can no longer change,
+# e.g. a URL followed by whitespace/quote, or a query followed by a newline.
+STREAMABLE_ACTIONS = [
+    re.compile(r"pause_video"),
+    re.compile(r"play_video (\d+)(?=\D)"),
+    re.compile(r"open (\S+?)(?=[\s\"'])"),
+    re.compile(r"search_amazon ([^\n\"]+?)(?=[\n\"])"),
+    re.compile(r"search ([^\n\"]+?)(?=[\n\"])"),
+]
+ACTION_PREFIXES = ("pause_video", "play_video ", "open ", "search_amazon ", "search ")
+
+# Timings are seconds from the start of the request (None if it never happened)
+StreamResult = namedtuple("StreamResult", ["action", "first_token", "dispatched", "completed", "early"])
+
+
+class StreamingActionParser:
+    """
+    Accumulates streamed completion text and reports the action string as soon
+    as it is unambiguous, so the browser can start before the reply finishes.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.action = None
+
+    def _text(self):
+        return self.buffer.lstrip().lstrip("\"'")
+
+    def could_stream(self):
+        """False once the reply clearly does not start with a known action."""
+        text = self._text()
+        return any(p.startswith(text) or text.startswith(p) for p in ACTION_PREFIXES)
+
+    def feed(self, delta):
+        """Add a chunk of text; return the action the first time it becomes final."""
+        self.buffer += delta
+        if self.action is not None or not self.could_stream():
+            return None
+        text = self._text()
+        for pattern in STREAMABLE_ACTIONS:
+            match = pattern.match(text)
+            if match:
+                self.action = match.group(0).strip()
+                return self.action
+        return None
+
+    def finish(self):
+        """Call at end of stream; returns the action (whole reply if never matched early)."""
+        if self.action is None:
+            self.action = self.buffer.strip().strip('"').strip()
+        return self.action
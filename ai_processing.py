@@ -0,0 +1,95 @@
+import json
+import logging
+import re
+
+from llm_client import llm_client
+from tracing import annotate, traced
+
+###############################
+#   Structured Interpreter    #
+###############################
+# The turn-by-turn path of browser_control.execute_command: one model call per
+# turn returns a single intent for ACTION_HANDLERS (or a follow-up question),
+# given the page digest, visible text, screenshot and context. Follow-up turns
+# only carry what changed on the page (page_fingerprint), so the turns of one
+# command share a `history` list that keeps the earlier ones in the conversation.
+INTERPRETER_MODEL = "gpt-4o"   # Needs vision and JSON mode
+
+INTERPRETER_INSTRUCTIONS = """
+You are an AI assistant that turns a voice command into the next browser action.
+
+Available intents and their parameters:
+- open: {"url": "https://..."}
+- click: {"element_id": <id from the element list>} or {"element_text": "visible text"}
+- scroll: {"direction": "up" | "down", "distance": <pixels>}
+- fill_form: {"field": "name, label or placeholder", "value": "...", "submit": true | false}
+- search: {"query": "..."}
+- play_video: {"video_index": <1-based index in YouTube results>}
+- pause_video: {}
+- open_cheapest: {"max_price": <number or null>}
+- next_page: {}
+
+Reply with JSON only:
+{"intent": "...", "parameters": {...}}
+or, if the command cannot be done without more information:
+{"missing_info": true, "question": "..."}
+"""
+
+
+def build_turn(command, elements="", text="", image_base64=None, context="", image_format="JPEG"):
+    """The user message for one turn: command, page context, elements and (optionally) screenshot."""
+    prompt = f"""User command: "{command}"
+
+{context}
+Visible text: {text[:2000]}
+
+Interactive elements:
+{elements or "(none)"}
+"""
+    if not image_base64:
+        return {"role": "user", "content": prompt}
+    mime = "image/jpeg" if image_format.upper() in ("JPEG", "JPG") else f"image/{image_format.lower()}"
+    return {"role": "user", "content": [
+        {"type": "text", "text": prompt},
+        {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{image_base64}", "detail": "low"}},
+    ]}
+
+
+def parse_reply(reply):
+    """The reply as a dict; anything unparseable becomes an empty (intent-less) result."""
+    try:
+        return json.loads(reply)
+    except ValueError:
+        match = re.search(r"\{.*\}", reply, re.DOTALL)
+        try:
+            return json.loads(match.group(0)) if match else {}
+        except ValueError:
+            return {}
+
+
+@traced("interpret_structured")
+def interpret_command(command, elements="", text="", image_base64=None, context="", history=None, client=None,
+                      image_format="JPEG"):
+    """
+    One turn of structured interpretation:
+    {"intent": ..., "parameters": {...}} or {"missing_info": true, "question": ...}.
+    Pass the same `history` list on every turn of a command to keep the
+    earlier turns (and what the page looked like then) in the conversation.
+    """
+    turn = build_turn(command, elements, text, image_base64, context, image_format)
+    previous = history if history is not None else []
+    messages = [{"role": "system", "content": INTERPRETER_INSTRUCTIONS}] + previous + [turn]
+    annotate(turns=len(previous) // 2 + 1, image=bool(image_base64))
+
+    client = client or llm_client
+    response = client.chat.completions.create(
+        model=INTERPRETER_MODEL,
+        messages=messages,
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+    reply = response.choices[0].message.content.strip()
+    logging.info(f"AI Structured Reply: {reply}")
+    if history is not None:
+        history += [turn, {"role": "assistant", "content": reply}]
+    return parse_reply(reply)
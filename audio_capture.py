@@ -0,0 +1,369 @@
+import array
+import math
+import struct
+import threading
+import time
+import wave
+from collections import deque
+
+###############################
+#    Capture Configuration    #
+###############################
+SAMPLE_RATE = 16000       # Porcupine and Google STT both accept 16 kHz mono
+FRAME_LENGTH = 512        # Porcupine's frame size (32 ms at 16 kHz)
+BUFFER_SECONDS = 10       # Ring buffer history
+PRE_ROLL_SECONDS = 0.3    # Audio kept from just before the wake word fires
+MIN_SPEECH_ENERGY = 300   # RMS floor so digital silence never counts as speech
+
+# Voice activity detection: the capture thread tracks the background level
+# continuously (a low percentile of recent frame energies), so listening
+# never pauses to calibrate and the endpointer can cut off right after speech.
+NOISE_WINDOW_SECONDS = 1.5  # History the noise floor is estimated over
+NOISE_PERCENTILE = 10     # Low enough that speech in the window is ignored
+NOISE_UPDATE_FRAMES = 8   # Re-estimate every 8 frames (~0.25 s)
+SPEECH_RATIO = 3.0        # Speech starts above noise floor * SPEECH_RATIO ...
+CONTINUE_RATIO = 2.0      # ... and continues above the lower noise floor * CONTINUE_RATIO
+ONSET_SECONDS = 0.064     # Loud audio needed to start speech, so clicks are ignored
+HANGOVER_SECONDS = 0.5    # Quiet audio that ends the utterance
+
+
+###############################
+#        Audio Sources        #
+###############################
+class MicrophoneSource:
+    """16-bit mono microphone input, opened once for the lifetime of the app."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_length=FRAME_LENGTH):
+        import pyaudio
+
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=sample_rate,
+            input=True,
+            frames_per_buffer=frame_length
+        )
+        self._stream.start_stream()
+
+    def read(self):
+        return self._stream.read(self.frame_length, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._pa.terminate()
+
+
+class WavFileSource:
+    """
+    Plays a 16-bit mono WAV file as if it came from the microphone.
+    realtime=True paces frames at the file's sample rate; otherwise frames are
+    delivered as fast as they are read. A short tail of silence is appended so
+    the endpointer can close the final utterance.
+    """
+
+    def __init__(self, path, frame_length=FRAME_LENGTH, realtime=False, trailing_silence=1.0):
+        self._wav = wave.open(path, "rb")
+        if self._wav.getsampwidth() != 2 or self._wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        self.sample_rate = self._wav.getframerate()
+        self.frame_length = frame_length
+        self.realtime = realtime
+        self._silent_frames = int(trailing_silence * self.sample_rate / frame_length)
+        self._started = None
+        self._frames_read = 0
+
+    def read(self):
+        if self.realtime:
+            if self._started is None:
+                self._started = time.monotonic()
+            due = self._started + self._frames_read * self.frame_length / self.sample_rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        data = self._wav.readframes(self.frame_length)
+        if not data:
+            if self._silent_frames <= 0:
+                return None
+            self._silent_frames -= 1
+            data = b""
+        self._frames_read += 1
+        return data.ljust(self.frame_length * 2, b"\x00")
+
+    def close(self):
+        self._wav.close()
+
+
+###############################
+#    Persistent Capture       #
+###############################
+class AudioCaptureEngine:
+    """
+    One capture thread feeding a fixed-size ring buffer of PCM frames.
+    Frames carry a monotonically increasing sequence number, so any number of
+    consumers (wake word, recognizer) can read independently and look back
+    into recent history for pre-roll.
+    """
+
+    def __init__(self, source, buffer_seconds=BUFFER_SECONDS):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.frame_length = source.frame_length
+        capacity = max(1, int(buffer_seconds * self.sample_rate / self.frame_length))
+        self._frames = deque(maxlen=capacity)
+        self._levels = deque(maxlen=capacity)  # (rms, noise floor) per frame
+        self.noise = NoiseFloorTracker(self.frame_seconds)
+        self._next_seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+        self.finished = False
+
+    @property
+    def frame_seconds(self):
+        return self.frame_length / self.sample_rate
+
+    @property
+    def position(self):
+        """Sequence number of the next frame to be captured."""
+        with self._cond:
+            return self._next_seq
+
+    @property
+    def oldest(self):
+        """Sequence number of the oldest frame still in the ring."""
+        with self._cond:
+            return self._next_seq - len(self._frames)
+
+    def start(self):
+        if self._thread is None:
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.source.close()
+
+    def _run(self):
+        while self.running:
+            try:
+                data = self.source.read()
+            except Exception as e:
+                print(f"⚠️ Audio capture error: {e}")
+                data = None
+            with self._cond:
+                if data is None:
+                    self.finished = True
+                    self._cond.notify_all()
+                    return
+                self._frames.append(data)
+                self._levels.append(self.noise.update(data))
+                self._next_seq += 1
+                self._cond.notify_all()
+
+    def frames(self, start_seq=None):
+        """
+        Yield (seq, frame) from start_seq onwards (default: the live edge),
+        blocking for new audio. Readers that fall behind the ring skip ahead
+        to the oldest retained frame. Stops when the source is exhausted.
+        """
+        seq = self.position if start_seq is None else start_seq
+        while True:
+            with self._cond:
+                while seq >= self._next_seq and not self.finished and self.running:
+                    self._cond.wait(timeout=0.5)
+                if seq >= self._next_seq:
+                    return
+                oldest = self._next_seq - len(self._frames)
+                seq = max(seq, oldest)
+                frame = self._frames[seq - oldest]
+            yield seq, frame
+            seq += 1
+
+    def levels(self, seq):
+        """(rms, noise floor) of frame seq, or None if it is no longer in the ring."""
+        with self._cond:
+            index = seq - (self._next_seq - len(self._levels))
+            return self._levels[index] if 0 <= index < len(self._levels) else None
+
+    @property
+    def noise_floor(self):
+        return self.noise.floor
+
+    def window(self, start_seq, end_seq):
+        """Frames in [start_seq, end_seq) that are still in the ring."""
+        with self._cond:
+            oldest = self._next_seq - len(self._frames)
+            start = max(start_seq, oldest)
+            end = min(end_seq, self._next_seq)
+            return [self._frames[seq - oldest] for seq in range(start, end)]
+
+
+def frame_rms(frame):
+    """Root-mean-square energy of a 16-bit PCM frame."""
+    samples = array.array("h", frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+###############################
+#  Voice Activity Detection   #
+###############################
+class NoiseFloorTracker:
+    """
+    Running background-noise estimate: a low percentile of frame energies over
+    the last NOISE_WINDOW_SECONDS, refreshed every few frames. Speech only
+    occupies part of the window, so it barely moves the estimate, while a
+    louder room (a fan switching on) is picked up within a few seconds.
+    """
+
+    def __init__(self, frame_seconds, window_seconds=NOISE_WINDOW_SECONDS,
+                 percentile=NOISE_PERCENTILE, update_frames=NOISE_UPDATE_FRAMES):
+        self.history = deque(maxlen=max(1, int(window_seconds / frame_seconds)))
+        self.percentile = percentile
+        self.update_frames = update_frames
+        self.floor = 0.0
+        self._pending = 0
+
+    def update(self, frame):
+        """Add one frame; returns (rms, noise floor)."""
+        rms = frame_rms(frame)
+        self.history.append(rms)
+        self._pending += 1
+        if self._pending >= self.update_frames or len(self.history) <= self.update_frames:
+            ordered = sorted(self.history)
+            self.floor = ordered[len(ordered) * self.percentile // 100]
+            self._pending = 0
+        return rms, self.floor
+
+
+class Endpointer:
+    """
+    Frame-level speech detector with hysteresis: speech starts after
+    `onset` seconds above floor * speech_ratio, continues while frames stay
+    above the lower floor * continue_ratio, and ends after `hangover` seconds
+    below it. The floor is frozen once speech starts.
+    """
+    SPEECH_START = "start"
+    SPEECH_END = "end"
+
+    def __init__(self, frame_seconds, hangover=HANGOVER_SECONDS, onset=ONSET_SECONDS,
+                 speech_ratio=SPEECH_RATIO, continue_ratio=CONTINUE_RATIO, min_energy=MIN_SPEECH_ENERGY):
+        self.onset_frames = max(1, round(onset / frame_seconds))
+        self.hangover_frames = max(1, round(hangover / frame_seconds))
+        self.speech_ratio = speech_ratio
+        self.continue_ratio = continue_ratio
+        self.min_energy = min_energy
+        self.floor = 0.0
+        self.in_speech = False
+        self.loud_run = 0
+        self.quiet_run = 0
+
+    def process(self, rms, floor):
+        """Feed one frame's energy; returns SPEECH_START or SPEECH_END on a transition, else None."""
+        if not self.in_speech:
+            self.floor = floor
+            if rms > max(self.min_energy, floor * self.speech_ratio):
+                self.loud_run += 1
+                if self.loud_run >= self.onset_frames:
+                    self.in_speech = True
+                    self.quiet_run = 0
+                    return self.SPEECH_START
+            else:
+                self.loud_run = 0
+            return None
+
+        if rms > max(self.min_energy, self.floor * self.continue_ratio):
+            self.quiet_run = 0
+            return None
+        self.quiet_run += 1
+        if self.quiet_run >= self.hangover_frames:
+            self.in_speech = False
+            self.loud_run = 0
+            return self.SPEECH_END
+        return None
+
+
+###############################
+#    Wake Word Consumer       #
+###############################
+class WakeWordDetector:
+    """Runs a long-lived Porcupine instance over the shared capture buffer."""
+
+    def __init__(self, engine, porcupine):
+        if porcupine.sample_rate != engine.sample_rate or porcupine.frame_length != engine.frame_length:
+            raise ValueError("Capture engine format does not match the wake word model")
+        self.engine = engine
+        self.porcupine = porcupine
+        self._unpack = struct.Struct("<" + "h" * porcupine.frame_length).unpack_from
+
+    def wait(self, start_seq=None):
+        """
+        Block until the wake word is heard; return the sequence number right
+        after it (or None if the source ran out). Scanning starts at start_seq,
+        or at the live edge of the buffer when omitted.
+        """
+        for seq, frame in self.engine.frames(start_seq):
+            if self.porcupine.process(self._unpack(frame)) >= 0:
+                return seq + 1
+        return None
+
+    def close(self):
+        self.porcupine.delete()
+
+
+###############################
+#    Recognizer Consumer      #
+###############################
+def capture_utterance(engine, start_seq, pre_roll=PRE_ROLL_SECONDS, timeout=5,
+                      hangover=HANGOVER_SECONDS, max_seconds=10, on_frame=None):
+    """
+    Collect the utterance that follows start_seq from the capture buffer.
+    The returned PCM includes `pre_roll` seconds from before start_seq so words
+    spoken straight after the wake word are not clipped. Speech is detected
+    against the engine's running noise floor, so no calibration pause is
+    needed, and the utterance ends `hangover` seconds after the speaker stops.
+    Returns (pcm, next_seq): raw 16-bit PCM bytes, or None if no speech started
+    before `timeout`, and the sequence number just past the consumed audio.
+    `on_frame(frame)` sees every kept frame as it arrives, for streaming STT.
+    """
+    frame_seconds = engine.frame_seconds
+    endpointer = Endpointer(frame_seconds, hangover)
+    first_seq = max(engine.oldest, start_seq - int(pre_roll / frame_seconds))
+    timeout_frames = int(timeout / frame_seconds)
+    max_frames = int(max_seconds / frame_seconds)
+
+    captured = []
+    speech_started = False
+    next_seq = first_seq
+    for seq, frame in engine.frames(first_seq):
+        next_seq = seq + 1
+        captured.append(frame)
+        if on_frame is not None:
+            on_frame(frame)
+        if seq < start_seq:
+            continue  # Pre-roll is kept but never starts or ends an utterance
+        rms, floor = engine.levels(seq) or (frame_rms(frame), engine.noise_floor)
+        event = endpointer.process(rms, floor)
+        if not speech_started:
+            if event == Endpointer.SPEECH_START:
+                speech_started = True
+            elif seq - start_seq >= timeout_frames:
+                return None, next_seq
+            continue
+        if event == Endpointer.SPEECH_END or len(captured) >= max_frames:
+            break
+
+    if not speech_started:
+        return None, next_seq
+    return b"".join(captured), next_seq
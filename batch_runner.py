@@ -0,0 +1,233 @@
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from urllib.parse import urlparse, urlunparse
+
+import page_readiness
+from browser_lifecycle import BrowserManager
+from intent_grammar import match_intent
+from plan_mode import is_multi_step
+from session_pool import domain_of
+from site_adapters import ADAPTERS
+from tracing import new_trace
+
+###############################
+#   Headless Batch Runner     #
+###############################
+# Text commands in, one JSON line per command out: no wake word, no STT and no
+# window. Each worker thread owns a headless browser; commands go through the
+# same interpretation as the GUI (plan mode for compound commands, then the
+# fast-path grammar, then GPT-4) and run through browser_control.perform_action,
+# the same action-string path the GUI uses.
+# --llm-url and --sites point the model and the sites at local stand-ins
+# (benchmarks.fakes), so a build box needs no network:
+#
+#   python batch_runner.py --input commands.jsonl --output results.jsonl --parallel 4
+#   echo "open youtube" | python batch_runner.py --llm-url http://127.0.0.1:8000/v1 --sites http://127.0.0.1:8001
+PARALLEL = 2
+
+
+def read_commands(stream):
+    """Commands from JSONL ({"command", optional "id", "start_url", "action"}) or one plain command per line."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        entry = json.loads(line) if line.startswith("{") else {"command": line}
+        entry.setdefault("id", number)
+        yield entry
+
+
+def use_local_sites(base_url):
+    """
+    Send every navigation for an adapter's site to the server at base_url, on
+    a '<site>.localhost' host of its own (Chrome resolves *.localhost to this
+    machine) so adapters still tell the sites apart. Process-wide.
+    """
+    port = urlparse(base_url).port
+    hosts = {}
+    for adapter in ADAPTERS.values():
+        local = f"{adapter.name}.localhost:{port}"  # domain_of keeps the port
+        hosts.update({domain: local for domain in adapter.domains})
+        if local not in adapter.domains:
+            adapter.domains = tuple(adapter.domains) + (local,)
+
+    def rewrite(url):
+        domain = domain_of(url)
+        host = next((local for d, local in hosts.items()
+                     if domain and (domain == d or domain.endswith("." + d))), None)
+        if host is None or host == domain:
+            return url  # about:blank, data: URLs and pages already on the local server
+        parsed = urlparse(url)
+        return urlunparse(("http", host, parsed.path or "/", "", parsed.query, ""))
+
+    page_readiness.url_rewriter = rewrite
+    return rewrite
+
+
+###############################
+#   Interpretation            #
+###############################
+def interpret(command, client=None, use_cache=False):
+    """(kind, action, source) the way gui.interpret_stage decides: a plan, a fast-path match or GPT-4."""
+    if is_multi_step(command):
+        return "plan", None, "plan"
+    fast_match = match_intent(command)
+    if fast_match:
+        return "action", fast_match.action, "grammar"
+    from voice_control import interpret_command
+
+    return "action", interpret_command(command, client=client, use_cache=use_cache).strip('"').strip(), "llm"
+
+
+###############################
+#   Runner                    #
+###############################
+class BatchRunner:
+    """Runs commands on `parallel` headless browsers and streams one JSON result line per command to `out`."""
+
+    def __init__(self, out, parallel=PARALLEL, client=None, use_cache=False, headless=True, store=None):
+        self.out = out
+        self.parallel = max(1, parallel)
+        self.client = client
+        self.use_cache = use_cache
+        self.headless = headless
+        self.store = store
+        self.counts = {"ok": 0, "failed": 0}
+        self._queue = queue.Queue(maxsize=self.parallel * 2)  # Reading stdin keeps pace with the workers
+        self._lock = threading.Lock()
+
+    def run(self, entries):
+        """Feed every entry to the workers and wait for them; returns the ok/failed counts."""
+        workers = [threading.Thread(target=self._worker, name=f"batch-{n}", daemon=True)
+                   for n in range(self.parallel)]
+        for worker in workers:
+            worker.start()
+        for entry in entries:
+            self._queue.put(entry)
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join()
+        return dict(self.counts)
+
+    def _worker(self):
+        manager = BrowserManager(headless=self.headless)
+        manager.warm_up()
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                self._write(self.run_one(entry, manager))
+        finally:
+            manager.shutdown()
+
+    def _write(self, record):
+        with self._lock:
+            self.counts["ok" if record["ok"] else "failed"] += 1
+            self.out.write(json.dumps(record) + "\n")
+            self.out.flush()
+
+    def run_one(self, entry, manager):
+        """Interpret and execute one command; returns its result record (never raises)."""
+        from browser_control import perform_action
+
+        command = entry["command"]
+        record = {"id": entry["id"], "command": command, "trace": new_trace(),
+                  "worker": threading.current_thread().name, "ok": False, "timings": {}}
+        timings = record["timings"]
+        start = time.perf_counter()
+        driver = None
+        try:
+            driver = manager.get()
+            timings["browser"] = time.perf_counter() - start
+            if entry.get("start_url"):
+                t0 = time.perf_counter()
+                page_readiness.navigate(driver, entry["start_url"], "open")
+                timings["start_page"] = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            kind, action, source = interpret(command, self.client, self.use_cache)
+            timings["interpret"] = time.perf_counter() - t0
+            record["source"] = source
+
+            t0 = time.perf_counter()
+            if kind == "plan":
+                from macros import execute_with_macro
+
+                result = execute_with_macro(command, driver, client=self.client, store=self.store)
+                record["steps"] = [{"intent": step.intent, "parameters": step.parameters} for step in result.steps]
+                record["model_calls"] = result.model_calls
+                record["ok"] = result.ok
+                if result.question or result.error:
+                    record["error"] = result.question or result.error
+            else:
+                record["action"] = action
+                perform_action(driver, action, command)
+                record["ok"] = True
+            timings["execute"] = time.perf_counter() - t0
+        except Exception as e:
+            logging.error(f"❌ Batch command '{command}' failed: {e}")
+            record["error"] = f"{e.__class__.__name__}: {e}"
+        if driver is not None:
+            try:
+                record["url"] = driver.current_url
+            except Exception:
+                pass
+        if "action" in entry:
+            record["expected"] = entry["action"]
+            record["matched"] = record.get("action") == entry["action"]
+        timings["total"] = time.perf_counter() - start
+        return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run text commands on headless browsers and stream JSONL results.")
+    parser.add_argument("--input", default="-", help="JSONL or plain-text commands ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="JSONL results ('-' for stdout)")
+    parser.add_argument("--parallel", type=int, default=PARALLEL, help="Headless browsers running at once")
+    parser.add_argument("--llm-url", help="OpenAI-compatible base URL, e.g. the fake server in benchmarks.fakes")
+    parser.add_argument("--api-key", default=None, help="API key for --llm-url (a fake server accepts any)")
+    parser.add_argument("--sites", help="Serve every site from this local fixture server")
+    parser.add_argument("--cache", action="store_true", help="Use the interpretation cache")
+    parser.add_argument("--macros", help="Macro database for compound commands (default: the app's)")
+    parser.add_argument("--show-browser", action="store_true", help="Run visible browsers instead of headless")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    client = None
+    if args.llm_url:
+        from llm_client import LLMClient
+
+        client = LLMClient(api_key=args.api_key or "offline", base_url=args.llm_url)
+    if args.sites:
+        use_local_sites(args.sites)
+    store = None
+    if args.macros:
+        from macros import MacroStore
+
+        store = MacroStore(args.macros)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    sys.stdout = sys.stderr  # The app's progress prints must not end up in the JSONL
+    runner = BatchRunner(out, args.parallel, client, args.cache, not args.show_browser, store)
+    start = time.perf_counter()
+    try:
+        counts = runner.run(read_commands(source))
+    finally:
+        for f in (source, out):
+            if f not in (sys.stdin, sys.__stdout__):
+                f.close()
+    print(f"✅ {counts['ok']} ok, ❌ {counts['failed']} failed in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+    return 0 if counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
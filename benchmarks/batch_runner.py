@@ -0,0 +1,88 @@
+"""
+Throughput of the headless batch runner over the recorded command corpus and
+the plan scenarios, fully offline: the fake OpenAI server answers with the
+recorded actions and plans, and every site is served by the fixture server
+through batch_runner.use_local_sites. Runs the batch once per --parallel value
+and reports commands per second, failures, actions that differ from the
+recording and p50/p95 per timing; each run's JSONL results are kept next to
+--output, one file per --parallel value (needs Chrome).
+
+    python -m benchmarks.batch_runner [--parallel 1 2 4] [--latency 0.3] [--output benchmarks/results/batch_results.jsonl]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from batch_runner import BatchRunner, use_local_sites
+from llm_client import LLMClient
+from macros import MacroStore
+from benchmarks.e2e_latency import percentile
+from benchmarks.fakes import RESULTS_DIR, FakeOpenAIServer, FixtureSiteServer, load_command_corpus
+from benchmarks.plan_mode import load_scenarios, successful_steps
+
+# Page each corpus action expects to already be on (real URLs; the runner rewrites them)
+START_PAGES = {
+    "search_amazon": "https://www.amazon.com/s",
+    "open_cheapest": "https://www.amazon.com/s?k=crossbody+bags",
+    "next_page": "https://www.amazon.com/s?k=crossbody+bags",
+    "play_video": "https://www.youtube.com/results?search_query=cocomelon",
+    "pause_video": "https://www.youtube.com/watch?v=1",
+}
+TIMINGS = ["interpret", "execute", "total"]
+
+
+def build_batch(site):
+    """(entries, fake LLM responses) for the corpus commands and the plan scenarios."""
+    entries, responses = [], {}
+    for entry in load_command_corpus():
+        start_url = START_PAGES.get(entry["action"].split(" ", 1)[0])
+        entries.append(dict(entry, id=len(entries) + 1, **({"start_url": start_url} if start_url else {})))
+        responses[entry["command"].lower()] = entry["action"]
+    for scenario in load_scenarios(site):
+        entries.append({"id": len(entries) + 1, "command": scenario["command"]})
+        responses[scenario["command"].lower()] = json.dumps({"steps": successful_steps(scenario)})
+    return entries, responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parallel", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake model latency per call")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "batch_results.jsonl"))
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    with FixtureSiteServer() as site:
+        entries, responses = build_batch(site)
+        with FakeOpenAIServer(responses, latency=args.latency) as llm:
+            use_local_sites(site.base_url)
+            client = LLMClient(api_key="offline", base_url=llm.base_url)
+            for parallel in args.parallel:
+                root, ext = os.path.splitext(args.output)
+                path = f"{root}.p{parallel}{ext}"
+                with tempfile.TemporaryDirectory() as tmp, open(path, "w", encoding="utf-8") as out:
+                    runner = BatchRunner(out, parallel, client, store=MacroStore(os.path.join(tmp, "macros.db")))
+                    start = time.perf_counter()
+                    counts = runner.run(entries)
+                    elapsed = time.perf_counter() - start
+                with open(path, encoding="utf-8") as f:
+                    records = [json.loads(line) for line in f]
+
+                mismatched = [r["command"] for r in records if r.get("matched") is False]
+                print(f"--parallel {parallel}: {len(records)} commands in {elapsed:.1f}s "
+                      f"({len(records) / elapsed:.2f}/s), {counts['failed']} failed, "
+                      f"{len(mismatched)} unexpected actions  -> {path}")
+                for name in TIMINGS:
+                    samples = [r["timings"][name] for r in records if name in r["timings"]]
+                    if samples:
+                        print(f"  {name:<10} p50 {percentile(samples, 50) * 1e3:7.0f} ms  "
+                              f"p95 {percentile(samples, 95) * 1e3:7.0f} ms")
+                for record in records:
+                    if not record["ok"]:
+                        print(f"  ❌ {record['command']}: {record.get('error')}")
+
+
+if __name__ == "__main__":
+    main()
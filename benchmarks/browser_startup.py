@@ -0,0 +1,61 @@
+"""
+Time to first usable page for a cold browser start (with and without a cached
+driver path), a pre-warmed start, and recovery from a crashed session.
+
+    python -m benchmarks.browser_startup [--headed]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from browser_lifecycle import BrowserManager
+from page_readiness import wait_until_ready
+from benchmarks.fakes import FixtureSiteServer
+
+
+def first_page(manager, url):
+    """Seconds from asking for a driver to a settled page."""
+    start = time.perf_counter()
+    driver = manager.get()
+    driver.get(url)
+    wait_until_ready(driver, "open")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--headed", action="store_true", help="Use a visible window instead of headless")
+    args = parser.parse_args()
+    headless = not args.headed
+
+    with FixtureSiteServer() as site, tempfile.TemporaryDirectory() as tmp:
+        url = site.url("/results?search_query=cocomelon")
+        cache = os.path.join(tmp, "chromedriver.json")
+
+        manager = BrowserManager(headless=headless, cache_path=cache)
+        cold_uncached = first_page(manager, url)
+        resolve_uncached = manager.timings["driver_resolve"]
+        manager.shutdown()
+
+        manager = BrowserManager(headless=headless, cache_path=cache)
+        cold_cached = first_page(manager, url)
+        resolve_cached = manager.timings["driver_resolve"]
+        manager.shutdown()
+
+        manager = BrowserManager(headless=headless, cache_path=cache)
+        manager.warm_up().result()
+        warm = first_page(manager, url)
+
+        manager.driver.quit()  # Simulate a crashed session behind the manager's back
+        recovered = first_page(manager, url)
+        manager.shutdown()
+
+    print(f"Cold start, no cached driver : {cold_uncached:6.2f}s (driver lookup {resolve_uncached * 1e3:.0f} ms)")
+    print(f"Cold start, cached driver    : {cold_cached:6.2f}s (driver lookup {resolve_cached * 1e3:.0f} ms)")
+    print(f"Pre-warmed start             : {warm:6.2f}s")
+    print(f"Crash recovery               : {recovered:6.2f}s (restarts: {manager.restarts})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Replays the recorded command corpus through interpret_command with a stubbed
+OpenAI client and reports the interpretation cache hit rate and latencies.
+
+    python -m benchmarks.cache_hit_rate [--latency 0.8] [--passes 3]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import os
+
+import voice_control
+from command_cache import InterpretationCache
+from benchmarks.fakes import StubOpenAIClient, load_command_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="JSONL corpus (defaults to fixtures/commands.jsonl)")
+    parser.add_argument("--latency", type=float, default=0.8, help="Simulated GPT-4 latency in seconds")
+    parser.add_argument("--passes", type=int, default=3, help="How many times to replay the corpus")
+    args = parser.parse_args()
+
+    corpus = load_command_corpus(args.corpus)
+    client = StubOpenAIClient.from_corpus(corpus, latency=args.latency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        voice_control.interpretation_cache = InterpretationCache(path=os.path.join(tmp, "cache.db"))
+        hit_times, miss_times = [], []
+        for _ in range(args.passes):
+            for entry in corpus:
+                calls_before = client.calls
+                start = time.perf_counter()
+                voice_control.interpret_command(entry["command"], client=client)
+                elapsed = time.perf_counter() - start
+                (miss_times if client.calls > calls_before else hit_times).append(elapsed)
+
+        stats = voice_control.interpretation_cache.stats()
+        voice_control.interpretation_cache.close()
+
+    print(f"Commands replayed : {len(corpus) * args.passes}")
+    print(f"LLM calls         : {client.calls}")
+    print(f"Hit rate          : {stats['hit_rate']:.1%} "
+          f"(memory {stats['memory_hits']}, disk {stats['disk_hits']}, misses {stats['misses']})")
+    if hit_times:
+        print(f"Median hit        : {statistics.median(hit_times) * 1e6:.0f} µs")
+    if miss_times:
+        print(f"Median miss       : {statistics.median(miss_times) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Plays a script of spoken commands in real time (fixtures/pipeline_script.jsonl:
+when each is said and how long its page takes to load) through the old
+one-thread listen loop and through the staged command pipeline, and reports
+which commands were heard, how long after the user stopped talking each
+action started, how quickly "stop" ended the page load in flight, and the
+pipeline's per-stage queue depths.
+
+By default the microphone is scripted at the utterance level: a command is
+only heard if something was listening when it began. --audio instead renders
+the script to a WAV and runs it through the real capture engine, wake word
+stand-in and speech backend (with a stub recognizer).
+
+    python -m benchmarks.command_pipeline [--stt 0.5] [--llm 0.8] [--pause 1.0] [--audio]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from command_pipeline import END_OF_INPUT, CommandPipeline, is_stop_command
+from page_readiness import navigate
+from benchmarks.fakes import FIXTURES_DIR, ScriptedBrowser
+
+WORD_SECONDS = 0.35   # Speaking rate of the scripted user
+WAKE_SECONDS = 0.6    # "Computer"
+
+
+def load_script(path=None):
+    with open(path or os.path.join(FIXTURES_DIR, "pipeline_script.jsonl"), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def speech_seconds(text):
+    return WAKE_SECONDS + WORD_SECONDS * len(text.split())
+
+
+class ScriptedMicrophone:
+    """Says the script in real time; an utterance is only heard if capture() was waiting when it began."""
+
+    def __init__(self, script, start):
+        self.script = script
+        self.start = start
+        self.next = 0
+        self.missed = []
+
+    def capture(self):
+        now = time.perf_counter() - self.start
+        while self.next < len(self.script) and self.script[self.next]["at"] < now:
+            self.missed.append(self.script[self.next]["say"])
+            self.next += 1
+        if self.next == len(self.script):
+            return END_OF_INPUT
+        entry = self.script[self.next]
+        self.next += 1
+        time.sleep(max(0.0, entry["at"] + speech_seconds(entry["say"]) - now))
+        return entry["say"]
+
+
+def scripted_input(script, stt):
+    """(capture, recognize, start, spoken end times) for the utterance-level scripted microphone."""
+    start = time.perf_counter()
+    mic = ScriptedMicrophone(script, start)
+
+    def recognize(text):
+        time.sleep(stt)
+        return text
+
+    spoken = {entry["say"]: start + entry["at"] + speech_seconds(entry["say"]) for entry in script}
+    return mic.capture, recognize, start, spoken, mic.missed
+
+
+def audio_input(script, stt, tmp):
+    """The same, backed by the real capture stack reading the script rendered to a WAV."""
+    from audio_capture import WavFileSource
+    from speech_backends import GoogleBackend
+    from voice_control import capture_command, detect_wake_word, recognize_command, start_capture_engine
+    from benchmarks.fakes import StubPorcupine, StubRecognizer, write_wav
+
+    segments, t = [], 0.0
+    for entry in script:
+        segments.append((max(0.0, entry["at"] - t), 0, 0))
+        command_seconds = speech_seconds(entry["say"]) - WAKE_SECONDS
+        segments += [(WAKE_SECONDS, 12000, 440), (0.05, 0, 0), (command_seconds, 5000, 220)]
+        t = max(t, entry["at"]) + WAKE_SECONDS + 0.05 + command_seconds
+    path = os.path.join(tmp, "script.wav")
+    spans = write_wav(path, segments + [(2.0, 0, 0)], noise=200)
+    backend = GoogleBackend(StubRecognizer([entry["say"] for entry in script], stt))
+    start = time.perf_counter()
+    start_capture_engine(WavFileSource(path, realtime=True), buffer_seconds=t + 10, porcupine=StubPorcupine())
+    spoken = {entry["say"]: start + spans[2 * i + 1][1] for i, entry in enumerate(script)}
+
+    def capture():
+        if not detect_wake_word():
+            return END_OF_INPUT
+        return capture_command(backend=backend)
+
+    return capture, recognize_command, start, spoken, []
+
+
+class Run:
+    """Stage functions shared by both loops, recording when each command started executing."""
+
+    def __init__(self, script, args):
+        self.loads = {entry["say"]: entry.get("load", 0.5) for entry in script}
+        self.args = args
+        self.browser = ScriptedBrowser()
+        self.started = {}
+        self.finished = {}
+
+    def interpret(self, command):
+        time.sleep(self.args.llm)
+        return command
+
+    def execute(self, command):
+        self.started[command] = time.perf_counter()
+        slug = command.replace(" ", "-")
+        navigate(self.browser, f"https://fixture.test/{slug}?load={self.loads.get(command, 0.5)}", "open")
+        self.finished[command] = time.perf_counter()
+
+
+def sequential(script, args, capture, recognize):
+    """The old listen_thread: every stage in turn on one thread, then a pause."""
+    run = Run(script, args)
+    while True:
+        audio = capture()
+        if audio is END_OF_INPUT:
+            break
+        command = recognize(audio) if audio is not None else None
+        if command and not is_stop_command(command):  # Nothing left to stop by the time it is heard
+            run.execute(run.interpret(command))
+        time.sleep(args.pause)
+    return run, None
+
+
+def pipelined(script, args, capture, recognize):
+    run = Run(script, args)
+    pipeline = CommandPipeline(capture, recognize,
+                               lambda job, emit: emit(run.interpret(job.command)),
+                               lambda job, command: run.execute(command))
+    pipeline.start().wait_idle()
+    stats = pipeline.stats()
+    pipeline.stop()
+    return run, stats
+
+
+def report(name, script, run, spoken, heard_missed, start):
+    print(f"{name}")
+    reactions = []
+    for entry in script:
+        text = entry["say"]
+        spoken_end = spoken[text] - start
+        if text in heard_missed:
+            outcome = "missed (not listening)"
+        elif is_stop_command(text):
+            in_flight = [load for load in run.browser.loads if load[1] - start <= spoken_end < load[2] - start]
+            if in_flight:
+                url, _, end, stopped = in_flight[0]
+                outcome = f"page load {'stopped' if stopped else 'ran on'} {end - start - spoken_end:+.2f}s"
+            else:
+                outcome = "nothing loading"
+        elif text in run.started:
+            reaction = run.started[text] - start - spoken_end
+            reactions.append(reaction)
+            cancelled = text not in run.finished
+            outcome = f"started {reaction:+.2f}s" + (" (cancelled)" if cancelled else "")
+        else:
+            outcome = "dropped by stop"
+        print(f"  {entry['at']:5.1f}s {text:<30} {outcome}")
+    if reactions:
+        print(f"  mean time from end of speech to action: {sum(reactions) / len(reactions):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--script", help="JSONL of {at, say, load}")
+    parser.add_argument("--stt", type=float, default=0.5, help="Recognition latency")
+    parser.add_argument("--llm", type=float, default=0.8, help="Interpretation latency")
+    parser.add_argument("--pause", type=float, default=1.0, help="Sleep at the end of each old-loop cycle")
+    parser.add_argument("--audio", action="store_true", help="Drive the real capture stack from a rendered WAV")
+    args = parser.parse_args()
+    script = load_script(args.script)
+
+    for name, loop in (("Old listen loop", sequential), ("Command pipeline", pipelined)):
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.audio:
+                capture, recognize, start, spoken, missed = audio_input(script, args.stt, tmp)
+            else:
+                capture, recognize, start, spoken, missed = scripted_input(script, args.stt)
+            run, stats = loop(script, args, capture, recognize)
+        report(name, script, run, spoken, missed, start)
+        if stats:
+            depths = "  ".join(f"{stage} max {s['max_depth']}/{s['capacity']} (blocked {s['blocked']}x)"
+                               for stage, s in stats.items() if stage != "inflight")
+            print(f"  queues: {depths}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures DOM digest extraction time and output size against raw page_source
+on the local fixture pages in headless Chrome.
+
+    python -m benchmarks.dom_digest [--runs 10] [--budget 1500]
+"""
+import argparse
+import statistics
+import time
+
+from dom_digest import DIGEST_SCRIPT, MAX_ELEMENTS, distill, estimate_tokens
+from benchmarks.fakes import FixtureSiteServer, make_headless_driver
+
+PAGES = ["/s?k=crossbody+bags", "/results?search_query=cocomelon", "/search?q=python+tutorials", "/contact.html"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=1500, help="Token budget for the digest")
+    parser.add_argument("--show", action="store_true", help="Print the digest for each page")
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    try:
+        with FixtureSiteServer() as site:
+            for page in PAGES:
+                driver.get(site.url(page))
+                source = driver.page_source
+                script_times, distill_times = [], []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    elements = driver.execute_script(DIGEST_SCRIPT, MAX_ELEMENTS)
+                    script_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    digest = distill(elements, args.budget)
+                    distill_times.append(time.perf_counter() - start)
+
+                print(f"{page}")
+                print(f"  page_source : {len(source) / 1024:7.1f} KiB  ~{estimate_tokens(source)} tokens")
+                print(f"  digest      : {len(digest.text) / 1024:7.1f} KiB  ~{digest.tokens} tokens "
+                      f"({len(digest.elements)}/{digest.total} elements)")
+                print(f"  extraction  : script {statistics.median(script_times) * 1e3:.1f} ms + "
+                      f"distill {statistics.median(distill_times) * 1e3:.2f} ms")
+                if args.show:
+                    print("    " + digest.text.replace("\n", "\n    "))
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+End-to-end latency of the voice-to-browser pipeline with every external
+service replaced by a local stand-in: a synthesized WAV instead of the
+microphone, an energy-based wake word detector instead of Porcupine, a
+scripted recognizer instead of Google STT, the fake OpenAI server instead of
+GPT-4 and the fixture site server instead of Amazon/YouTube/Google.
+
+Reports p50/p95/p99 per stage (wake_word, listen, interpret, action) and end
+to end (wake word heard -> page settled), throughput and the peak RSS of this
+process, and writes everything to a JSON file that --baseline can compare
+against on a later run.
+
+    python -m benchmarks.e2e_latency [--commands 20] [--output benchmarks/results/e2e_latency.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import openai
+
+import voice_control
+from audio_capture import WavFileSource
+from batch_runner import use_local_sites
+from page_readiness import navigate
+from benchmarks.fakes import (
+    RESULTS_DIR,
+    FakeOpenAIServer,
+    FixtureSiteServer,
+    StubPorcupine,
+    StubRecognizer,
+    load_command_corpus,
+    write_wav,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ["wake_word", "listen", "interpret", "action"]
+
+LEAD_IN = (0.8, 0, 0)
+WAKE = (0.6, 12000, 440)      # "Computer"
+GAP = (0.05, 0, 0)
+COMMAND = (1.2, 5000, 220)    # The command itself
+PAUSE = (1.5, 0, 0)
+
+# Page each action expects to already be on (loaded before the cycle, untimed;
+# real URLs, which use_local_sites sends to the fixture server)
+PREREQUISITES = {
+    "search_amazon": "https://www.amazon.com/s",
+    "play_video": "https://www.youtube.com/results?search_query=cocomelon",
+    "pause_video": "https://www.youtube.com/watch?v=1",
+}
+
+
+###############################
+#   Statistics                #
+###############################
+def percentile(samples, q):
+    """Linear-interpolated q-th percentile (0-100) of the samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1e3,
+        "p50_ms": percentile(samples, 50) * 1e3,
+        "p95_ms": percentile(samples, 95) * 1e3,
+        "p99_ms": percentile(samples, 99) * 1e3,
+        "max_ms": max(samples) * 1e3,
+    }
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes vs KiB
+
+
+###############################
+#   Actions Against Fixtures  #
+###############################
+def prepare(driver, action):
+    """Load the page the action assumes the user is already on."""
+    url = PREREQUISITES.get(action.split(" ", 1)[0])
+    if url:
+        navigate(driver, url, "open")
+
+
+###############################
+#   Pipeline Run              #
+###############################
+def run_pipeline(args, corpus, llm, driver):
+    """Run every command through the pipeline; returns (per-command records, wall seconds)."""
+    commands = [entry["command"] for entry in corpus]
+    expected = {entry["command"]: entry["action"] for entry in corpus}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.wav")
+        segments = [LEAD_IN] + [WAKE, GAP, COMMAND, PAUSE] * len(commands)
+        write_wav(path, segments, noise=args.noise)
+        seconds = sum(segment[0] for segment in segments)
+        # Hold the whole recording so slow stages never let the ring overrun
+        voice_control.start_capture_engine(WavFileSource(path, realtime=args.realtime),
+                                           buffer_seconds=seconds + 5, porcupine=StubPorcupine())
+        recognizer = StubRecognizer(commands, latency=args.stt_latency)
+
+        records = []
+        start = time.perf_counter()
+        for command in commands:
+            record = {"command": command, "stages": {}, "ok": False}
+            records.append(record)
+            if driver is not None:
+                prepare(driver, expected[command])
+
+            t0 = time.perf_counter()
+            if not voice_control.detect_wake_word():
+                record["error"] = "wake word not detected"
+                break
+            t1 = time.perf_counter()
+            heard = voice_control.listen(recognizer)
+            t2 = time.perf_counter()
+            record["stages"]["wake_word"] = t1 - t0
+            record["stages"]["listen"] = t2 - t1
+            if not heard:
+                record["error"] = "no transcript"
+                continue
+
+            action = voice_control.interpret_command(heard, client=llm, use_cache=args.cache)
+            t3 = time.perf_counter()
+            record["stages"]["interpret"] = t3 - t2
+            record["action"] = action
+
+            if driver is not None:
+                from browser_control import perform_action
+
+                try:
+                    perform_action(driver, action, heard)
+                except Exception as e:
+                    record["error"] = f"action failed: {e}"
+                    continue
+                record["stages"]["action"] = time.perf_counter() - t3
+            record["end_to_end"] = time.perf_counter() - t1
+            record["ok"] = True
+        elapsed = time.perf_counter() - start
+        voice_control.get_capture_engine().stop()
+    return records, elapsed
+
+
+def build_report(args, records, elapsed):
+    completed = [r for r in records if r["ok"]]
+    return {
+        "benchmark": "e2e_latency",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "commands": len(records),
+        "completed": len(completed),
+        "failures": [{"command": r["command"], "error": r.get("error")} for r in records if not r["ok"]],
+        "stages": {stage: summarize([r["stages"][stage] for r in records if stage in r["stages"]])
+                   for stage in STAGES},
+        "end_to_end": summarize([r["end_to_end"] for r in completed]),
+        "wall_seconds": elapsed,
+        "throughput_per_min": len(completed) / elapsed * 60 if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": records,
+    }
+
+
+def section_of(report, section):
+    return (report["stages"].get(section) if section in STAGES else report.get(section)) or {}
+
+
+def print_report(report, baseline=None):
+    def delta(section, key):
+        old = section_of(baseline, section).get(key) if baseline else None
+        new = section_of(report, section).get(key)
+        if not old or new is None:
+            return ""
+        return f" ({(new - old) / old * 100:+.0f}%)"
+
+    print(f"Commands completed: {report['completed']}/{report['commands']}")
+    for failure in report["failures"]:
+        print(f"  ✗ {failure['command']}: {failure['error']}")
+    print(f"{'stage':<12} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16}")
+    for section in STAGES + ["end_to_end"]:
+        summary = section_of(report, section)
+        if not summary.get("count"):
+            continue
+        cells = [f"{summary[k]:.0f}{delta(section, k)}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{section:<12} {cells[0]:>16} {cells[1]:>16} {cells[2]:>16}")
+    print(f"Throughput: {report['throughput_per_min']:.1f} commands/min over {report['wall_seconds']:.1f}s")
+    if report["peak_rss_mb"] is not None:
+        print(f"Peak RSS  : {report['peak_rss_mb']:.1f} MB (this process; Chrome excluded)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=20, help="Commands taken from the recorded corpus")
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="Fake OpenAI delay before replying")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="Scripted recognizer delay")
+    parser.add_argument("--site-delay", type=float, default=0.0, help="Fixture server delay per request")
+    parser.add_argument("--noise", type=int, default=200, help="Background noise peak level")
+    parser.add_argument("--realtime", action="store_true", help="Pace the WAV like a live microphone")
+    parser.add_argument("--cache", action="store_true", help="Allow the interpretation cache")
+    parser.add_argument("--no-browser", action="store_true", help="Skip the action stage (no Chrome needed)")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "e2e_latency.json"),
+                        help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    corpus = load_command_corpus()[:args.commands]
+    responses = {entry["command"].lower(): entry["action"] for entry in corpus}
+
+    driver = manager = None
+    if not args.no_browser:
+        from browser_lifecycle import BrowserManager
+
+        manager = BrowserManager(headless=True)
+        driver = manager.get()
+    try:
+        with FakeOpenAIServer(responses, latency=args.llm_latency) as server, \
+                FixtureSiteServer(delay=args.site_delay) as site:
+            use_local_sites(site.base_url)
+            llm = openai.OpenAI(base_url=server.base_url, api_key="test")
+            records, elapsed = run_pipeline(args, corpus, llm, driver)
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+    report = build_report(args, records, elapsed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
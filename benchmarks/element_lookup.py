@@ -0,0 +1,78 @@
+"""
+Click-target lookup latency on large generated catalog pages: the old
+contains(text()) XPath scan versus the cached element index (first build,
+cached lookups, and rebuild after a DOM mutation).
+
+    python -m benchmarks.element_lookup [--sizes 1000,5000] [--runs 10]
+"""
+import argparse
+import statistics
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from element_index import ElementIndex
+from page_readiness import wait_until_ready
+from benchmarks.fakes import FixtureSiteServer, make_headless_driver
+
+MUTATE_JS = "document.body.appendChild(document.createElement('div')).textContent = 'new';"
+
+
+def median_ms(samples):
+    return statistics.median(samples) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000", help="Products per generated page")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    try:
+        with FixtureSiteServer() as site:
+            for size in (int(n) for n in args.sizes.split(",")):
+                driver.get(site.url(f"/large?n={size}"))
+                wait_until_ready(driver, "open")
+                target = f"Product {size - 3} Canvas Tote Bag"
+
+                xpath = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.XPATH, f"//*[contains(text(), '{target}')]")))
+                    xpath.append(time.perf_counter() - start)
+
+                index = ElementIndex(driver)
+                start = time.perf_counter()
+                index.refresh()
+                build = time.perf_counter() - start
+
+                cached, rank_only, rebuild = [], [], []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    element = index.find(target)
+                    cached.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    index.rank(target)
+                    rank_only.append(time.perf_counter() - start)
+                    driver.execute_script(MUTATE_JS)
+                    start = time.perf_counter()
+                    index.refresh()
+                    rebuild.append(time.perf_counter() - start)
+
+                found = element is not None and target in element.text
+                print(f"{size} products ({len(index.elements)} indexed elements), target found: {found}")
+                print(f"  XPath contains(text())   : {median_ms(xpath):8.1f} ms")
+                print(f"  index build (first)      : {build * 1e3:8.1f} ms")
+                print(f"  cached find (round trip) : {median_ms(cached):8.1f} ms")
+                print(f"  ranking only (Python)    : {median_ms(rank_only):8.1f} ms")
+                print(f"  rebuild after mutation   : {median_ms(rebuild):8.1f} ms")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+"""
+Local stand-ins for the external services the assistant talks to, so the
+benchmarks run offline and deterministically.
+"""
+import os
+import re
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")  # Git-ignored
+
+
+def load_command_corpus(path=None):
+    """Load the recorded command corpus: [{"command": ..., "action": ...}, ...]."""
+    path = path or os.path.join(FIXTURES_DIR, "commands.jsonl")
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+###############################
+#     Stub OpenAI Client      #
+###############################
+class StubOpenAIClient:
+    """
+    Mimics `openai.chat.completions.create` for interpret_command.
+    Answers come from a {command: action} table (the recorded corpus), with an
+    optional artificial latency to stand in for the network round trip.
+    A list value scripts a conversation: one reply per call, the last repeating.
+    """
+
+    def __init__(self, responses=None, latency=0.0):
+        self.responses = responses or {}
+        self.latency = latency
+        self.calls = 0
+        self.turns = {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @classmethod
+    def from_corpus(cls, corpus, latency=0.0):
+        return cls({entry["command"].lower(): entry["action"] for entry in corpus}, latency)
+
+    def _create(self, model=None, messages=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        command = _command_from_messages(messages)
+        content = self.responses.get(command, f"search {command}")
+        if isinstance(content, list):
+            turn = self.turns.get(command, 0)
+            self.turns[command] = turn + 1
+            content = content[min(turn, len(content) - 1)]
+        message = SimpleNamespace(role="assistant", content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+
+
+###############################
+#   Fake OpenAI HTTP Server   #
+###############################
+def _tokens(text):
+    """Roughly GPT-sized tokens."""
+    return re.findall(r".{1,4}", text, re.S)
+
+
+def _command_from_messages(messages):
+    prompt = messages[-1]["content"] if messages else ""
+    match = re.search(r'User Command: "(.*)"', prompt)
+    return match.group(1).lower() if match else ""
+
+
+class FakeOpenAIServer:
+    """
+    Local HTTP server speaking the /v1/chat/completions protocol, including
+    chunked server-sent-event streaming. Point a real client at it with
+    `openai.OpenAI(base_url=server.base_url, api_key="test")`.
+
+    latency     delay before the first byte (or the whole non-streamed reply)
+    token_delay delay between streamed chunks
+    suffix      extra prose after the action, as GPT-4 sometimes adds
+    fail_first  answer the first N requests with error_status
+    error_rate  fraction of later requests answered with error_status
+    error_status HTTP status of injected errors (429 adds a Retry-After header)
+    slow_rate   fraction of requests delayed by slow_latency instead of latency
+    """
+
+    def __init__(self, responses=None, latency=0.3, token_delay=0.03, suffix="", port=0,
+                 fail_first=0, error_rate=0.0, error_status=503, retry_after=0.2,
+                 slow_rate=0.0, slow_latency=3.0, seed=0):
+        import random
+
+        self.responses = responses or {}
+        self.latency = latency
+        self.token_delay = token_delay
+        self.suffix = suffix
+        self.fail_first = fail_first
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self.connections = 0
+        self.errors = 0
+        self.slow = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reply_for(self, messages):
+        command = _command_from_messages(messages)
+        return self.responses.get(command, f"search {command}") + self.suffix
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1  # One per TCP connection, so keep-alive shows up here
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (ConnectionResetError, BrokenPipeError):
+                    pass  # The client dropped a pooled keep-alive connection
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    fail = server.requests <= server.fail_first or server._rng.random() < server.error_rate
+                    slow = not fail and server._rng.random() < server.slow_rate
+                    server.errors += fail
+                    server.slow += slow
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                if fail:
+                    self._error(server.error_status)
+                    return
+                text = server.reply_for(body.get("messages", []))
+                time.sleep(server.slow_latency if slow else server.latency)
+                if body.get("stream"):
+                    self._stream(body, text)
+                else:
+                    self._complete(body, text)
+
+            def _complete(self, body, text):
+                time.sleep(server.token_delay * len(_tokens(text)))  # Same generation time as a stream
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _error(self, status):
+                payload = json.dumps({"error": {"message": f"Injected error {status}",
+                                                "type": "server_error", "code": None}}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429 and server.retry_after is not None:
+                    self.send_header("Retry-After", str(server.retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _event(self, body, delta, finish_reason=None):
+                event = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+            def _stream(self, body, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self._event(body, {"role": "assistant", "content": ""})
+                for token in _tokens(text):
+                    self._event(body, {"content": token})
+                    time.sleep(server.token_delay)
+                self._event(body, {}, "stop")
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+
+        return Handler
+
+
+###############################
+#   Local Fixture Websites    #
+###############################
+SITES_DIR = os.path.join(FIXTURES_DIR, "sites")
+
+# Paths the real sites use, mapped onto saved fixture pages
+FIXTURE_ROUTES = {
+    "/": "index.html",
+    "/s": "amazon_search.html",
+    "/results": "youtube_results.html",
+    "/watch": "youtube_watch.html",
+    "/search": "google_search.html",
+}
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+    ".png": "image/png",
+    ".js": "text/javascript",
+}
+
+
+def large_catalog_page(count):
+    """A generated catalog with `count` products, each with a link, price and two buttons."""
+    rows = []
+    for i in range(1, count + 1):
+        rows.append(
+            f'<div class="item" data-index="{i}"><a href="/dp/{i:07d}">Product {i} Canvas Tote Bag</a> '
+            f'<span class="price">${i % 90 + 9}.99</span> '
+            f'<button type="button" aria-label="Add product {i} to cart">Add to cart</button> '
+            f'<button type="button">Save for later</button></div>'
+        )
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Catalog</title></head><body>'
+        '<form action="/s"><input name="k" placeholder="Search catalog" aria-label="Search catalog"></form>'
+        + "\n".join(rows) + "</body></html>"
+    )
+
+
+class FixtureSiteServer:
+    """
+    Serves the saved Amazon/YouTube/Google-like pages in fixtures/sites on
+    127.0.0.1. Every response can be delayed by `delay` seconds, or per request
+    with a `delay=<seconds>` query parameter, to imitate slow sites.
+    """
+
+    def __init__(self, delay=0.0, port=0, sites_dir=SITES_DIR):
+        self.delay = delay
+        self.sites_dir = sites_dir
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def url(self, path="/"):
+        return self.base_url + path
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        from urllib.parse import parse_qs, urlparse
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                time.sleep(float(query.get("delay", [server.delay])[0]))
+
+                if url.path == "/large":
+                    self._send(large_catalog_page(int(query.get("n", ["2000"])[0])).encode(), ".html")
+                    return
+
+                name = FIXTURE_ROUTES.get(url.path, url.path.lstrip("/"))
+                path = os.path.realpath(os.path.join(server.sites_dir, name))
+                if not path.startswith(os.path.realpath(server.sites_dir)) or not os.path.isfile(path):
+                    self.send_error(404)
+                    return
+                with open(path, "rb") as f:
+                    self._send(f.read(), os.path.splitext(path)[1])
+
+            def _send(self, payload, extension):
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPES.get(extension, "application/octet-stream"))
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def make_headless_driver(width=1280, height=900, page_load_strategy="eager"):
+    """Headless Chrome for benchmarks, loading pages like browser_control.get_driver."""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.page_load_strategy = page_load_strategy
+    options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={width},{height}")
+    return webdriver.Chrome(options=options)
+
+
+###############################
+#     Synthetic Audio         #
+###############################
+def write_wav(path, segments, sample_rate=16000, noise=0, seed=0):
+    """
+    Write a 16-bit mono WAV built from (seconds, amplitude, frequency) segments.
+    amplitude=0 gives silence; `noise` adds uniform background noise of that
+    peak level everywhere. Returns the start/end times of every tone segment.
+    """
+    import math
+    import random
+    import struct
+    import wave
+
+    rng = random.Random(seed)
+    samples, spans, t = [], [], 0.0
+    for seconds, amplitude, frequency in segments:
+        count = int(seconds * sample_rate)
+        for i in range(count):
+            value = amplitude * math.sin(2 * math.pi * frequency * i / sample_rate) if amplitude else 0.0
+            if noise:
+                value += rng.uniform(-noise, noise)
+            samples.append(max(-32768, min(32767, int(value))))
+        if amplitude:
+            spans.append((t, t + seconds))
+        t += seconds
+
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    return spans
+
+
+class StubPorcupine:
+    """
+    Wake word stand-in for synthetic audio: treats any run of frames louder
+    than `level` RMS as the keyword and fires on the first quieter frame after
+    it, like Porcupine firing at the end of "Computer".
+    """
+
+    def __init__(self, level=7000, min_frames=5, sample_rate=16000, frame_length=512):
+        self.level = level
+        self.min_frames = min_frames
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self._loud_run = 0
+
+    def process(self, pcm):
+        rms = (sum(s * s for s in pcm) / len(pcm)) ** 0.5
+        if rms > self.level:
+            self._loud_run += 1
+            return -1
+        fired = self._loud_run >= self.min_frames
+        self._loud_run = 0
+        return 0 if fired else -1
+
+    def delete(self):
+        pass
+
+
+class StubRecognizer:
+    """
+    Google STT stand-in for listen(): returns the scripted transcripts in
+    order, one per utterance, after an artificial network latency.
+    """
+
+    def __init__(self, transcripts, latency=0.0):
+        self.transcripts = list(transcripts)
+        self.latency = latency
+        self.calls = 0
+
+    def recognize_google(self, audio_data, **kwargs):
+        import speech_recognition as sr
+
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.transcripts:
+            raise sr.UnknownValueError()
+        return self.transcripts.pop(0)
+
+
+class StubSpeechRenderer:
+    """
+    pyttsx3 stand-in for TTSWorker: after a synthesis delay, renders silence
+    as long as the text would take to say at `words_per_second`.
+    """
+    voice = "stub"
+
+    def __init__(self, latency=0.2, words_per_second=2.5, sample_rate=16000):
+        self.latency = latency
+        self.words_per_second = words_per_second
+        self.sample_rate = sample_rate
+        self.calls = 0
+
+    def render(self, text):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        seconds = len(text.split()) / self.words_per_second
+        return b"\x00\x00" * int(seconds * self.sample_rate), self.sample_rate
+
+    def say(self, text):
+        pcm, sample_rate = self.render(text)
+        time.sleep(len(pcm) / 2 / sample_rate)
+
+
+###############################
+#   Scripted Browser          #
+###############################
+class ScriptedBrowser:
+    """
+    WebDriver stand-in for page_readiness: navigations started with
+    window.location.assign take as long as the URL's `load=<seconds>` query
+    parameter, and window.stop() ends the current load early. Every load is
+    kept in `loads` as [url, start, end, stopped] (perf_counter times).
+    """
+
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.loads = []
+        self._document = 0
+        self._lock = threading.Lock()
+
+    def execute_cdp_cmd(self, cmd, params):
+        raise RuntimeError("no DevTools in the scripted browser")
+
+    def execute_script(self, script, *args):
+        from urllib.parse import parse_qs, urlparse
+        from page_readiness import STATUS_SCRIPT
+
+        now = time.perf_counter()
+        with self._lock:
+            if script == STATUS_SCRIPT:
+                loading = self.loads and now < self.loads[-1][2]
+                return {"document": str(self._document), "ready_state": "loading" if loading else "complete",
+                        "inflight": 0, "quiet_ms": 1e6, "version": 0, "url": self.current_url}
+            if "location.assign" in script:
+                url = args[0]
+                seconds = float(parse_qs(urlparse(url).query).get("load", ["0"])[0])
+                self._document += 1
+                self.current_url = url
+                self.loads.append([url, now, now + seconds, False])
+            elif "window.stop()" in script and self.loads and now < self.loads[-1][2]:
+                self.loads[-1][2] = now
+                self.loads[-1][3] = True
+        return None
+
+    def get(self, url):
+        self.execute_script("window.location.assign(arguments[0]);", url)
+        time.sleep(max(0.0, self.loads[-1][2] - time.perf_counter()))
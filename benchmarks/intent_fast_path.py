@@ -0,0 +1,46 @@
+"""
+Runs the recorded command corpus through the local intent grammar and reports
+fast-path coverage, agreement with the recorded GPT-4 actions, and latency.
+
+    python -m benchmarks.intent_fast_path [--corpus path.jsonl] [--verbose]
+"""
+import argparse
+import statistics
+import time
+
+from intent_grammar import match_intent
+from benchmarks.fakes import load_command_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="JSONL corpus (defaults to fixtures/commands.jsonl)")
+    parser.add_argument("--verbose", action="store_true", help="Print every mismatch and fallback")
+    args = parser.parse_args()
+
+    corpus = load_command_corpus(args.corpus)
+    handled, correct, timings = 0, 0, []
+    for entry in corpus:
+        start = time.perf_counter()
+        match = match_intent(entry["command"])
+        timings.append(time.perf_counter() - start)
+        if match is None:
+            if args.verbose:
+                print(f"  → LLM   {entry['command']!r}")
+            continue
+        handled += 1
+        if match.action == entry["action"]:
+            correct += 1
+        elif args.verbose:
+            print(f"  ✗ {match.rule:<14} {entry['command']!r}: {match.action!r} != {entry['action']!r}")
+
+    total = len(corpus)
+    print(f"Commands          : {total}")
+    print(f"Fast-path coverage: {handled / total:.1%} ({handled}/{total})")
+    if handled:
+        print(f"Agreement with LLM: {correct / handled:.1%} ({correct}/{handled})")
+    print(f"Median match time : {statistics.median(timings) * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+The pooled, rate-limited LLM client versus a bare OpenAI client against the
+fake OpenAI server with injected 5xx errors and slow replies: success rate,
+latency percentiles, TCP connections opened, retries, hedges and coalesced
+duplicates; plus the fixed 1.5 s cooldown versus token-bucket pacing.
+
+    python -m benchmarks.llm_resilience [--requests 40] [--threads 4] [--error-rate 0.2]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import openai
+
+from llm_client import LLMClient
+from benchmarks.fakes import FakeOpenAIServer, load_command_corpus
+
+
+def messages_for(command):
+    return [{"role": "user", "content": f'User Command: "{command}"'}]
+
+
+def run_load(client, commands, threads):
+    """Send every command from `threads` workers; returns (latencies of successes, failures)."""
+    latencies, failures, lock = [], [0], threading.Lock()
+    queue = list(commands)
+
+    def worker():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                command = queue.pop()
+            start = time.perf_counter()
+            try:
+                client.chat.completions.create(model="gpt-4", messages=messages_for(command))
+            except openai.APIError:
+                with lock:
+                    failures[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return latencies, failures[0]
+
+
+def describe(label, latencies, failures, connections):
+    ordered = sorted(latencies) or [0.0]
+    total = len(latencies) + failures
+    print(f"{label:<14}: {len(latencies)}/{total} ok, p50 {statistics.median(ordered) * 1e3:5.0f} ms, "
+          f"p95 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e3:5.0f} ms, "
+          f"{connections} connections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Share of requests answered with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="Share of requests that stall")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    args = parser.parse_args()
+
+    corpus = [entry["command"] for entry in load_command_corpus()]
+    commands = [corpus[i % len(corpus)] for i in range(args.requests)]  # Includes repeats
+    faults = dict(latency=args.latency, error_rate=args.error_rate, slow_rate=args.slow_rate,
+                  slow_latency=args.slow_latency)
+
+    with FakeOpenAIServer(**faults) as server:
+        bare = openai.OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+        latencies, failures = run_load(bare, commands, args.threads)
+        describe("bare client", latencies, failures, server.connections)
+
+    with FakeOpenAIServer(**faults) as server:
+        client = LLMClient(api_key="test", base_url=server.base_url, hedge_after=args.latency * 4,
+                           rate=50, burst=10, backoff_base=0.1)
+        latencies, failures = run_load(client, commands, args.threads)
+        describe("LLMClient", latencies, failures, server.connections)
+        stats = client.stats()
+        print(f"{'':<14}  retries {stats['retries']}, hedges {stats['hedges']} "
+              f"(won {stats['hedge_wins']}), coalesced {stats['coalesced']}, gave up {stats['errors']}")
+        client.close()
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        sequence = commands[:8]
+        bare = openai.OpenAI(base_url=server.base_url, api_key="test")
+        start = time.perf_counter()
+        for command in sequence:
+            time.sleep(1.5)  # The old execute_command cooldown
+            bare.chat.completions.create(model="gpt-4", messages=messages_for(command))
+        fixed = time.perf_counter() - start
+
+        client = LLMClient(api_key="test", base_url=server.base_url)
+        start = time.perf_counter()
+        for command in sequence:
+            client.chat.completions.create(model="gpt-4", messages=messages_for(command + " again"))
+        bucket = time.perf_counter() - start
+        client.close()
+    print(f"{len(sequence)} sequential calls: fixed 1.5 s cooldown {fixed:.1f}s, token bucket {bucket:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
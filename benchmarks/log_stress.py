@@ -0,0 +1,100 @@
+"""
+Floods the GUI log from worker threads and reports, once a second, the
+visible line count, queue depth, traced Python memory and how late a 20 ms
+Tk heartbeat fires, to show memory stays flat and the UI stays responsive.
+Needs a display (Tk).
+
+    python -m benchmarks.log_stress [--rate 5000] [--threads 4] [--seconds 10]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import tkinter as tk
+import tracemalloc
+from tkinter import scrolledtext
+
+from log_pipeline import LogPipeline
+
+HEARTBEAT_MS = 20
+
+
+def producer(pipeline, rate, stop):
+    """Push `rate` lines per second until stopped."""
+    interval, sent, start = 1.0 / rate, 0, time.perf_counter()
+    while not stop.is_set():
+        pipeline.push(f"🔍 AI Interpretation: open https://www.youtube.com/results?search_query=line{sent}")
+        sent += 1
+        delay = start + sent * interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=int, default=5000, help="Lines per second, all threads combined")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--max-lines", type=int, default=500, help="Visible ring size")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    root = tk.Tk()
+    root.geometry("500x350")
+    widget = scrolledtext.ScrolledText(root, width=50, height=10)
+    widget.pack()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = LogPipeline(widget, max_lines=args.max_lines, spill_path=os.path.join(tmp, "gui.log"))
+        pipeline.start(root)
+        stop = threading.Event()
+        workers = [threading.Thread(target=producer, args=(pipeline, args.rate / args.threads, stop), daemon=True)
+                   for _ in range(args.threads)]
+        lags, rows = [], []
+        started = time.perf_counter()
+        expected = [started + HEARTBEAT_MS / 1e3]
+
+        def heartbeat():
+            now = time.perf_counter()
+            lags.append(now - expected[0])
+            expected[0] = now + HEARTBEAT_MS / 1e3
+            root.after(HEARTBEAT_MS, heartbeat)
+
+        def report():
+            second = len(rows) + 1
+            window = sorted(lags)
+            lags.clear()
+            lines = int(widget.index("end-1c").split(".")[0])
+            rows.append((second, pipeline.rendered, pipeline.stats()["queued"], lines,
+                         tracemalloc.get_traced_memory()[0] / 1e6,
+                         window[int(len(window) * 0.99)] * 1e3 if window else 0.0,
+                         window[-1] * 1e3 if window else 0.0))
+            print("{:>3}s rendered {:>8} queued {:>6} widget lines {:>5} memory {:6.2f} MB "
+                  "heartbeat lag p99 {:5.1f} ms max {:5.1f} ms".format(*rows[-1]))
+            if second >= args.seconds:
+                stop.set()
+                root.after(200, root.destroy)
+            else:
+                root.after(1000, report)
+
+        for worker in workers:
+            worker.start()
+        root.after(HEARTBEAT_MS, heartbeat)
+        root.after(1000, report)
+        root.mainloop()
+        stop.set()
+        pipeline.close()
+
+        elapsed = time.perf_counter() - started
+        spill_bytes = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+
+    print(f"Pushed {pipeline.pushed} lines in {elapsed:.1f}s ({pipeline.pushed / elapsed:.0f}/s), "
+          f"spilled {pipeline.spilled} ({spill_bytes / 1e6:.1f} MB on disk incl. rotations)")
+    if len(rows) >= 2:
+        print(f"Memory second 1 -> last: {rows[0][4]:.2f} MB -> {rows[-1][4]:.2f} MB; "
+              f"worst heartbeat lag {max(r[6] for r in rows):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Replay speed of recorded macros versus the full plan path on the fixture
+sites: each compound command from fixtures/plan_scenarios.jsonl is run once
+through the model (recording its trace), then replayed from the macro, then
+replayed with its recorded element locators broken so every element step
+falls back to the normal handler lookups.
+
+    python -m benchmarks.macro_replay [--latency 1.0] [--runs 3]
+"""
+import argparse
+import json
+import statistics
+
+from macros import MacroStore, execute_with_macro
+from page_readiness import wait_until_ready
+from benchmarks.fakes import FixtureSiteServer, StubOpenAIClient, make_headless_driver
+from benchmarks.plan_mode import load_scenarios
+
+
+def scripted_client(scenario, latency):
+    replies = [json.dumps({"steps": scenario["plan"]})]
+    if scenario.get("replan"):
+        replies.append(json.dumps({"steps": scenario["replan"]}))
+    return StubOpenAIClient({scenario["command"]: replies}, latency)
+
+
+def run(driver, site, scenario, store, client):
+    driver.get(site.url("/"))
+    wait_until_ready(driver, "open")
+    return execute_with_macro(scenario["command"], driver, client, store=store)
+
+
+def break_locators(store, command):
+    steps = store.get(command)
+    for step in steps:
+        if step.get("target"):
+            step["target"] = dict(step["target"], selector="#no-such-element")
+    store.put(command, steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="Simulated model latency per call")
+    parser.add_argument("--runs", type=int, default=3, help="Replays per scenario")
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    totals = {"full": [], "replay": [], "fallback": []}
+    try:
+        with FixtureSiteServer() as site:
+            for scenario in load_scenarios(site):
+                store = MacroStore(path=None)
+                full = run(driver, site, scenario, store, scripted_client(scenario, args.latency))
+
+                replays = []
+                for _ in range(args.runs):
+                    client = scripted_client(scenario, args.latency)
+                    result = run(driver, site, scenario, store, client)
+                    replays.append((result, client.calls))
+
+                break_locators(store, scenario["command"])
+                client = scripted_client(scenario, args.latency)
+                fallback = run(driver, site, scenario, store, client)
+
+                replay_time = statistics.median(r.elapsed for r, _ in replays)
+                totals["full"].append(full.elapsed)
+                totals["replay"].append(replay_time)
+                totals["fallback"].append(fallback.elapsed)
+                ok = all(r.ok for r, _ in replays) and full.ok and fallback.ok
+                print(f"{scenario['command']}")
+                print(f"  full path: {full.model_calls} calls, {full.elapsed:5.2f}s | "
+                      f"replay: {max(calls for _, calls in replays)} calls, {replay_time:5.2f}s | "
+                      f"stale locators: {client.calls} calls, {fallback.elapsed:5.2f}s "
+                      f"{'✓' if ok else '✗'}")
+    finally:
+        driver.quit()
+
+    full, replay = sum(totals["full"]), sum(totals["replay"])
+    print(f"Wall clock: full {full:.1f}s, replay {replay:.1f}s ({full / max(replay, 1e-9):.1f}x faster), "
+          f"stale locators {sum(totals['fallback']):.1f}s")
+
+
+if __name__ == "__main__":
+    main()
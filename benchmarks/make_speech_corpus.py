@@ -0,0 +1,61 @@
+"""
+Renders the speech corpus manifest (fixtures/speech/manifest.jsonl) to 16 kHz
+mono 16-bit WAVs with the system text-to-speech voice, for stt_backends.
+Recorded WAVs of real speakers can replace the generated ones under the same
+names, or live in another directory with their own manifest (--corpus).
+
+    python -m benchmarks.make_speech_corpus [--corpus DIR] [--rate 170] [--force]
+"""
+import argparse
+import os
+import tempfile
+import wave
+
+import pyttsx3
+import speech_recognition as sr
+
+from audio_capture import SAMPLE_RATE
+from benchmarks.stt_backends import SPEECH_DIR, load_speech_corpus
+
+
+def to_pcm16k(path):
+    """Read any WAV/AIFF/FLAC the TTS engine wrote as 16 kHz mono 16-bit PCM."""
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    return audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+
+
+def write_pcm(path, pcm, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=SPEECH_DIR, help="Directory holding manifest.jsonl")
+    parser.add_argument("--rate", type=int, default=170, help="Speaking rate in words per minute")
+    parser.add_argument("--force", action="store_true", help="Overwrite existing WAVs")
+    args = parser.parse_args()
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", args.rate)
+    written = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for entry in load_speech_corpus(args.corpus):
+            path = os.path.join(args.corpus, entry["wav"])
+            if os.path.exists(path) and not args.force:
+                continue
+            raw = os.path.join(tmp, "utterance.wav")
+            engine.save_to_file(entry["text"], raw)
+            engine.runAndWait()
+            write_pcm(path, to_pcm16k(raw))
+            written += 1
+            print(f"{entry['wav']}: {entry['text']}")
+    print(f"Wrote {written} WAV file(s) to {args.corpus}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Bytes sent to the model and capture time per turn with page fingerprinting
+versus a full snapshot every turn, on fixture scenarios in headless Chrome: a
+follow-up question on an unchanged page, a small in-page change, a scroll and
+a navigation.
+
+    python -m benchmarks.page_fingerprint [--runs 3]
+"""
+import argparse
+import statistics
+import time
+
+from page_fingerprint import PageTracker
+from page_readiness import navigate
+from page_snapshot import take_snapshot
+from benchmarks.fakes import FixtureSiteServer, make_headless_driver
+
+# Marks the first result "added to cart" and changes its price: a few elements, one small region
+ADD_TO_CART_JS = """
+const item = document.querySelector('[data-component-type="s-search-result"]');
+const button = document.createElement('button');
+button.textContent = 'Added to cart';
+item.appendChild(button);
+const price = item.querySelector('.a-offscreen');
+if (price) price.textContent = '$1.00';
+"""
+
+# name -> turns; each turn is (what happens before it, a function of (driver, site) or None)
+SCENARIOS = {
+    "follow-up question": [
+        ("open results", lambda d, site: navigate(d, site.url("/s?k=crossbody+bags"))),
+        ("user answers", None),
+        ("user answers again", None),
+    ],
+    "small change": [
+        ("open results", lambda d, site: navigate(d, site.url("/s?k=crossbody+bags"))),
+        ("add to cart", lambda d, site: d.execute_script(ADD_TO_CART_JS)),
+    ],
+    "scroll": [
+        ("open results", lambda d, site: navigate(d, site.url("/results?search_query=cocomelon"))),
+        ("scroll down", lambda d, site: d.execute_script("window.scrollBy(0, 600);")),
+    ],
+    "navigation": [
+        ("open results", lambda d, site: navigate(d, site.url("/results?search_query=cocomelon"))),
+        ("open other site", lambda d, site: navigate(d, site.url("/search?q=python+tutorials"))),
+    ],
+}
+
+
+def run_scenario(driver, site, turns):
+    """[(label, full bytes, full seconds, tracked status, tracked bytes, tracked seconds)] per turn."""
+    tracker = PageTracker()
+    rows = []
+    for i, (label, action) in enumerate(turns):
+        if action:
+            action(driver, site)
+        start = time.perf_counter()
+        snapshot = take_snapshot(driver)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        update = tracker.capture(driver, full=i == 0)
+        tracked_seconds = time.perf_counter() - start
+        rows.append((label, snapshot.payload_bytes(), full_seconds, update.status, update.payload_bytes(),
+                     tracked_seconds))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    try:
+        with FixtureSiteServer() as site:
+            for name, turns in SCENARIOS.items():
+                runs = [run_scenario(driver, site, turns) for _ in range(args.runs)]
+                print(f"{name}")
+                totals = [0, 0.0, 0, 0.0]
+                for i, (label, _) in enumerate(turns):
+                    samples = [run[i] for run in runs]
+                    full_bytes = statistics.median(s[1] for s in samples)
+                    full_ms = statistics.median(s[2] for s in samples) * 1e3
+                    tracked_bytes = statistics.median(s[4] for s in samples)
+                    tracked_ms = statistics.median(s[5] for s in samples) * 1e3
+                    status = samples[-1][3]
+                    totals = [totals[0] + full_bytes, totals[1] + full_ms,
+                              totals[2] + tracked_bytes, totals[3] + tracked_ms]
+                    print(f"  {label:<20} full {full_bytes / 1024:7.1f} KiB {full_ms:6.1f} ms | "
+                          f"{status:<9} {tracked_bytes / 1024:7.1f} KiB {tracked_ms:6.1f} ms")
+                print(f"  {'total':<20} bytes -{100 * (1 - totals[2] / max(totals[0], 1)):.0f}%  "
+                      f"capture time -{100 * (1 - totals[3] / max(totals[1], 1e-9)):.0f}%")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Wall time of tiled, pooled, cached OCR versus single-threaded whole-image OCR
+on fixture screenshots: a results page drawn as one image (as a canvas page
+would be), at 1x and 2x pixel density. For the tiled engine it reports a cold
+read, a re-read after one line changed (only that band is OCR'd again) and an
+unchanged re-read. Needs the tesseract binary (pytesseract calls it).
+
+    python -m benchmarks.page_ocr [--runs 3] [--workers N] [--images shot1.png ...]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from page_ocr import OcrEngine, ocr_tile
+from benchmarks.fakes import load_command_corpus
+
+ROW_HEIGHT = 44
+
+
+def font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has only the small bitmap font
+        return ImageFont.load_default()
+
+
+def results_page(lines, width=1280, height=900, scale=1, seed=0):
+    """A screenshot-like image of product rows with prices."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width * scale, height * scale), "white")
+    draw = ImageDraw.Draw(img)
+    face = font(18 * scale)
+    for row, text in enumerate(lines[:height // ROW_HEIGHT]):
+        y = (12 + row * ROW_HEIGHT) * scale
+        draw.text((24 * scale, y), text, fill="black", font=face)
+        draw.text(((width - 140) * scale, y), f"${rng.randint(5, 120)}.{rng.randint(0, 99):02d}",
+                  fill=(180, 30, 30), font=face)
+    return img
+
+
+def edit_line(img, row, text, scale=1):
+    """Redraw one row, as a small page update would."""
+    img = img.copy()
+    draw = ImageDraw.Draw(img)
+    y = (12 + row * ROW_HEIGHT) * scale
+    draw.rectangle((0, y - 2 * scale, img.width, y + (ROW_HEIGHT - 10) * scale), fill="white")
+    draw.text((24 * scale, y), text, fill="black", font=font(18 * scale))
+    return img
+
+
+def whole_image(img):
+    """The old approach: one tesseract call over the full screenshot on this thread."""
+    return ocr_tile(img.mode, img.size, img.tobytes())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (default: one per core)")
+    parser.add_argument("--images", nargs="*", help="Real screenshots to use instead of the fixtures")
+    args = parser.parse_args()
+
+    lines = [entry["command"].capitalize() for entry in load_command_corpus()]
+    if args.images:
+        fixtures = [(path, Image.open(path).convert("RGB"), 1) for path in args.images]
+    else:
+        fixtures = [(f"results page {scale}x", results_page(lines, scale=scale), scale) for scale in (1, 2)]
+
+    engine = OcrEngine(workers=args.workers)
+    whole_image(fixtures[0][1].crop((0, 0, 64, 64)))           # First tesseract start-up
+    engine.read_image(fixtures[0][1].crop((0, 0, 64, 64)))     # Pool start-up
+    try:
+        for name, img, scale in fixtures:
+            changed = edit_line(img, 3, "Added to cart: leather crossbody bag", scale)
+            single, cold, edited, same = [], [], [], []
+            for _ in range(args.runs):
+                boxes, elapsed = timed(whole_image, img)
+                single.append(elapsed)
+                engine.clear()
+                result, elapsed = timed(engine.read_image, img)
+                cold.append(elapsed)
+                after, elapsed = timed(engine.read_image, changed)
+                edited.append(elapsed)
+                again, elapsed = timed(engine.read_image, changed)
+                same.append(elapsed)
+            print(f"{name} ({img.width}x{img.height}, {result.tiles} bands, {engine.workers} workers)")
+            print(f"  single-threaded whole image: {statistics.median(single) * 1e3:7.0f} ms  {len(boxes)} lines")
+            print(f"  tiled pool, cold           : {statistics.median(cold) * 1e3:7.0f} ms  {len(result.boxes)} lines")
+            print(f"  after a one-line change    : {statistics.median(edited) * 1e3:7.0f} ms  "
+                  f"({after.tiles - after.reused} of {after.tiles} bands re-read)")
+            print(f"  unchanged                  : {statistics.median(same) * 1e3:7.1f} ms  "
+                  f"({again.reused} of {again.tiles} bands cached)")
+    finally:
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares the old fixed sleep after driver.get with the readiness engine on
+fixture pages whose document and XHR data are served with artificial delays.
+Reports wall time and whether the results were actually on screen.
+
+    python -m benchmarks.page_readiness [--sleep 3] [--delays 0.2,1,2.5,4]
+"""
+import argparse
+import time
+
+from page_readiness import install, wait_until_ready
+from benchmarks.fakes import FixtureSiteServer, make_headless_driver
+
+LOADED_JS = "return document.getElementById('results').dataset.loaded === 'true';"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sleep", type=float, default=3.0, help="The fixed sleep being replaced")
+    parser.add_argument("--delays", default="0.2,1,2.5,4", help="XHR data delays to test (seconds)")
+    parser.add_argument("--page-delay", type=float, default=0.3, help="Delay before the HTML itself is served")
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+    driver.set_page_load_timeout(30)
+    install(driver)
+    try:
+        with FixtureSiteServer() as site:
+            print(f"{'data delay':>10} | {'fixed sleep':>18} | {'readiness':>18}")
+            for delay in (float(d) for d in args.delays.split(",")):
+                url = site.url(f"/slow_results.html?data_delay={delay}&delay={args.page_delay}")
+
+                start = time.perf_counter()
+                driver.get(url)
+                time.sleep(args.sleep)
+                fixed = time.perf_counter() - start
+                fixed_ok = driver.execute_script(LOADED_JS)
+
+                start = time.perf_counter()
+                driver.get(url)
+                result = wait_until_ready(driver, "open")
+                ready = time.perf_counter() - start
+                ready_ok = driver.execute_script(LOADED_JS)
+
+                print(f"{delay:>9.1f}s | {fixed:>7.2f}s {'loaded' if fixed_ok else 'MISSING':>9} "
+                      f"| {ready:>7.2f}s {'loaded' if ready_ok else 'MISSING':>9}"
+                      f"{'' if result.ready else ' (timed out)'}")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Model calls and wall-clock time for compound commands on the fixture sites:
+the turn-by-turn loop (page capture, 1.5 s cooldown and one model call per
+action) versus plan mode (one call for the whole plan, re-planning only when a
+step misses its postcondition). Scenarios live in fixtures/plan_scenarios.jsonl;
+a scenario's "replan" replaces the tail of its flawed first plan.
+
+    python -m benchmarks.plan_mode [--latency 1.0] [--cooldown 1.5]
+"""
+import argparse
+import json
+import os
+import time
+
+from browser_control import ACTION_HANDLERS, capture_screenshot
+from page_readiness import POLICIES, wait_until_ready
+from plan_mode import execute_plan
+from benchmarks.fakes import FIXTURES_DIR, FixtureSiteServer, StubOpenAIClient, make_headless_driver
+
+
+def load_scenarios(site):
+    path = os.path.join(FIXTURES_DIR, "plan_scenarios.jsonl")
+    with open(path, encoding="utf-8") as f:
+        text = f.read().replace("{site}", site.base_url)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def successful_steps(scenario):
+    """The action sequence that actually completes the scenario."""
+    plan, replan = scenario["plan"], scenario.get("replan")
+    return plan[:len(plan) - len(replan)] + replan if replan else plan
+
+
+def turn_by_turn(driver, scenario, latency, cooldown):
+    """The execute_command loop: capture, cool down and ask the model once per action."""
+    steps = successful_steps(scenario)
+    client = StubOpenAIClient({scenario["command"]: [json.dumps(step) for step in steps]}, latency)
+    messages = [{"role": "user", "content": f'User Command: "{scenario["command"]}"'}]
+    start = time.perf_counter()
+    for _ in steps:
+        capture_screenshot(driver)
+        time.sleep(cooldown)
+        reply = client.chat.completions.create(model="gpt-4", messages=messages)
+        step = json.loads(reply.choices[0].message.content)
+        ACTION_HANDLERS[step["intent"]](step["parameters"], driver)
+        wait_until_ready(driver, step["intent"] if step["intent"] in POLICIES else "default")
+    return client.calls, time.perf_counter() - start
+
+
+def planned(driver, scenario, latency):
+    replies = [json.dumps({"steps": scenario["plan"]})]
+    if scenario.get("replan"):
+        replies.append(json.dumps({"steps": scenario["replan"]}))
+    client = StubOpenAIClient({scenario["command"]: replies}, latency)
+    result = execute_plan(scenario["command"], driver, client=client)
+    return result, client.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="Simulated model latency per call")
+    parser.add_argument("--cooldown", type=float, default=1.5, help="Per-turn sleep in the old loop")
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    totals = {"turn_calls": 0, "turn_time": 0.0, "plan_calls": 0, "plan_time": 0.0}
+    try:
+        with FixtureSiteServer() as site:
+            for scenario in load_scenarios(site):
+                driver.get(site.url("/"))
+                wait_until_ready(driver, "open")
+                turn_calls, turn_time = turn_by_turn(driver, scenario, args.latency, args.cooldown)
+
+                driver.get(site.url("/"))
+                wait_until_ready(driver, "open")
+                result, plan_calls = planned(driver, scenario, args.latency)
+
+                totals["turn_calls"] += turn_calls
+                totals["turn_time"] += turn_time
+                totals["plan_calls"] += plan_calls
+                totals["plan_time"] += result.elapsed
+                print(f"{scenario['command']}")
+                print(f"  turn-by-turn: {turn_calls} calls, {turn_time:5.2f}s | "
+                      f"plan mode: {plan_calls} calls ({result.replans} re-plan), {result.elapsed:5.2f}s "
+                      f"{'✓' if result.ok else '✗ ' + str(result.error)}")
+    finally:
+        driver.quit()
+
+    print(f"Model calls: {totals['turn_calls']} -> {totals['plan_calls']}")
+    print(f"Wall clock : {totals['turn_time']:.1f}s -> {totals['plan_time']:.1f}s "
+          f"({totals['turn_time'] / max(totals['plan_time'], 1e-9):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Command throughput with 1, 2 and 4 pooled browser sessions when every command
+loads a slow fixture page (network-bound, like real Amazon/YouTube loads).
+
+    python -m benchmarks.session_pool [--commands 12] [--sizes 1,2,4] [--delay 0.5]
+"""
+import argparse
+import time
+
+from browser_lifecycle import BrowserManager
+from page_readiness import wait_until_ready
+from session_pool import SessionPool
+from benchmarks.fakes import FixtureSiteServer
+
+PAGES = ["/s?k=headphones", "/results?search_query=cocomelon", "/search?q=weather", "/watch?v=1"]
+
+
+def load_page(driver, url):
+    driver.get(url)
+    wait_until_ready(driver, "open")
+
+
+def run(size, urls):
+    """Seconds to load every URL through a pool of `size` pre-launched sessions."""
+    managers = [BrowserManager(headless=True) for _ in range(size)]
+    for future in [m.warm_up() for m in managers]:
+        future.result()
+    pool = SessionPool(managers, max_sessions=size)
+    try:
+        start = time.perf_counter()
+        futures = [pool.submit(load_page, url) for url in urls]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=12)
+    parser.add_argument("--sizes", default="1,2,4", help="Pool sizes to compare")
+    parser.add_argument("--delay", type=float, default=0.5, help="Server delay per page, seconds")
+    args = parser.parse_args()
+
+    with FixtureSiteServer() as site:
+        urls = []
+        for i in range(args.commands):
+            page = PAGES[i % len(PAGES)]
+            urls.append(site.url(f"{page}&delay={args.delay}"))
+
+        baseline = None
+        for size in (int(n) for n in args.sizes.split(",")):
+            elapsed = run(size, urls)
+            baseline = baseline or elapsed
+            print(f"{size} session(s): {elapsed:6.2f}s for {args.commands} commands, "
+                  f"{args.commands / elapsed:5.2f} commands/s ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Site adapters on the saved fixture pages: resolving "play video N" and
+"cheapest under $X" from one bulk extraction versus per-element DOM queries,
+the price-filtered Amazon search with one navigation versus the old two, and
+opening the next results page cold versus after the adapter's prefetch.
+
+    python -m benchmarks.site_adapters [--runs 5] [--delay 0.4] [--think 1.0]
+"""
+import argparse
+import statistics
+import time
+
+from selenium.webdriver.common.by import By
+
+from page_readiness import wait_until_ready
+from site_adapters import AmazonAdapter, YouTubeAdapter, parse_price
+from benchmarks.fakes import FixtureSiteServer, make_headless_driver
+
+RESULT_SELECTOR = '[data-component-type="s-search-result"]'
+
+
+def median_ms(samples):
+    return statistics.median(samples) * 1e3
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def legacy_cheapest(driver, max_price):
+    """One find per result plus one per field, as a handler without an extractor would do it."""
+    best = None
+    for element in driver.find_elements(By.CSS_SELECTOR, RESULT_SELECTOR):
+        prices = element.find_elements(By.CSS_SELECTOR, ".a-price .a-offscreen")
+        links = element.find_elements(By.CSS_SELECTOR, "h2 a")
+        if not prices or not links:
+            continue
+        price = parse_price(prices[0].get_attribute("textContent"))
+        if price is not None and price <= max_price and (best is None or price < best[0]):
+            best = (price, links[0].get_attribute("href"))
+    return best
+
+
+def legacy_video(driver, index):
+    """The old handle_play_video lookup: one XPath query per command."""
+    xpath = f"(//ytd-video-renderer//a[@id='video-title'])[{index}]"
+    return driver.find_element(By.XPATH, xpath).get_attribute("href")
+
+
+def legacy_price_search(driver, url):
+    """The old search_amazon_price_filter, which loaded the same URL twice."""
+    driver.get(url)
+    driver.get(url)
+    wait_until_ready(driver, "search_amazon")
+
+
+def adapter_price_search(driver, adapter, query, max_price):
+    adapter.search(driver, query, max_price=max_price)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.4, help="Server delay per page load")
+    parser.add_argument("--think", type=float, default=1.0, help="Seconds on a results page before 'next page'")
+    parser.add_argument("--max-price", type=float, default=50.0)
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    try:
+        with FixtureSiteServer() as site:
+            amazon = AmazonAdapter(base_url=site.base_url)
+            youtube = YouTubeAdapter(base_url=site.base_url)
+
+            # "cheapest under $X" on the Amazon results page
+            driver.get(amazon.search_url("crossbody bags"))
+            wait_until_ready(driver, "search_amazon")
+            legacy, cold, cached = [], [], []
+            for _ in range(args.runs):
+                expected, elapsed = timed(legacy_cheapest, driver, args.max_price)
+                legacy.append(elapsed)
+                amazon._results.clear()
+                result, elapsed = timed(amazon.cheapest, driver, args.max_price)
+                cold.append(elapsed)
+                _, elapsed = timed(amazon.cheapest, driver, args.max_price)
+                cached.append(elapsed)
+            same = expected is not None and result is not None and (result.price, result.link) == expected
+            print(f"cheapest under ${args.max_price:g} ({len(amazon.extract(driver))} results): "
+                  f"per-element {median_ms(legacy):6.1f} ms | bulk {median_ms(cold):5.1f} ms | "
+                  f"cached {median_ms(cached):5.2f} ms {'✓' if same else '✗ different answers'}")
+
+            # "play video N" for the first five results
+            driver.get(youtube.search_url("lofi"))
+            wait_until_ready(driver, "search")
+            youtube._results.clear()
+            legacy, bulk, same = [], [], True
+            for n in range(1, 6):
+                link, elapsed = timed(legacy_video, driver, n)
+                legacy.append(elapsed)
+                result, elapsed = timed(youtube.result, driver, n)
+                bulk.append(elapsed)
+                same = same and result is not None and result.link == link
+            print(f"play video 1-5: XPath per command {sum(legacy) * 1e3:6.1f} ms | "
+                  f"one extraction {sum(bulk) * 1e3:5.1f} ms {'✓' if same else '✗ different answers'}")
+
+            # Price-filtered Amazon search: one navigation instead of two
+            site.delay = args.delay
+            url = amazon.search_url("crossbody bags", max_price=args.max_price)
+            legacy, single = [], []
+            for _ in range(args.runs):
+                legacy.append(timed(legacy_price_search, driver, url)[1])
+                single.append(timed(adapter_price_search, driver, amazon, "crossbody bags", args.max_price)[1])
+            print(f"price-filtered search: two loads {median_ms(legacy):6.0f} ms | "
+                  f"one load {median_ms(single):6.0f} ms")
+
+            # Next results page, cold versus prefetched while the user reads page 1
+            cold, warm = [], []
+            for run in range(args.runs):
+                driver.get(amazon.search_url(f"cold {run}"))
+                wait_until_ready(driver, "search_amazon")
+                time.sleep(args.think)
+                cold.append(timed(amazon.next_page, driver)[1])
+
+                amazon.search(driver, f"warm {run}")  # Prefetches page 2
+                time.sleep(args.think)
+                warm.append(timed(amazon.next_page, driver)[1])
+            print(f"next page (server delay {args.delay:g}s): cold {median_ms(cold):6.0f} ms | "
+                  f"prefetched {median_ms(warm):6.0f} ms")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the old per-turn capture (screenshot to disk, second base64
+screenshot, disk re-read, page_source and three context round trips) with the
+single in-memory snapshot, on the local fixture sites in headless Chrome.
+
+    python -m benchmarks.snapshot_pipeline [--runs 5] [--format JPEG]
+"""
+import argparse
+import base64
+import os
+import statistics
+import tempfile
+import time
+
+from selenium.webdriver.common.by import By
+
+from page_snapshot import take_snapshot
+from benchmarks.fakes import FixtureSiteServer, make_headless_driver
+
+PAGES = ["/s?k=crossbody+bags", "/results?search_query=cocomelon", "/search?q=python+tutorials"]
+
+
+def legacy_capture(driver, tmp):
+    """The pre-snapshot code path, minus its fixed sleeps."""
+    path = os.path.join(tmp, "screenshot.png")
+    driver.save_screenshot(path)
+    driver.get_screenshot_as_base64()
+    with open(path, "rb") as f:
+        encoded_image = base64.b64encode(f.read()).decode("utf-8")
+    page_source = driver.page_source
+    title, url = driver.title, driver.current_url
+    try:
+        text = driver.find_element(By.TAG_NAME, "body").text[:500]
+    except Exception:
+        text = ""
+    context = f"Current Page: {title}\nURL: {url}\nVisible Text: {text}"
+    return len(encoded_image) + len(page_source) + len(context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--format", default="JPEG", help="JPEG, WEBP or PNG")
+    args = parser.parse_args()
+
+    driver = make_headless_driver()
+    try:
+        with FixtureSiteServer() as site, tempfile.TemporaryDirectory() as tmp:
+            for page in PAGES:
+                driver.get(site.url(page))
+                legacy_times, legacy_bytes, new_times, new_bytes = [], 0, [], 0
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    legacy_bytes = legacy_capture(driver, tmp)
+                    legacy_times.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    snapshot = take_snapshot(driver, image_format=args.format)
+                    new_times.append(time.perf_counter() - start)
+                    new_bytes = snapshot.payload_bytes()
+
+                print(f"{page}")
+                print(f"  legacy  : {statistics.median(legacy_times) * 1e3:7.1f} ms  {legacy_bytes / 1024:8.1f} KiB")
+                print(f"  snapshot: {statistics.median(new_times) * 1e3:7.1f} ms  {new_bytes / 1024:8.1f} KiB  "
+                      f"({legacy_bytes / max(new_bytes, 1):.1f}x smaller)")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
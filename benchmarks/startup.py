@@ -0,0 +1,84 @@
+"""
+Start-up cost in fresh interpreters: the imports the window now waits for
+(startup.WINDOW_MODULES) versus the old eager set, which also pulled in
+Selenium, OpenAI, speech recognition, Porcupine, PIL and the browser action
+modules before the first frame. Lists any heavy package that still loads
+before the window. --gui also launches the app with --profile-startup and
+prints its per-subsystem report (needs a display, config.py and the full
+dependency set).
+
+    python -m benchmarks.startup [--runs 5] [--gui]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from startup import WARM_MODULES, WINDOW_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_PACKAGES = ["selenium", "openai", "httpx", "speech_recognition", "pvporcupine", "PIL", "pytesseract",
+                  "pyttsx3", "pyaudio", "webdriver_manager"]
+# What gui.py used to import eagerly, on top of the window modules
+EAGER_EXTRA = ["openai", "httpx", "speech_recognition", "pvporcupine", "selenium.webdriver"] + WARM_MODULES
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from startup import profile, timed_import
+failed = []
+for module in sys.argv[1:]:
+    try:
+        timed_import(module)
+    except Exception as e:
+        failed.append(f"{module}: {e.__class__.__name__}: {e}")
+print(json.dumps({
+    "total": time.perf_counter() - start,
+    "modules": {r[0]: r[3] for r in profile.records if r[1] == "import" and r[5]},
+    "failed": failed,
+    "heavy": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+
+def probe(modules):
+    """Import `modules` in a fresh interpreter; returns the probe's JSON."""
+    code = PROBE.replace("HEAVY", repr(HEAVY_PACKAGES))
+    out = subprocess.run([sys.executable, "-c", code, *modules], cwd=ROOT, capture_output=True, text=True,
+                         timeout=120)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "probe failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(name, results):
+    totals = [r["total"] for r in results]
+    print(f"{name}: {statistics.median(totals) * 1e3:6.0f} ms median over {len(totals)} runs")
+    last = results[-1]
+    slowest = sorted(last["modules"].items(), key=lambda item: -item[1])[:6]
+    print("  slowest: " + ", ".join(f"{module} {seconds * 1e3:.0f} ms" for module, seconds in slowest))
+    print(f"  heavy packages loaded: {', '.join(last['heavy']) or 'none'}")
+    for failure in last["failed"]:
+        print(f"  not importable here: {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gui", action="store_true", help="Also launch main.py --profile-startup")
+    args = parser.parse_args()
+
+    summarize("Window path (lazy)", [probe(WINDOW_MODULES) for _ in range(args.runs)])
+    summarize("Old eager path", [probe(WINDOW_MODULES + EAGER_EXTRA) for _ in range(args.runs)])
+
+    if args.gui:
+        out = subprocess.run([sys.executable, "main.py", "--profile-startup"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=300)
+        report = [line for line in out.stdout.splitlines() if line.startswith(("Startup:", "  "))]
+        print("\n".join(report) if report else f"main.py exited with {out.returncode}: {out.stderr[-500:]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares blocking interpret_command with interpret_command_stream against the
+local fake OpenAI server, reporting time-to-first-token and time-to-dispatch.
+
+    python -m benchmarks.streaming_dispatch [--latency 0.4] [--token-delay 0.03]
+"""
+import argparse
+import statistics
+import time
+
+import openai
+
+import voice_control
+from benchmarks.fakes import FakeOpenAIServer, load_command_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.4, help="Server delay before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="Delay between streamed chunks")
+    parser.add_argument("--suffix", default="\n\nThis will take you there.",
+                        help="Prose the fake model appends after the action")
+    args = parser.parse_args()
+
+    corpus = load_command_corpus()
+    responses = {entry["command"].lower(): entry["action"] for entry in corpus}
+    commands = list(dict.fromkeys(entry["command"].lower() for entry in corpus))
+
+    with FakeOpenAIServer(responses, args.latency, args.token_delay, args.suffix) as server:
+        client = openai.OpenAI(base_url=server.base_url, api_key="test")
+
+        blocking = []
+        for command in commands:
+            start = time.perf_counter()
+            voice_control.interpret_command(command, client=client, use_cache=False)
+            blocking.append(time.perf_counter() - start)
+
+        first_tokens, dispatches, completions, early = [], [], [], 0
+        for command in commands:
+            result = voice_control.interpret_command_stream(command, lambda action: None,
+                                                            client=client, use_cache=False)
+            first_tokens.append(result.first_token)
+            dispatches.append(result.dispatched)
+            completions.append(result.completed)
+            early += result.early
+
+    print(f"Commands                  : {len(commands)}")
+    print(f"Blocking, median total    : {statistics.median(blocking) * 1e3:.0f} ms")
+    print(f"Streaming, median TTFT    : {statistics.median(first_tokens) * 1e3:.0f} ms")
+    print(f"Streaming, median dispatch: {statistics.median(dispatches) * 1e3:.0f} ms")
+    print(f"Streaming, median complete: {statistics.median(completions) * 1e3:.0f} ms")
+    print(f"Dispatched before the end : {early}/{len(commands)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Word error rate and time-to-final-transcript of each speech backend over a WAV
+corpus, plus how early a streaming backend's partial transcript settled on the
+final text. Frames are fed as captured (512 samples, followed by the silence
+the endpointer waits for); time-to-final is measured from the end of that
+audio to the transcript.
+
+    python -m benchmarks.make_speech_corpus   # once, renders the WAVs
+    python -m benchmarks.stt_backends [--backends google vosk] [--realtime]
+
+The Google backend needs network access; Vosk needs `pip install vosk` and a
+model at speech_backends.VOSK_MODEL_PATH (or --vosk-model).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+import wave
+
+import speech_recognition as sr
+
+from audio_capture import FRAME_LENGTH, HANGOVER_SECONDS
+from benchmarks.fakes import FIXTURES_DIR
+from speech_backends import BACKENDS, VOSK_MODEL_PATH, VoskBackend
+
+SPEECH_DIR = os.path.join(FIXTURES_DIR, "speech")
+
+
+def load_speech_corpus(corpus=SPEECH_DIR):
+    """[{"wav": file name, "text": reference transcript}, ...] from the corpus manifest."""
+    with open(os.path.join(corpus, "manifest.jsonl"), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def words(text):
+    return re.sub(r"[^\w\s']", " ", (text or "").lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions)."""
+    ref, hyp = words(reference), words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (r != h))
+    return row[len(hyp)]
+
+
+def read_frames(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        sample_rate = wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+    pcm += b"\x00" * (int(HANGOVER_SECONDS * sample_rate) * 2)
+    step = FRAME_LENGTH * 2
+    frames = [pcm[i:i + step].ljust(step, b"\x00") for i in range(0, len(pcm), step)]
+    return frames, sample_rate
+
+
+def run_utterance(backend, path, realtime=False):
+    """Transcribe one WAV; returns (text, time_to_final, stable_lead, decode_seconds)."""
+    frames, sample_rate = read_frames(path)
+    frame_seconds = FRAME_LENGTH / sample_rate
+    session = backend.start(sample_rate)
+    stable_at = {}  # stable partial -> audio time it was first reported
+    decode = 0.0
+    started = time.perf_counter()
+    for index, frame in enumerate(frames):
+        if realtime:
+            delay = started + index * frame_seconds - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        tick = time.perf_counter()
+        partial = session.feed(frame)
+        decode += time.perf_counter() - tick
+        if partial is not None and partial.stable:
+            stable_at.setdefault(" ".join(words(partial.stable)), (index + 1) * frame_seconds)
+
+    start = time.perf_counter()
+    try:
+        text = session.finish()
+    except sr.UnknownValueError:
+        text = ""
+    time_to_final = time.perf_counter() - start
+    audio_seconds = len(frames) * frame_seconds
+    settled = stable_at.get(" ".join(words(text))) if text else None
+    lead = audio_seconds - settled if settled is not None else None
+    return text, time_to_final, lead, decode + time_to_final
+
+
+def make_backend(name, vosk_model):
+    if name == "vosk":
+        backend = VoskBackend(vosk_model)
+        backend.load()
+        return backend
+    return BACKENDS[name]()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=SPEECH_DIR, help="Directory with manifest.jsonl and WAVs")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--vosk-model", default=VOSK_MODEL_PATH)
+    parser.add_argument("--realtime", action="store_true", help="Pace frames like a live microphone")
+    args = parser.parse_args()
+
+    corpus = load_speech_corpus(args.corpus)
+    missing = [e["wav"] for e in corpus if not os.path.exists(os.path.join(args.corpus, e["wav"]))]
+    if missing:
+        print(f"{len(missing)} WAV file(s) missing from {args.corpus}; run python -m benchmarks.make_speech_corpus")
+        return
+
+    for name in args.backends:
+        try:
+            backend = make_backend(name, args.vosk_model)
+        except (ImportError, OSError) as e:
+            print(f"{name:<7}: skipped ({e})")
+            continue
+
+        errors = reference_words = 0
+        finals, leads, decode, audio = [], [], 0.0, 0.0
+        for entry in corpus:
+            path = os.path.join(args.corpus, entry["wav"])
+            try:
+                text, time_to_final, lead, seconds = run_utterance(backend, path, args.realtime)
+            except sr.RequestError as e:
+                print(f"{name:<7}: {entry['wav']} request failed ({e})")
+                continue
+            errors += word_errors(entry["text"], text)
+            reference_words += len(words(entry["text"]))
+            finals.append(time_to_final)
+            decode += seconds
+            with wave.open(path, "rb") as wav:
+                audio += wav.getnframes() / wav.getframerate()
+            if lead is not None:
+                leads.append(lead)
+            if text.lower() != entry["text"]:
+                print(f"{name:<7}: {entry['wav']} heard '{text}' for '{entry['text']}'")
+
+        if not finals:
+            continue
+        ordered = sorted(finals)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"{name:<7}: WER {errors / max(reference_words, 1):6.1%} | time-to-final "
+              f"p50 {statistics.median(ordered) * 1e3:5.0f} ms, p95 {p95 * 1e3:5.0f} ms | "
+              f"real-time factor {decode / max(audio, 1e-9):.2f}")
+        if backend.streaming:
+            lead = f"{statistics.median(leads):.2f}s median" if leads else "never"
+            print(f"{'':<7}  final text stable before end of audio in {len(leads)}/{len(finals)} "
+                  f"utterances ({lead})")
+
+
+if __name__ == "__main__":
+    main()
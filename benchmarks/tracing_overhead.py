@@ -0,0 +1,51 @@
+"""
+Per-call cost of the tracing layer on an empty function: undecorated,
+tracing disabled, enabled in memory only, and enabled with JSONL export.
+
+    python -m benchmarks.tracing_overhead [--calls 200000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from tracing import Tracer
+
+
+def stage():
+    pass
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disabled = Tracer(enabled=False, path=None)
+        memory = Tracer(enabled=True, path=None)
+        exported = Tracer(enabled=True, path=os.path.join(tmp, "traces.jsonl"))
+
+        baseline = per_call_ns(stage, args.calls)
+        results = [
+            ("undecorated", baseline),
+            ("tracing disabled", per_call_ns(disabled.traced("stage")(stage), args.calls)),
+            ("enabled, in memory", per_call_ns(memory.traced("stage")(stage), args.calls)),
+            ("enabled, JSONL export", per_call_ns(exported.traced("stage")(stage), args.calls // 10)),
+        ]
+        exported.close()
+
+    for label, ns in results:
+        print(f"{label:<22}: {ns:8.0f} ns/call (+{ns - baseline:.0f} ns)")
+    print("For scale: one Selenium round trip is ~1,000,000 ns, one GPT-4 call ~1,000,000,000 ns.")
+
+
+if __name__ == "__main__":
+    main()
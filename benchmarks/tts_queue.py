@@ -0,0 +1,159 @@
+"""
+Exercises the TTS worker against a null audio sink with a stub synthesizer:
+bursts of messages from several threads at mixed priorities, with barge-ins,
+checking that every message is accounted for (played, interrupted or
+cancelled, never dropped) and reporting queue latency, cached versus
+uncached time-to-audio, and how many messages the old speak() would have
+dropped under the same load.
+
+    python -m benchmarks.tts_queue [--messages 60] [--threads 3] [--synthesis 0.2]
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from tts_worker import (
+    COMMON_PHRASES,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    PRIORITY_URGENT,
+    NullSink,
+    PhraseCache,
+    TTSWorker,
+)
+from benchmarks.fakes import StubSpeechRenderer
+
+INTENTS = ["open", "click", "scroll", "fill_form", "search", "play_video", "pause_video"]
+ERROR_PHRASES = [f"There was an error executing the {intent} action." for intent in INTENTS]
+
+
+def message_schedule(count, rng):
+    """[(delay before sending, text, priority), ...]: mostly fixed prompts, some one-off questions."""
+    schedule = []
+    for i in range(count):
+        if rng.random() < 0.25:
+            text, priority = f"Which of the {i} results do you want?", PRIORITY_URGENT
+        elif rng.random() < 0.5:
+            text, priority = rng.choice(ERROR_PHRASES), PRIORITY_URGENT
+        else:
+            text, priority = rng.choice(COMMON_PHRASES), rng.choice([PRIORITY_NORMAL, PRIORITY_LOW])
+        schedule.append((rng.uniform(0, 0.3), text, priority))
+    return schedule
+
+
+def legacy_drops(schedule, renderer, threads):
+    """Replays the schedule through the old speak(): one thread per call, dropped while speaking."""
+    state = {"speaking": False, "dropped": 0}
+    lock = threading.Lock()
+
+    def speak(text):
+        with lock:
+            if state["speaking"]:
+                state["dropped"] += 1
+                return
+            state["speaking"] = True
+
+        def _speak():
+            renderer.say(text)
+            time.sleep(0.5)
+            state["speaking"] = False
+
+        threading.Thread(target=_speak, daemon=True).start()
+
+    run_schedule(schedule, threads, lambda text, priority: speak(text))
+    return state["dropped"]
+
+
+def run_schedule(schedule, threads, send):
+    """Send the schedule from `threads` producers; returns whatever send() returned."""
+    results = []
+    lock = threading.Lock()
+
+    def producer(part):
+        for delay, text, priority in part:
+            time.sleep(delay)
+            result = send(text, priority)
+            with lock:
+                results.append((text, priority, result))
+
+    workers = [threading.Thread(target=producer, args=(schedule[i::threads],)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return results
+
+
+def time_to_audio(worker, text):
+    """Seconds from say() to the start of playback on an idle worker."""
+    worker.say(text).result()
+    return worker.queue_latencies[-1]
+
+
+def barge_in_periodically(worker, count, interval):
+    for _ in range(count):
+        time.sleep(interval)
+        worker.barge_in()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=3)
+    parser.add_argument("--synthesis", type=float, default=0.2, help="Stub synthesis time per phrase")
+    parser.add_argument("--words-per-second", type=float, default=20.0, help="Length of the rendered audio")
+    parser.add_argument("--barge-ins", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    schedule = message_schedule(args.messages, rng)
+    renderer = StubSpeechRenderer(args.synthesis, args.words_per_second)
+
+    dropped = legacy_drops(schedule, renderer, args.threads)
+    time.sleep(1)  # Let the last legacy thread finish
+
+    sink = NullSink(realtime=True)
+    worker = TTSWorker(StubSpeechRenderer(args.synthesis, args.words_per_second), sink, PhraseCache(cache_dir=None))
+    worker.prerender(COMMON_PHRASES + ERROR_PHRASES)
+    worker.wait_idle()
+
+    uncached = time_to_audio(worker, "A phrase nobody has said before.")
+    cached = time_to_audio(worker, COMMON_PHRASES[0])
+    worker.queue_latencies.clear()
+    sink.played.clear()
+    before = worker.stats()
+
+    # The schedule runs for about messages * 0.15 s / threads; spread the barge-ins over it
+    interval = args.messages * 0.15 / args.threads / (args.barge_ins + 1)
+    barge_ins = threading.Thread(target=barge_in_periodically, args=(worker, args.barge_ins, interval))
+    barge_ins.start()
+    results = run_schedule(schedule, args.threads, worker.say)
+    barge_ins.join()
+    worker.wait_idle()
+
+    outcomes = {"played": 0, "not played": 0}
+    for text, priority, future in results:
+        outcomes["played" if future.result(timeout=5) else "not played"] += 1
+    stats = {name: value - before[name] for name, value in worker.stats().items()}
+    accounted = stats["played"] + stats["interrupted"] + stats["cancelled"] + stats["failed"]
+    latencies = sorted(worker.queue_latencies) or [0.0]
+
+    print(f"Old speak()     : {dropped}/{len(schedule)} messages dropped while speaking")
+    print(f"TTS worker      : {stats['played']} played, {stats['interrupted']} interrupted, "
+          f"{stats['cancelled']} cancelled by {args.barge_ins} barge-ins, {stats['failed']} failed")
+    sent = stats["enqueued"]
+    print(f"Accounted for   : {accounted}/{sent} {'✓' if accounted == sent == len(results) else '✗ messages lost'}")
+    print(f"Sink received   : {len(sink.played)} (matches futures resolved as played: "
+          f"{'✓' if len(sink.played) == outcomes['played'] else '✗'})")
+    print(f"Queue latency   : p50 {statistics.median(latencies) * 1e3:.0f} ms, "
+          f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1e3:.0f} ms")
+    print(f"Time to audio   : uncached {uncached * 1e3:.0f} ms, cached {cached * 1e3:.0f} ms "
+          f"({stats['cache_hits']} cache hits, {stats['rendered']} renders)")
+    worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+End-of-utterance latency and truncation rate of the VAD endpointer (running
+noise floor, hysteresis, 0.5 s hangover) versus the previous endpointing
+(threshold from the 3 s before the wake word, 0.8 s of silence), on WAVs with
+background noise at several levels, including a room that gets louder shortly
+before the command. Utterances are synthetic word bursts with pauses and soft
+word endings; the speech corpus in fixtures/speech/ is used as well when its
+WAVs have been rendered (python -m benchmarks.make_speech_corpus).
+
+    python -m benchmarks.vad_endpointing [--trials 20] [--hangover 0.5]
+"""
+import argparse
+import array
+import math
+import os
+import random
+import statistics
+import tempfile
+import wave
+
+from audio_capture import (
+    HANGOVER_SECONDS,
+    MIN_SPEECH_ENERGY,
+    SAMPLE_RATE,
+    AudioCaptureEngine,
+    WavFileSource,
+    capture_utterance,
+    frame_rms,
+)
+from benchmarks.stt_backends import SPEECH_DIR, load_speech_corpus
+
+LEAD_SECONDS = 4.0    # Background before the command (the wake word fires at the end of it)
+TAIL_SECONDS = 2.0
+# name: (noise peak level early on, noise peak level from NOISE_CHANGE_SECONDS before the command)
+NOISE_LEVELS = {"silent": (0, 0), "quiet": (150, 150), "office": (500, 500),
+                "loud": (1200, 1200), "fan on": (150, 900)}
+NOISE_CHANGE_SECONDS = 2.0   # "fan on" gets louder this long before the command
+
+
+def legacy_capture(engine, start_seq, timeout=5, silence_seconds=0.8, max_seconds=10):
+    """The endpointing capture_utterance used before the VAD (no pre-roll)."""
+    frame_seconds = engine.frame_seconds
+    history = sorted(frame_rms(f) for f in engine.window(start_seq - int(3 / frame_seconds), start_seq))
+    noise_floor = history[len(history) // 10] if history else 0.0
+    threshold = max(MIN_SPEECH_ENERGY, noise_floor * 3)
+    captured, speech_started, quiet_run, next_seq = [], False, 0, start_seq
+    for seq, frame in engine.frames(start_seq):
+        next_seq = seq + 1
+        captured.append(frame)
+        loud = frame_rms(frame) > threshold
+        if not speech_started:
+            if loud:
+                speech_started = True
+            elif seq - start_seq >= int(timeout / frame_seconds):
+                return None, next_seq
+            continue
+        quiet_run = 0 if loud else quiet_run + 1
+        if quiet_run >= int(silence_seconds / frame_seconds) or len(captured) >= int(max_seconds / frame_seconds):
+            break
+    return (b"".join(captured) if speech_started else None), next_seq
+
+
+def synthetic_utterance(rng):
+    """Samples of 2-5 'words' (voiced bursts with soft endings, short pauses between)."""
+    samples = []
+    words = rng.randint(2, 5)
+    for word in range(words):
+        frequency = rng.uniform(120, 260)
+        for _ in range(rng.randint(1, 3)):
+            amplitude, seconds = rng.uniform(2500, 6000), rng.uniform(0.12, 0.3)
+            samples += [amplitude * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)
+                        for i in range(int(seconds * SAMPLE_RATE))]
+        # Soft consonant at the end of the word ("-s", "-f"), the part energy endpointers clip
+        samples += [rng.uniform(-900, 900) for _ in range(int(rng.uniform(0.05, 0.12) * SAMPLE_RATE))]
+        if word < words - 1:
+            samples += [0.0] * int(rng.uniform(0.05, 0.35) * SAMPLE_RATE)
+    return samples
+
+
+def corpus_utterances(corpus):
+    """Samples of each rendered corpus WAV, trimmed to the spoken part."""
+    utterances = []
+    for entry in load_speech_corpus(corpus):
+        path = os.path.join(corpus, entry["wav"])
+        if not os.path.exists(path):
+            return []
+        with wave.open(path, "rb") as wav:
+            samples = array.array("h", wav.readframes(wav.getnframes()))
+        voiced = [i for i, s in enumerate(samples) if abs(s) > 300]
+        if voiced:
+            utterances.append([float(s) for s in samples[voiced[0]:voiced[-1] + 1]])
+    return utterances
+
+
+def render(path, speech, noise, rng):
+    """Write lead noise + speech + tail noise; returns (speech start, speech end) in seconds."""
+    before, after = noise
+    lead = int(LEAD_SECONDS * SAMPLE_RATE)
+    change = lead - int(NOISE_CHANGE_SECONDS * SAMPLE_RATE)
+    total = lead + len(speech) + int(TAIL_SECONDS * SAMPLE_RATE)
+    samples = array.array("h")
+    for i in range(total):
+        level = before if i < change else after
+        value = speech[i - lead] if lead <= i < lead + len(speech) else 0.0
+        if level:
+            value += rng.uniform(-level, level)
+        samples.append(max(-32768, min(32767, int(value))))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return LEAD_SECONDS, (lead + len(speech)) / SAMPLE_RATE
+
+
+def endpoint(path, capture):
+    """Run one capture over the WAV; returns the end time of the captured audio or None."""
+    engine = AudioCaptureEngine(WavFileSource(path, trailing_silence=0), buffer_seconds=60).start()
+    try:
+        start_seq = int(LEAD_SECONDS / engine.frame_seconds)
+        for seq, _ in engine.frames(0):  # Like the wake word detector, reach start_seq first
+            if seq >= start_seq:
+                break
+        pcm, next_seq = capture(engine, start_seq)
+        return next_seq * engine.frame_seconds if pcm is not None else None
+    finally:
+        engine.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trials", type=int, default=20, help="Synthetic utterances per noise level")
+    parser.add_argument("--hangover", type=float, default=HANGOVER_SECONDS)
+    parser.add_argument("--corpus", default=SPEECH_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    utterances = [synthetic_utterance(rng) for _ in range(args.trials)] + corpus_utterances(args.corpus)
+    methods = {
+        "previous": legacy_capture,
+        "vad": lambda engine, seq: capture_utterance(engine, seq, hangover=args.hangover),
+    }
+    print(f"{len(utterances)} utterances per noise level")
+    print(f"{'noise':<8}{'method':<10}{'truncated':>10}{'missed':>8}{'p50 ms':>8}{'p95 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "utterance.wav")
+        for label, noise in NOISE_LEVELS.items():
+            results = {name: {"latency": [], "truncated": 0, "missed": 0} for name in methods}
+            for speech in utterances:
+                _, speech_end = render(path, speech, noise, rng)
+                for name, capture in methods.items():
+                    end = endpoint(path, capture)
+                    stats = results[name]
+                    if end is None:
+                        stats["missed"] += 1
+                    elif end < speech_end:
+                        stats["truncated"] += 1
+                    else:
+                        stats["latency"].append(end - speech_end)
+            for name, stats in results.items():
+                ordered = sorted(stats["latency"]) or [float("nan")]
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                print(f"{label:<8}{name:<10}{stats['truncated'] / len(utterances):>10.0%}"
+                      f"{stats['missed']:>8}{statistics.median(ordered) * 1e3:>8.0f}{p95 * 1e3:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
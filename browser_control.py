@@ -1,86 +1,83 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from PIL import Image
-import pytesseract
-import base64
 import logging
-import time
-import json
 import re
 
-from config import OPENAI_API_KEY
+from browser_lifecycle import browser_manager
+from page_snapshot import take_snapshot
+from page_fingerprint import page_tracker
+from page_ocr import center, find_text, image_text, ocr_engine
+from dom_digest import find_element_by_id
+from page_readiness import current_page, navigate, wait_until_ready
+from element_index import get_element_index
+from tracing import traced
+from macros import note_target
+from site_adapters import adapter_for, get_adapter
+from intent_grammar import parse_price_filter
 from ai_processing import interpret_command
 from voice_control import listen, speak
+from tts_worker import PRIORITY_URGENT
 
 logging.basicConfig(level=logging.INFO)
 
 # --------------------- Utility Functions ---------------------
 
 def get_driver():
-    """Initialize the Selenium WebDriver with Chrome."""
-    options = webdriver.ChromeOptions()
-    options.add_experimental_option("detach", True)
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.maximize_window()
-    return driver
+    """
+    Return the shared Chrome session, launching it if the background warm-up
+    has not finished (see browser_lifecycle.BrowserManager).
+    """
+    return browser_manager.get()
 
 def get_browser_context(driver):
     """Capture current page title, URL, and a snippet of visible text."""
-    current_url = driver.current_url
-    page_title = driver.title
-    try:
-        page_text = driver.find_element(By.TAG_NAME, "body").text[:500]
-    except Exception:
-        page_text = ""
-    return f"Current Page: {page_title}\nURL: {current_url}\nVisible Text: {page_text}"
-
-# def capture_screenshot(driver):
-#     """Take a screenshot and extract visible text using OCR."""
-#     screenshot_path = "screenshot.png"
-#     driver.save_screenshot(screenshot_path)
-#     img = Image.open(screenshot_path)
-#     extracted_text = pytesseract.image_to_string(img)
-#     return screenshot_path, extracted_text
-
+    return take_snapshot(driver, include_image=False).context()
 
+@traced("capture_screenshot")
 def capture_screenshot(driver):
+    """
+    Capture the page once, in memory: a single screenshot (downscaled and
+    re-encoded) plus URL, title, visible text and DOM digest from one script call.
+    Returns a PageSnapshot, or None if the capture failed.
+    """
     # Check if driver is None before proceeding
     if driver is None:
         print("Error: WebDriver is not initialized!")
-        return None, None  # Return None instead of crashing
+        return None  # Return None instead of crashing
 
-    screenshot_path = "screenshot.png"
-    
     try:
-        # Ensure the browser has loaded before taking a screenshot
-        time.sleep(2)  # Give some time for the page to load
-        driver.save_screenshot(screenshot_path)
-        print(f"Screenshot saved at {screenshot_path}")
-
-        # Convert screenshot to base64 (if needed)
-        screenshot_base64 = driver.get_screenshot_as_base64()
-        if screenshot_base64 is None:
-            print("Error: Failed to get screenshot as Base64")
-            return screenshot_path, None
-
-        return screenshot_path, screenshot_base64
+        # Ensure the browser has settled before taking a screenshot
+        wait_until_ready(driver, "snapshot")
+        return take_snapshot(driver)
 
     except Exception as e:
         print(f"Error capturing screenshot: {e}")
-        return None, None
+        return None
 
 
+@traced("capture_page")
+def capture_page(driver, full=False):
+    """
+    Like capture_screenshot, but relative to the last capture of this tab: an
+    unchanged page is not captured again and a slightly changed one comes back
+    as a delta (see page_fingerprint.PageTracker). Returns a PageUpdate or None.
+    """
+    if driver is None:
+        print("Error: WebDriver is not initialized!")
+        return None
+    try:
+        wait_until_ready(driver, "snapshot")
+        update = page_tracker.capture(driver, full=full)
+        if update.full:
+            update.ocr_text = image_text(driver, update.snapshot)
+        return update
+    except Exception as e:
+        print(f"Error capturing the page: {e}")
+        return None
 
-def encode_image(image_path):
-    """Convert the screenshot to a Base64 encoded string."""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
 
 def safe_find_element(driver, by, value, timeout=10):
     """Wait for an element to be present and return it."""
@@ -93,29 +90,78 @@ def safe_find_element(driver, by, value, timeout=10):
         logging.error(f"Element not found: {value} | Error: {e}")
         return None
 
+def find_indexed_element(driver, query, kind="click"):
+    """
+    Resolve a spoken target ('add to cart', 'email') through the cached element
+    index, re-checking once after the page settles if nothing matches yet.
+    """
+    index = get_element_index(driver)
+    element = index.find(query, kind)
+    if element is None:
+        wait_until_ready(driver, "default")
+        element = index.find(query, kind)
+    return element
+
+def click_text(driver, query):
+    """
+    Click text drawn in a canvas or image, located by OCR. Returns the TextBox
+    clicked, or None if no line of text matches.
+    """
+    try:
+        box = find_text(ocr_engine.read_page(driver).boxes, query)
+    except Exception as e:
+        logging.warning(f"OCR unavailable: {e}")
+        return None
+    if box is None:
+        return None
+    x, y = center(box)
+    action = ActionBuilder(driver)
+    action.pointer_action.move_to_location(x, y)
+    action.pointer_action.click()
+    action.perform()
+    return box
+
 # --------------------- Action Handlers ---------------------
 
+@traced("action.open")
 def handle_open(parameters, driver):
     """Opens a website using the provided URL."""
     url = parameters.get("url")
     if not url:
         raise ValueError("Missing URL parameter for 'open' action.")
-    driver.get(url)
+    navigate(driver, url, "open")
     logging.info(f"Opened URL: {url}")
-    time.sleep(3)  # Allow the page to load
 
+@traced("action.click")
 def handle_click(parameters, driver):
-    """Clicks an element identified by its visible text."""
+    """Clicks an element identified by its DOM digest ID or its visible text."""
+    element_id = parameters.get("element_id")
+    if element_id is not None:
+        element = find_element_by_id(driver, element_id)
+        if element is None:
+            raise ValueError(f"Element [{element_id}] is no longer on the page.")
+        note_target(driver, element)
+        element.click()
+        logging.info(f"Clicked on element [{element_id}]")
+        wait_until_ready(driver, "click")
+        return
+
     element_text = parameters.get("element_text")
     if not element_text:
         raise ValueError("Missing element_text parameter for 'click' action.")
-    element = safe_find_element(driver, By.XPATH, f"//*[contains(text(), '{element_text}')]")
+    element = find_indexed_element(driver, element_text, "click")
     if element:
+        note_target(driver, element)
         element.click()
         logging.info(f"Clicked on element with text: {element_text}")
+        wait_until_ready(driver, "click")
+    elif click_text(driver, element_text):
+        logging.info(f"Clicked on text found by OCR: {element_text}")
+        wait_until_ready(driver, "click")
     else:
         raise ValueError("Element with specified text not found.")
 
+@traced("action.scroll")
 def handle_scroll(parameters, driver):
     """Scrolls the page based on provided direction and distance."""
     direction = parameters.get("direction", "down")
@@ -127,44 +173,101 @@ def handle_scroll(parameters, driver):
         driver.execute_script(f"window.scrollBy(0, {distance});")
         logging.info(f"Scrolled down by {distance} pixels.")
 
+@traced("action.fill_form")
 def handle_fill_form(parameters, driver):
-    """Fills a form field with the provided value."""
+    """
+    Fills a form field matched by name, id, label, placeholder or aria-label,
+    pressing Enter afterwards when `submit` is set.
+    """
     field = parameters.get("field")
     value = parameters.get("value")
     if not field or not value:
         raise ValueError("Missing field or value parameter for 'fill_form' action.")
-    element = safe_find_element(driver, By.NAME, field)
+    element = find_indexed_element(driver, field, "field")
     if element:
+        note_target(driver, element)
         element.clear()
         element.send_keys(value)
         logging.info(f"Filled form field '{field}' with '{value}'.")
+        if parameters.get("submit"):
+            page = current_page(driver)
+            element.send_keys(Keys.RETURN)
+            wait_until_ready(driver, "search", after_page=page)
     else:
         raise ValueError("Form field not found.")
 
+@traced("action.search")
 def handle_search(parameters, driver):
-    """Searches for a query using YouTube's search bar."""
+    """
+    Searches the current site through its adapter's search URL, or with
+    YouTube's search bar on pages no adapter covers.
+    """
     query = parameters.get("query")
     if not query:
         raise ValueError("Missing query parameter for 'search' action.")
+    adapter = adapter_for(driver.current_url)
+    if adapter:
+        adapter.search(driver, query)
+        logging.info(f"Searched {adapter.name} for: {query}")
+        return
     search_box = safe_find_element(driver, By.NAME, "search_query", timeout=15)
     if search_box:
+        note_target(driver, search_box)
         search_box.clear()
         search_box.send_keys(query)
+        page = current_page(driver)
         search_box.send_keys(Keys.RETURN)
         logging.info(f"Searched for: {query}")
+        wait_until_ready(driver, "search", after_page=page)
     else:
         raise ValueError("Search box not found.")
 
+@traced("action.play_video")
 def handle_play_video(parameters, driver):
-    video_index = parameters.get("video_index", 1)
+    """Opens the n-th video, from the adapter's result list when the site has one."""
+    video_index = int(parameters.get("video_index", 1))
+    adapter = adapter_for(driver.current_url)
+    if adapter:
+        result = adapter.result(driver, video_index)
+        if result is None:
+            raise ValueError(f"There is no result {video_index} on this page.")
+        navigate(driver, result.link, "play_video")
+        logging.info(f"Played video {video_index}: {result.title}")
+        return
     xpath_expr = f"(//ytd-video-renderer//a[@id='video-title'])[{video_index}]"
     video = safe_find_element(driver, By.XPATH, xpath_expr, timeout=15)
     if video:
+        note_target(driver, video)
         video.click()
         logging.info(f"Played video at index: {video_index}")
+        wait_until_ready(driver, "play_video")
     else:
         raise ValueError("Video element not found.")
+
+@traced("action.open_cheapest")
+def handle_open_cheapest(parameters, driver):
+    """Opens the lowest-priced result on the current results page, optionally under max_price."""
+    max_price = parameters.get("max_price")
+    max_price = float(max_price) if max_price else None
+    adapter = adapter_for(driver.current_url)
+    if adapter is None:
+        raise ValueError("This page has no result list to pick from.")
+    result = adapter.cheapest(driver, max_price)
+    if result is None:
+        raise ValueError("No priced result" + (f" under ${max_price:g}." if max_price else "."))
+    navigate(driver, result.link, "click")
+    logging.info(f"Opened the cheapest result (${result.price:g}): {result.title}")
+
+@traced("action.next_page")
+def handle_next_page(parameters, driver):
+    """Goes to the next results page (usually already prefetched by the adapter)."""
+    adapter = adapter_for(driver.current_url)
+    if adapter is None:
+        raise ValueError("This page has no next results page.")
+    url = adapter.next_page(driver)
+    logging.info(f"Next page: {url}")
     
+@traced("action.pause_video")
 def handle_pause_video(parameters, driver):
     """Pause the currently playing YouTube video."""
     try:
@@ -176,19 +279,10 @@ def handle_pause_video(parameters, driver):
 
 
 def search_amazon(driver, query):
-    """Fill Amazon's search box with the query and press Enter."""
+    """Load Amazon's results page for the query."""
     logging.info(f"🔎 Searching Amazon for: {query}")
     try:
-        # Wait for page elements to load
-        driver.implicitly_wait(5)
-        
-        search_box = driver.find_element(By.ID, "twotabsearchtextbox")
-        search_box.clear()
-        search_box.send_keys(query)
-        search_box.send_keys(Keys.RETURN)
-        
-        # Optional: wait a moment to see the result
-        time.sleep(3)
+        get_adapter("amazon").search(driver, query)
         logging.info("✅ Completed search on Amazon.")
     except Exception as e:
         logging.error(f"❌ Could not search Amazon: {e}")
@@ -196,30 +290,11 @@ def search_amazon(driver, query):
 
 def search_amazon_price_filter(driver, item, max_price):
     """
-    Search for 'item' on Amazon, filtering results under max_price (USD).
+    Search for 'item' on Amazon, filtering results under max_price (USD),
+    with a single navigation to the filtered results URL.
     """
-    import logging
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.common.keys import Keys
-
     logging.info(f"🔎 Searching Amazon for: {item} below ${max_price}")
-    max_price_in_cents = max_price * 100
-    # Build the Amazon URL with price filter:
-    # s?k=ITEM & rh=p_36%3A-MAXPRICE
-    item_query = item.strip().replace(" ", "+")  # e.g. "crossbody bags" -> "crossbody+bags"
-    url = f"https://www.amazon.com/s?k={item_query}&rh=p_36%3A-{max_price_in_cents}"
-
-    logging.info(f"👉 Navigating to: {url}")
-    driver.get(url)
-    
-    # 2) Build the Amazon URL
-    # For example, &rh=p_36%3A-5000 means 'Under $50'
-    item_query = item.replace(" ", "+")
-    url = f"https://www.amazon.com/s?k={item_query}&rh=p_36%3A-{max_price_in_cents}"
-    
-    # 3) Navigate the driver
-    logging.info(f"🌐 Navigating to Amazon with price filter: {url}")
-    driver.get(url)
+    get_adapter("amazon").search(driver, item.strip(), max_price=max_price)
     logging.info("✅ Loaded filtered Amazon results.")
 
 
@@ -234,28 +309,110 @@ ACTION_HANDLERS = {
     "search": handle_search,
     "play_video": handle_play_video,
     "pause_video": handle_pause_video,
+    "open_cheapest": handle_open_cheapest,
+    "next_page": handle_next_page,
 }
 
+# Templated error prompts play from the phrase cache (pre-rendered by the GUI's TTS warm-up)
+ERROR_PHRASE = "There was an error executing the {intent} action."
+
+# --------------------- Action Strings ---------------------
+
+PRICE_WORDS = re.compile(r"(?:below|under)\s*\$\d+", re.IGNORECASE)
+
+
+def perform_action(driver, action, command="", log=logging.info):
+    """
+    Run one interpreted action string (e.g. 'open https://...', 'play_video 2')
+    in the browser. Shared by the GUI and batch_runner, so both act the same;
+    `log` receives the progress messages.
+    """
+    if action.startswith("open "):
+        url = action.replace("open ", "").strip()
+        if not url.startswith("http"):
+            url = "https://" + url
+        log(f"🌍 Opening {url}...")
+        ACTION_HANDLERS["open"]({"url": url}, driver)
+
+    elif action.startswith("search "):
+        query = action.replace("search ", "").strip()
+        # The current site's adapter builds the (filtered) results URL; Google otherwise
+        adapter = adapter_for(driver.current_url) or get_adapter("google")
+
+        # "crossbody bags below $50" -> one filtered Amazon search for "crossbody bags"
+        max_price = parse_price_filter(command)
+        if max_price and adapter.name == "amazon":
+            item_only = PRICE_WORDS.sub("", query).strip()
+            log(f"🔎 Searching Amazon for: {item_only} under ${max_price}")
+            search_amazon_price_filter(driver, item_only, max_price)
+        else:
+            log(f"🔎 Searching {adapter.name.title()} for: {query}")
+            adapter.search(driver, query)
+
+    elif action.startswith("search_amazon "):
+        query = action.replace("search_amazon ", "").strip()
+        max_price = parse_price_filter(query)
+        if max_price:
+            item_only = PRICE_WORDS.sub("", query).strip()
+            log(f"🔎 Searching Amazon for: {item_only} under ${max_price}")
+            search_amazon_price_filter(driver, item_only, max_price)
+        else:
+            log(f"🔎 Searching Amazon for: {query}")
+            search_amazon(driver, query)
+
+    elif action.startswith("open_cheapest"):
+        price = action.replace("open_cheapest", "").strip()  # e.g. "50", or "" for no limit
+        log("💲 Opening the cheapest result" + (f" under ${price}" if price else ""))
+        ACTION_HANDLERS["open_cheapest"]({"max_price": float(price) if price else None}, driver)
+
+    elif action.startswith("next_page"):
+        log("➡ Next results page")
+        ACTION_HANDLERS["next_page"]({}, driver)
+
+    elif action.startswith("play_video"):
+        index_str = action.replace("play_video", "").strip()  # e.g. "3"
+        video_index = int(index_str) if index_str.isdigit() else 1
+        log(f"🎬 Playing video at index: {video_index}")
+        ACTION_HANDLERS["play_video"]({"video_index": video_index}, driver)
+
+    elif action.startswith("pause_video"):
+        log("⏸ Pausing the current video...")
+        ACTION_HANDLERS["pause_video"]({}, driver)
+
+    else:
+        log(f"⚠ Unknown action. Using fallback Google search for: {action}")
+        navigate(driver, get_adapter("google").search_url(action), "search")
+
 # --------------------- Command Execution ---------------------
 
+PLAN_MODE = True  # One AI call returns the whole action sequence (see plan_mode.py)
+
 def execute_command(command, driver, context=""):
     """
     Dynamically executes AI-generated browser actions.
     It queries the AI for a structured JSON response and then calls the corresponding action handler.
     """
-    while True:
-        screenshot_path, extracted_text = capture_screenshot(driver)
-        encoded_image = encode_image(screenshot_path)
-        page_source = driver.page_source
-        context = get_browser_context(driver)
-        time.sleep(1.5)  # Cooldown to avoid API overload
+    if PLAN_MODE:
+        return execute_command_plan(command, driver)
 
-        structured_output = interpret_command(command, page_source, extracted_text, encoded_image, context)
+    update = None
+    history = []  # Earlier turns stay in the conversation; later turns only send page changes
+    while True:
+        # The first turn sends the whole page; follow-up turns only what changed since
+        update = capture_page(driver, full=update is None)
+        if update is None:
+            speak("Sorry, I couldn't read the current page.")
+            break
+
+        structured_output = interpret_command(
+            command, update.elements, update.text, update.image_base64, update.context(), history=history,
+            image_format=update.snapshot.image_format or "JPEG"
+        )
         logging.info(f"AI Structured Output: {structured_output}")
 
         if structured_output.get("missing_info"):
             follow_up_question = structured_output["question"]
-            speak(follow_up_question)
+            speak(follow_up_question, PRIORITY_URGENT, wait=True)
             additional_info = listen()
             if additional_info:
                 command += " " + additional_info  # Append follow-up info and retry
@@ -280,9 +437,34 @@ def execute_command(command, driver, context=""):
                     logging.info(f"Successfully executed intent: {intent}")
                 except Exception as e:
                     logging.error(f"Error executing intent '{intent}': {e}")
-                    speak(f"There was an error executing the {intent} action.")
+                    speak(ERROR_PHRASE.format(intent=intent), PRIORITY_URGENT)
                 break
             else:
                 logging.error(f"Unknown intent: {intent}")
                 speak(f"I don't know how to perform the action {intent}.")
                 break
+
+
+def execute_command_plan(command, driver):
+    """
+    Plan-mode execute_command: asks follow-up questions, then runs the whole
+    plan, or replays the recorded macro if this command has run before.
+    """
+    from macros import execute_with_macro  # macros and plan_mode import ACTION_HANDLERS from here
+
+    while True:
+        result = execute_with_macro(command, driver)
+        if result.question:
+            speak(result.question, PRIORITY_URGENT, wait=True)
+            additional_info = listen()
+            if additional_info:
+                command += " " + additional_info  # Append follow-up info and re-plan
+                continue
+            speak("No additional information provided. Aborting command.")
+        elif not result.ok:
+            logging.error(f"Plan for '{command}' failed: {result.error}")
+            speak("Sorry, I couldn't finish that command.")
+        else:
+            logging.info(f"Plan finished: {len(result.steps)} steps, {result.model_calls} AI calls, "
+                         f"{result.elapsed:.1f}s")
+        return result
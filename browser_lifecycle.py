@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from config import DATA_DIR
+
+###############################
+#   Browser Lifecycle Config  #
+###############################
+DRIVER_CACHE_PATH = os.path.join(DATA_DIR, "chromedriver.json")
+HEADLESS = False
+PROFILE_DIR = None      # Chrome user-data-dir to keep cookies/logins between runs
+PROFILE_NAME = None     # e.g. "Default" or "Profile 1" inside PROFILE_DIR
+WINDOW_SIZE = (1280, 900)
+WARM_URL = "about:blank"
+
+
+def load_cached_driver_path(cache_path=DRIVER_CACHE_PATH):
+    """Previously resolved chromedriver path, if it is still on disk."""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            path = json.load(f).get("path")
+    except (OSError, ValueError):
+        return None
+    return path if path and os.path.isfile(path) else None
+
+
+def resolve_driver_path(cache_path=DRIVER_CACHE_PATH, refresh=False):
+    """
+    Locate chromedriver without touching the network when possible:
+    the cached path first, then webdriver_manager (online) and finally None,
+    which lets Selenium Manager resolve it from its own local cache.
+    """
+    if not refresh:
+        path = load_cached_driver_path(cache_path)
+        if path:
+            return path
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        logging.warning(f"Could not resolve chromedriver online ({e}); falling back to Selenium Manager.")
+        return None
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "resolved_at": time.time()}, f)
+    return path
+
+
+class BrowserManager:
+    """
+    Owns the app's Chrome session: warms it up in the background, hands it out
+    after a health check and transparently replaces a crashed session.
+    """
+
+    def __init__(self, headless=HEADLESS, profile_dir=PROFILE_DIR, profile_name=PROFILE_NAME,
+                 cache_path=DRIVER_CACHE_PATH):
+        self.headless = headless
+        self.profile_dir = profile_dir
+        self.profile_name = profile_name
+        self.cache_path = cache_path
+        self.driver = None
+        self.restarts = 0
+        self.timings = {}          # cold_start / warm_start / driver_resolve, in seconds
+        self._lock = threading.RLock()
+        self._warmup = None
+
+    def options(self):
+        from selenium import webdriver  # Imported on the warm-up thread, not at app start-up
+
+        options = webdriver.ChromeOptions()
+        # Return from driver.get at DOMContentLoaded; page_readiness decides when it has settled
+        options.page_load_strategy = "eager"
+        if self.headless:
+            options.add_argument("--headless=new")
+            options.add_argument(f"--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}")
+        else:
+            options.add_experimental_option("detach", True)
+        if self.profile_dir:
+            options.add_argument(f"--user-data-dir={self.profile_dir}")
+        if self.profile_name:
+            options.add_argument(f"--profile-directory={self.profile_name}")
+        return options
+
+    def _launch(self):
+        """Start Chrome and load a first page; records the cold-start time."""
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException
+        from selenium.webdriver.chrome.service import Service
+
+        start = time.perf_counter()
+        path = resolve_driver_path(self.cache_path)
+        self.timings["driver_resolve"] = time.perf_counter() - start
+        try:
+            driver = webdriver.Chrome(service=Service(path) if path else Service(), options=self.options())
+        except SessionNotCreatedException as e:
+            # Usually Chrome updated past the cached chromedriver: resolve it again once
+            logging.warning(f"🔁 chromedriver does not match Chrome ({e.msg}); resolving it again.")
+            path = resolve_driver_path(self.cache_path, refresh=True)
+            driver = webdriver.Chrome(service=Service(path) if path else Service(), options=self.options())
+        if not self.headless:
+            driver.maximize_window()
+        driver.get(WARM_URL)
+        self.timings["cold_start"] = time.perf_counter() - start
+        logging.info(f"🌐 Browser ready in {self.timings['cold_start']:.2f}s "
+                     f"(driver lookup {self.timings['driver_resolve'] * 1e3:.0f} ms)")
+        return driver
+
+    def warm_up(self):
+        """Start the browser on a background thread; returns a Future for the driver."""
+        with self._lock:
+            if self._warmup is None:
+                self._warmup = Future()
+
+                def run():
+                    try:
+                        with self._lock:
+                            if self.driver is None:
+                                self.driver = self._launch()
+                        self._warmup.set_result(self.driver)
+                    except Exception as e:
+                        logging.error(f"Browser warm-up failed: {e}")
+                        self._warmup.set_exception(e)
+
+                threading.Thread(target=run, name="browser-warmup", daemon=True).start()
+            return self._warmup
+
+    def is_healthy(self):
+        """True if the session still answers a trivial script."""
+        if self.driver is None:
+            return False
+        try:
+            return self.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def get(self):
+        """A healthy driver: the warmed-up one, or a fresh session if it crashed."""
+        start = time.perf_counter()
+        if self._warmup is not None:
+            try:
+                self._warmup.result()
+            except Exception:
+                pass  # Fall through and launch synchronously
+        with self._lock:
+            if self.driver is not None and not self.is_healthy():
+                logging.warning("🔁 Browser session is unresponsive; restarting it.")
+                self.shutdown()
+                self.restarts += 1
+            if self.driver is None:
+                self.driver = self._launch()
+            self.timings["warm_start"] = time.perf_counter() - start
+            return self.driver
+
+    def shutdown(self):
+        with self._lock:
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                self.driver = None
+            self._warmup = None
+
+
+# Shared by the GUI and browser_control.get_driver
+browser_manager = BrowserManager()
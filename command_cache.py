@@ -0,0 +1,151 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from config import DATA_DIR
+
+###############################
+#     Cache Configuration     #
+###############################
+CACHE_PATH = os.path.join(DATA_DIR, "interpretations.db")
+MAX_MEMORY_ENTRIES = 256    # In-memory LRU size
+MAX_DISK_ENTRIES = 5000     # Oldest rows are dropped past this
+TTL_SECONDS = 7 * 24 * 3600  # Interpretations older than a week are re-queried
+
+
+def normalize_command(command):
+    """
+    Lowercase the command, drop punctuation and collapse whitespace so that
+    'Open YouTube.' and 'open   youtube' share one cache key.
+    '$' and inner dots are kept because prices and domains depend on them.
+    """
+    text = command.lower().strip()
+    text = re.sub(r"[^\w\s$.]", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .")
+
+
+class InterpretationCache:
+    """
+    Two-level cache for GPT-4 interpretations: an in-memory LRU in front of
+    a SQLite file, so answers survive restarts. Pass path=None for memory only.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_MEMORY_ENTRIES,
+                 max_disk_entries=MAX_DISK_ENTRIES, ttl=TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        """Open the SQLite store on first use (never at import time)."""
+        if self._db is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS interpretations "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, command):
+        """Return the cached interpretation for the command, or None on a miss."""
+        key = normalize_command(command)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            db = self._connection()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, created FROM interpretations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created):
+                        self._remember(key, value, created)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    db.execute("DELETE FROM interpretations WHERE key = ?", (key,))
+                    db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, command, value):
+        """Store an interpretation under the normalized command text."""
+        if not value:
+            return  # Never cache empty answers
+        key = normalize_command(command)
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, created)
+            db = self._connection()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO interpretations (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, created),
+                )
+                db.execute(
+                    "DELETE FROM interpretations WHERE key NOT IN "
+                    "(SELECT key FROM interpretations ORDER BY created DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+                db.commit()
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM interpretations")
+                db.commit()
+            self.hits = self.memory_hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters plus the current hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
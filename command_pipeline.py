@@ -0,0 +1,278 @@
+import contextvars
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+from page_readiness import ActionCancelled, cancellable
+from tracing import new_trace
+
+###############################
+#   Command Pipeline          #
+###############################
+# Capture (wake word + utterance), recognition, interpretation and execution
+# each run on their own worker threads, connected by small bounded queues.
+# While the browser is busy the assistant keeps listening; a full queue makes
+# the stage in front of it wait (backpressure) instead of piling up work; and
+# "stop" cancels the browser action in flight plus everything queued after it.
+PIPELINE_QUEUE_SIZE = 2   # Items waiting in front of each stage
+POLL_INTERVAL = 0.1       # How often blocked workers re-check for shutdown/cancel
+
+STOP_COMMANDS = {"stop", "stop that", "stop it", "cancel", "cancel that", "never mind", "nevermind", "abort"}
+
+END_OF_INPUT = object()   # capture() returns this when a recorded or scripted source runs out
+
+
+def is_stop_command(command):
+    text = re.sub(r"[^\w\s]", "", (command or "").lower()).strip()
+    return text in STOP_COMMANDS
+
+
+class CommandJob:
+    """One spoken command on its way through the pipeline."""
+
+    def __init__(self, audio, trace_id=None):
+        self.audio = audio
+        self.trace_id = trace_id
+        self.command = None
+        self.cancelled = threading.Event()
+        self.context = contextvars.copy_context()  # Trace ID of the capture that produced it
+        self.created = time.perf_counter()
+
+    def run(self, fn, *args):
+        """Call fn in the job's context, so spans land on its trace."""
+        return self.context.copy().run(fn, *args)
+
+
+class Stage:
+    """A bounded inbox plus the workers draining it, with queue-depth metrics."""
+
+    def __init__(self, name, handle, maxsize=PIPELINE_QUEUE_SIZE, workers=1):
+        self.name = name
+        self.handle = handle
+        self.workers = workers
+        self.inbox = queue.Queue(maxsize)
+        self.counters = {"processed": 0, "cancelled": 0, "failed": 0, "blocked": 0}
+        self.max_depth = 0
+        self.blocked_seconds = 0.0             # Producers waiting on a full inbox
+        self.queue_waits = deque(maxlen=1000)  # Seconds items sat in the inbox
+        self._lock = threading.Lock()
+
+    def put(self, job, item, running):
+        """
+        Queue an item, waiting while the inbox is full. Gives up (returns False)
+        when the job is cancelled or running() turns false.
+        """
+        start = time.perf_counter()
+        blocked = False
+        while running() and not job.cancelled.is_set():
+            try:
+                self.inbox.put((time.perf_counter(), job, item), timeout=POLL_INTERVAL)
+            except queue.Full:
+                blocked = True
+                continue
+            with self._lock:
+                self.max_depth = max(self.max_depth, self.inbox.qsize())
+                if blocked:
+                    self.counters["blocked"] += 1
+                    self.blocked_seconds += time.perf_counter() - start
+            return True
+        return False
+
+    def drain(self):
+        """Remove and return every queued job (for cancellation)."""
+        jobs = []
+        while True:
+            try:
+                _, job, _ = self.inbox.get_nowait()
+            except queue.Empty:
+                return jobs
+            self.inbox.task_done()
+            self.count("cancelled")
+            jobs.append(job)
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def waited(self, seconds):
+        with self._lock:
+            self.queue_waits.append(seconds)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self.queue_waits)
+            return dict(self.counters, depth=self.inbox.qsize(), capacity=self.inbox.maxsize,
+                        max_depth=self.max_depth, blocked_seconds=self.blocked_seconds,
+                        wait_p50=waits[len(waits) // 2] if waits else None,
+                        wait_max=waits[-1] if waits else None)
+
+
+class CommandPipeline:
+    """
+    Runs capture() -> recognize(audio) -> interpret(job, emit) -> execute(job, item)
+    on separate threads.
+
+    capture()             blocks until an utterance is captured; returns it, None
+                          if nothing usable was heard, or END_OF_INPUT to stop.
+    recognize(audio)      returns the command text or None.
+    interpret(job, emit)  calls emit(item) for each thing to execute (it may do
+                          so early, e.g. from a streaming reply); job.command
+                          holds the text.
+    execute(job, item)    runs one item in the browser; it runs inside
+                          page_readiness.cancellable(), so "stop" aborts it.
+    on_event(kind, job, detail) is told about recognized, stopped, cancelled,
+    failed and done items (for the GUI log).
+    """
+
+    def __init__(self, capture, recognize, interpret, execute, queue_size=PIPELINE_QUEUE_SIZE,
+                 execute_workers=1, on_event=None):
+        self.capture = capture
+        self.recognize = recognize
+        self.interpret = interpret
+        self.execute = execute
+        self.on_event = on_event or (lambda kind, job, detail=None: None)
+        self.stages = {
+            "recognize": Stage("recognize", self._recognize, queue_size),
+            "interpret": Stage("interpret", self._interpret, queue_size),
+            "execute": Stage("execute", self._execute, queue_size, workers=execute_workers),
+        }
+        self._running = threading.Event()
+        self._input_done = threading.Event()
+        self._inflight = {}  # job -> number of stages working on it (interpret and execute overlap)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        self._running.set()
+        self._input_done.clear()
+        self._threads = [threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True)]
+        for stage in self.stages.values():
+            for i in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._work, args=(stage,),
+                                                      name=f"pipeline-{stage.name}-{i}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        """Stop taking input, cancel whatever is running and wait for the workers."""
+        self._running.clear()
+        self.cancel()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, audio):
+        """Feed an utterance directly (instead of from capture()); returns its job or None."""
+        job = CommandJob(audio, new_trace())
+        return job if self.stages["recognize"].put(job, None, self._running.is_set) else None
+
+    def cancel(self):
+        """
+        Cancel the browser action in flight and drop every command queued behind
+        it, including utterances still waiting to be recognized (the stop command
+        itself is already out of that inbox, being recognized).
+        """
+        dropped = []
+        for name in ("recognize", "interpret", "execute"):
+            dropped += self.stages[name].drain()
+        with self._lock:
+            inflight = [job for job in self._inflight if not is_stop_command(job.command)]
+        for job in dropped + inflight:
+            job.cancelled.set()
+        return len(dropped) + len(inflight)
+
+    def wait_idle(self, timeout=None):
+        """Block until the input has run out and every stage is empty; False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not (self._input_done.is_set() and self._idle()):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL / 2)
+        return True
+
+    def _idle(self):
+        with self._lock:
+            if self._inflight:
+                return False
+        return all(stage.inbox.unfinished_tasks == 0 for stage in self.stages.values())
+
+    def stats(self):
+        """{stage: {depth, capacity, max_depth, processed, cancelled, failed, blocked, ...}}"""
+        stats = {name: stage.stats() for name, stage in self.stages.items()}
+        with self._lock:
+            stats["inflight"] = len(self._inflight)
+        return stats
+
+    ###############################
+    #   Workers                   #
+    ###############################
+    def _capture_loop(self):
+        while self._running.is_set():
+            trace_id = new_trace()  # Correlates every span of this command, from the wake word on
+            try:
+                audio = self.capture()
+            except Exception as e:
+                logging.error(f"Capture failed: {e}")
+                time.sleep(POLL_INTERVAL)
+                continue
+            if audio is END_OF_INPUT:
+                break
+            if audio is not None:
+                self.stages["recognize"].put(CommandJob(audio, trace_id), None, self._running.is_set)
+        self._input_done.set()
+
+    def _work(self, stage):
+        while self._running.is_set():
+            try:
+                queued, job, item = stage.inbox.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            stage.waited(time.perf_counter() - queued)
+            with self._lock:
+                self._inflight[job] = self._inflight.get(job, 0) + 1
+            try:
+                if job.cancelled.is_set():
+                    stage.count("cancelled")
+                    continue
+                job.run(stage.handle, job, item)
+                stage.count("processed")
+            except ActionCancelled:
+                stage.count("cancelled")
+                self.on_event("cancelled", job, item)
+            except Exception as e:
+                stage.count("failed")
+                logging.error(f"Pipeline stage {stage.name} failed on '{job.command}': {e}")
+                self.on_event("failed", job, e)
+            finally:
+                with self._lock:
+                    self._inflight[job] -= 1
+                    if not self._inflight[job]:
+                        del self._inflight[job]
+                stage.inbox.task_done()
+
+    def _recognize(self, job, _):
+        job.command = self.recognize(job.audio)
+        if not job.command:
+            self.on_event("unrecognized", job)
+            return
+        if is_stop_command(job.command):
+            # Handled here, ahead of everything queued for interpretation and execution
+            cancelled = self.cancel()
+            self.on_event("stopped", job, cancelled)
+            return
+        self.on_event("recognized", job)
+        self.stages["interpret"].put(job, None, self._running.is_set)
+
+    def _interpret(self, job, _):
+        def emit(item):
+            return self.stages["execute"].put(job, item, self._running.is_set)
+
+        self.interpret(job, emit)
+
+    def _execute(self, job, item):
+        with cancellable(job.cancelled):
+            self.execute(job, item)
+        self.on_event("done", job, item)
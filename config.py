@@ -1,2 +1,7 @@
+import os
+
 OPENAI_API_KEY = "Your key here"
-PORCUPINE_ACCESS_KEY = "Your key here"
\ No newline at end of file
+PORCUPINE_ACCESS_KEY = "Your key here"
+
+# Caches, logs and databases the app keeps between runs; remove it to reset them
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".browser_llm")
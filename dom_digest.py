@@ -0,0 +1,191 @@
+###############################
+#   DOM Distillation Engine   #
+###############################
+# Instead of sending megabytes of page_source, the page is reduced to an
+# indexed list of the visible elements a user could act on. Element IDs are
+# stable for the lifetime of the page and are kept in a page-side WeakMap, so
+# collecting them never mutates the DOM.
+
+TOKEN_BUDGET = 1500     # Rough token allowance for the digest text
+MAX_ELEMENTS = 600      # Hard cap on elements collected in the page (in-viewport ones kept first)
+MAX_TEXT_CHARS = 100    # Per-element text/label length
+
+# JavaScript function body; call collectElements(limit) inside a larger script
+COLLECT_ELEMENTS_JS = """
+function collectElements(limit) {
+    const selector = 'a[href], button, input:not([type=hidden]), textarea, select, video, ' +
+        '[role=button], [role=link], [role=tab], [role=menuitem], [role=checkbox], ' +
+        '[contenteditable=true], [onclick], [tabindex]:not([tabindex="-1"]), h1, h2, h3';
+    if (!window.__bidMap) {
+        window.__bidMap = new WeakMap();
+        window.__bidEls = [null];
+    }
+    const vw = window.innerWidth, vh = window.innerHeight;
+    const clean = s => (s || '').replace(/\\s+/g, ' ').trim().slice(0, %(max_text)d);
+    // Never what the user typed: fields are described by placeholder/label, buttons by their caption
+    const caption = el => el.tagName === 'TEXTAREA' ? '' :
+        el.tagName === 'INPUT' ? (/^(submit|button|reset)$/i.test(el.type) ? el.value : '') : el.innerText;
+    // Every visible match first, then the cap: on a long scrolled page the
+    // elements in the viewport must not lose their place to those above it
+    let found = [];
+    for (const el of document.querySelectorAll(selector)) {
+        const r = el.getBoundingClientRect();
+        if (r.width === 0 || r.height === 0) continue;
+        if (el.checkVisibility ? !el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true})
+                               : getComputedStyle(el).visibility === 'hidden') continue;
+        found.push({el: el, r: r, order: found.length,
+                    in_view: r.bottom > 0 && r.top < vh && r.right > 0 && r.left < vw});
+    }
+    if (found.length > limit) {
+        found.sort((a, b) => (b.in_view - a.in_view) || (a.order - b.order));
+        found = found.slice(0, limit).sort((a, b) => a.order - b.order);
+    }
+    const kept = new Map(found.map(f => [f.el, f]));
+    const out = [];
+    for (const {el, r, order, in_view} of found) {
+        let id = window.__bidMap.get(el);
+        if (!id) {
+            id = window.__bidEls.length;
+            window.__bidEls.push(new WeakRef(el));
+            window.__bidMap.set(el, id);
+        }
+        kept.get(el).id = id;
+        let p = el.parentElement;
+        while (p && !kept.has(p)) p = p.parentElement;
+        out.push({
+            id: id,
+            order: order,
+            tag: el.tagName.toLowerCase(),
+            role: el.getAttribute('role') || '',
+            type: el.getAttribute('type') || '',
+            text: clean(caption(el)),
+            label: clean(el.getAttribute('aria-label') || el.getAttribute('title') ||
+                         el.getAttribute('placeholder') || el.getAttribute('alt')),
+            name: el.getAttribute('name') || '',
+            dom_id: el.id || '',
+            placeholder: el.getAttribute('placeholder') || '',
+            field_label: el.labels && el.labels.length ? clean(el.labels[0].innerText) : '',
+            href: el.getAttribute('href') || '',
+            // Script-driven click targets (div/span "buttons") have no clickable tag or role
+            clickable: el.hasAttribute('onclick') || el.tabIndex >= 0 && el.hasAttribute('tabindex'),
+            parent: p ? kept.get(p).id : 0,  // Nearest collected ancestor (0 for none)
+            x: Math.round(r.left), y: Math.round(r.top), w: Math.round(r.width), h: Math.round(r.height),
+            in_view: in_view
+        });
+    }
+    return out;
+}
+""" % {"max_text": MAX_TEXT_CHARS}
+
+DIGEST_SCRIPT = COLLECT_ELEMENTS_JS + "\nreturn collectElements(arguments[0]);"
+
+# Look an element up again by its digest ID (None once it left the page)
+FIND_BY_ID_SCRIPT = """
+const ref = window.__bidEls && window.__bidEls[arguments[0]];
+return ref ? (ref.deref() || null) : null;
+"""
+
+KIND_WEIGHTS = {
+    "input": 30, "textarea": 30, "select": 30, "video": 25,
+    "button": 20, "a": 10, "h1": 8, "h2": 6, "h3": 4,
+}
+
+
+def element_kind(element):
+    """Short type label used in the digest ('link', 'button', 'input[email]', ...)."""
+    tag = element["tag"]
+    if element.get("role"):
+        return element["role"]
+    if tag == "a":
+        return "link"
+    if tag == "input":
+        return f"input[{element.get('type') or 'text'}]"
+    return tag
+
+
+def format_element(element):
+    """One digest line, e.g. '[12] link "Mini Crossbody Bag" -> /dp/B0123'."""
+    parts = [f"[{element['id']}]", element_kind(element)]
+    text = element.get("text") or ""
+    label = element.get("label") or ""
+    if text:
+        parts.append(f'"{text}"')
+    if label and label != text:
+        parts.append(f"({label})")
+    if element.get("name"):
+        parts.append(f"name={element['name']}")
+    if element.get("href") and element["tag"] == "a":
+        parts.append(f"-> {element['href'][:80]}")
+    return " ".join(parts)
+
+
+def estimate_tokens(text):
+    """~4 characters per token is close enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def priority(element):
+    """Higher is more worth keeping: in-viewport and form controls first."""
+    score = KIND_WEIGHTS.get(element["tag"], 12)
+    if element.get("in_view"):
+        score += 100
+    if element.get("text") or element.get("label"):
+        score += 5
+    return score - element.get("y", 0) / 10000  # Prefer elements nearer the top
+
+
+class DomDigest:
+    """The distilled element list plus the budget bookkeeping."""
+
+    def __init__(self, elements, text, tokens, total):
+        self.elements = elements  # Kept elements, in document order
+        self.text = text
+        self.tokens = tokens
+        self.total = total        # Elements found before the budget was applied
+
+    def __str__(self):
+        return self.text
+
+    def by_id(self, element_id):
+        for element in self.elements:
+            if element["id"] == element_id:
+                return element
+        return None
+
+
+def distill(elements, token_budget=TOKEN_BUDGET):
+    """
+    Keep the highest-priority elements that fit in token_budget and render them
+    as an indexed list in document order.
+    """
+    candidates = []
+    seen = set()
+    for element in elements:
+        if not (element.get("text") or element.get("label") or element.get("name")):
+            continue  # Nothing the model could refer to
+        key = (element["tag"], element.get("text"), element.get("href"))
+        if key in seen and element["tag"] == "a":
+            continue  # Thumbnail + title links to the same target
+        seen.add(key)
+        candidates.append((priority(element), element, format_element(element)))
+
+    kept, tokens = [], 0
+    for _, element, line in sorted(candidates, key=lambda c: -c[0]):
+        cost = estimate_tokens(line)
+        if tokens + cost > token_budget:
+            continue
+        kept.append((element, line))
+        tokens += cost
+
+    kept.sort(key=lambda pair: pair[0]["order"])
+    return DomDigest([e for e, _ in kept], "\n".join(line for _, line in kept), tokens, len(elements))
+
+
+def extract_digest(driver, token_budget=TOKEN_BUDGET, max_elements=MAX_ELEMENTS):
+    """Collect and distill the page's actionable elements (one script call)."""
+    return distill(driver.execute_script(DIGEST_SCRIPT, max_elements) or [], token_budget)
+
+
+def find_element_by_id(driver, element_id):
+    """Return the WebElement for a digest ID, or None if it is gone."""
+    return driver.execute_script(FIND_BY_ID_SCRIPT, int(element_id))
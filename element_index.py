@@ -0,0 +1,132 @@
+import logging
+import re
+import time
+from difflib import SequenceMatcher
+
+from dom_digest import COLLECT_ELEMENTS_JS, find_element_by_id
+from page_readiness import INSTRUMENT_JS
+
+###############################
+#   Visible Element Index     #
+###############################
+# One script call lists every visible actionable element (text, aria-label,
+# placeholder, role, bounding box). The list is cached per page version, which
+# the readiness instrumentation bumps on every DOM mutation, so repeated
+# lookups on an unchanged page cost one tiny round trip and a Python search.
+
+MAX_INDEX_ELEMENTS = 5000
+MIN_SCORE = 0.55
+
+CLICKABLE_TAGS = {"a", "button", "video", "summary"}
+CLICKABLE_ROLES = {"button", "link", "tab", "menuitem", "checkbox"}
+FIELD_TAGS = {"input", "textarea", "select"}
+
+# Returns {unchanged: true} when the caller's cached version is still current
+INDEX_SCRIPT = INSTRUMENT_JS + COLLECT_ELEMENTS_JS + """
+const st = window.__pageState;
+if (arguments[0] === st.id && arguments[1] === st.version) {
+    return {unchanged: true};
+}
+return {document: st.id, version: st.version, elements: collectElements(arguments[2])};
+"""
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s$]", " ", (text or "").lower())).strip()
+
+
+def match_score(query, candidate):
+    """Similarity of a spoken target ('add to cart') to one element string, 0-1."""
+    candidate = _normalize(candidate)
+    if not query or not candidate:
+        return 0.0
+    if candidate == query:
+        return 1.0
+    if candidate.startswith(query):
+        return 0.9
+    if re.search(rf"\b{re.escape(query)}\b", candidate):
+        return 0.8 + 0.1 * len(query) / len(candidate)
+    query_words, candidate_words = set(query.split()), set(candidate.split())
+    overlap = len(query_words & candidate_words) / len(query_words)
+    ratio = SequenceMatcher(None, query, candidate[:len(query) * 2]).ratio()
+    return max(0.7 * overlap, ratio * 0.85)
+
+
+def is_clickable(element):
+    return element["tag"] in CLICKABLE_TAGS or element.get("role") in CLICKABLE_ROLES or (
+        element["tag"] == "input" and element.get("type") in ("submit", "button", "checkbox", "radio")) or (
+        element.get("clickable") and element["tag"] not in FIELD_TAGS)
+
+
+def is_field(element):
+    return element["tag"] in FIELD_TAGS and element.get("type") not in ("submit", "button", "hidden")
+
+
+class ElementIndex:
+    """Cached index of the visible actionable elements on the driver's page."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.document = None
+        self.version = None
+        self.elements = []
+        self.builds = 0
+
+    def refresh(self):
+        """Re-collect the elements only if the page changed since the last call."""
+        result = self.driver.execute_script(INDEX_SCRIPT, self.document, self.version, MAX_INDEX_ELEMENTS)
+        if not result.get("unchanged"):
+            self.document = result["document"]
+            self.version = result["version"]
+            self.elements = result["elements"]
+            self.builds += 1
+        return self.elements
+
+    def rank(self, query, kind="click", limit=5):
+        """Elements ranked by how well they match `query`, best first: [(score, element)]."""
+        query = _normalize(query)
+        accept = is_field if kind == "field" else is_clickable
+        ranked = []
+        for element in self.elements:
+            if not accept(element):
+                continue
+            if kind == "field":
+                strings = (element.get("name"), element.get("dom_id"), element.get("field_label"),
+                           element.get("placeholder"), element.get("label"))
+            else:
+                strings = (element.get("text"), element.get("label"))
+            score = max(match_score(query, s) for s in strings)
+            if score >= MIN_SCORE:
+                ranked.append((score + (0.02 if element.get("in_view") else 0), element))
+        # A wrapper whose text starts with its button's caption also scores; the innermost match is the target
+        by_id = {element["id"]: element for element in self.elements}
+        wrappers = set()
+        for _, element in ranked:
+            parent = by_id.get(element.get("parent"))
+            while parent is not None:
+                wrappers.add(parent["id"])
+                parent = by_id.get(parent.get("parent"))
+        ranked = [pair for pair in ranked if pair[1]["id"] not in wrappers]
+        ranked.sort(key=lambda pair: -pair[0])
+        return ranked[:limit]
+
+    def find(self, query, kind="click"):
+        """Best-matching WebElement for the query, or None."""
+        start = time.perf_counter()
+        self.refresh()
+        ranked = self.rank(query, kind, limit=1)
+        if not ranked:
+            return None
+        score, element = ranked[0]
+        logging.info(f"Resolved '{query}' to [{element['id']}] {element['tag']} "
+                     f"'{element.get('text') or element.get('label')}' "
+                     f"(score {score:.2f}, {(time.perf_counter() - start) * 1e3:.1f} ms)")
+        return find_element_by_id(self.driver, element["id"])
+
+
+def get_element_index(driver):
+    """The ElementIndex attached to this driver (created on first use)."""
+    index = getattr(driver, "_element_index", None)
+    if index is None:
+        index = driver._element_index = ElementIndex(driver)
+    return index
@@ -1,179 +1,328 @@
 import tkinter as tk
 from tkinter import scrolledtext
-import threading
-import time
-from urllib.parse import urlparse
-import re
-from browser_control import get_driver
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import sys
+from startup import WARM_MODULES, profile, subsystems, timed_import
+from browser_lifecycle import browser_manager
+from session_pool import CURRENT, POOL_SIZE, SessionPool, action_domain
 # Import the re-initialized approach
-from voice_control import detect_wake_word, listen, interpret_command
-
-from browser_control import search_amazon, search_amazon_price_filter
+from voice_control import (
+    capture_command,
+    detect_wake_word,
+    interpret_command,
+    interpret_command_stream,
+    recognize_command,
+    start_capture_engine,
+)
+from llm_client import llm_client
+from intent_grammar import match_intent
+from page_readiness import ActionCancelled
+from command_pipeline import END_OF_INPUT, CommandPipeline
+from tracing import annotate, bind, traced, tracer
+from log_pipeline import LogPipeline
+from plan_mode import is_multi_step
+from macros import execute_with_macro
+from command_cache import normalize_command
+from tts_worker import COMMON_PHRASES, tts
+# browser_control (Selenium, page capture) is imported by the "actions" warm-up, not here
 
 ########################
 #  Global Variables
 ########################
-driver = None  
-listening_active = True  # Controls the main loop
+STREAMING_INTERPRETATION = True  # Start browser actions before GPT-4 finishes replying
+PLAN_MODE = True  # Compound commands get one AI plan instead of one call per action
+session_pool = SessionPool([browser_manager])  # Extra sessions launch on demand
+SPECULATIVE_INTERPRETATION = True  # Start GPT-4 on a stable partial transcript (streaming STT only)
+speculator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculate")
+PROFILE_STARTUP = "--profile-startup" in sys.argv  # Print the startup report and exit once warm
 
 ########################
 #  Tkinter GUI Setup
 ########################
 root = tk.Tk()
 root.title("Voice-Controlled Browser")
-root.geometry("500x350")
+root.geometry("500x500")
 
 log_display = scrolledtext.ScrolledText(root, width=50, height=10)
 log_display.pack(pady=10)
 
+latency_panel = tk.Label(root, font=("Courier", 9), justify=tk.LEFT, anchor="nw")
+latency_panel.pack(fill=tk.X, padx=10)
+profile.mark("window")
+
+# Bounded view of the log; workers only enqueue, the Tk loop renders in batches
+log_pipeline = LogPipeline(log_display)
+
 def update_log(message):
-    """Append messages to the log display."""
-    log_display.insert(tk.END, message + "\n")
-    log_display.yview(tk.END)  # auto-scroll
+    """Queue a message for the log display (safe from any thread)."""
+    log_pipeline.push(message)
+
+
+
+###############################
+#   Action Dispatch
+###############################
+@traced("perform_action")
+def perform_action(driver, action, command):
+    """Run one interpreted action string (e.g. 'open https://...') in the browser."""
+    from browser_control import perform_action as run_action
+
+    annotate(action=action.split(" ", 1)[0])
+    run_action(driver, action, command, log=update_log)
+
+
+def dispatch_action(action, command):
+    """
+    Queue the action on the browser session that owns its site and return a
+    Future, so e.g. an Amazon search and a YouTube video can load side by side.
+    Actions for the same site still run in order on that site's session.
+    """
+    if not browser_manager.is_healthy():
+        update_log("🌐 Opening browser...")
+
+    def report(future):
+        if future.exception() is not None and not isinstance(future.exception(), ActionCancelled):
+            update_log(f"❌ Action '{action}' failed: {future.exception()}")
 
+    # bind() keeps the command's trace ID (and cancellation scope) on the session thread
+    future = session_pool.submit(bind(perform_action), action, command, domain=action_domain(action))
+    future.add_done_callback(report)
+    return future
 
 
-def parse_price_filter(command):
+def run_plan(driver, command):
     """
-    Looks for patterns like 'below $50' or 'under $30'
-    Returns an integer price (e.g., 50) if found, otherwise None.
+    Plan a compound command with one AI call and run every step on `driver`;
+    a command that has run before replays its recorded macro instead.
     """
-    pattern = r"(?:below|under)\s*\$?(\d+)"
-    match = re.search(pattern, command)
-    if match:
-        return int(match.group(1))  # e.g. "50" -> 50
-    return None
+    def on_step(step, failure):
+        if failure:
+            update_log(f"❌ {step.intent} {step.parameters}: {failure}")
+        else:
+            update_log(f"✅ {step.intent} {step.parameters}")
+
+    result = execute_with_macro(command, driver, on_step=on_step)
+    if result.question:
+        update_log(f"❓ {result.question}")
+    elif result.ok and result.model_calls == 0:
+        update_log(f"🔁 Replayed macro: {len(result.steps)} steps, {result.elapsed:.1f}s")
+    elif result.ok:
+        update_log(f"🧭 Plan done: {len(result.steps)} steps, {result.model_calls} AI call(s), "
+                   f"{result.elapsed:.1f}s")
+    else:
+        update_log(f"❌ Plan failed after {result.replans} re-plan(s): {result.error}")
+    return result
+
+
+def dispatch_plan(command):
+    """Run a multi-step plan on the session the user last worked in."""
+    def report(future):
+        if future.exception() is not None and not isinstance(future.exception(), ActionCancelled):
+            update_log(f"❌ Plan for '{command}' failed: {future.exception()}")
+
+    future = session_pool.submit(bind(run_plan), command, domain=CURRENT)
+    future.add_done_callback(report)
+    return future
 
 
+def speculate(partial, speculations):
+    """
+    Interpret a stable partial transcript in the background while the user
+    may still be talking. If the final transcript matches, its interpretation
+    is already in flight (or done) when recognition finishes. `speculations`
+    maps normalized partials of the current utterance to their Futures.
+    """
+    key = normalize_command(partial)
+    if not SPECULATIVE_INTERPRETATION or key in speculations:
+        return
+    if match_intent(partial) or (PLAN_MODE and is_multi_step(partial)):
+        return  # Resolved locally or planned; nothing worth starting early
+    update_log(f"🔮 Interpreting early: {partial}")
+    speculations[key] = speculator.submit(bind(interpret_command), partial)
+
 
 ###############################
-#   Wake Word + Listen Loop
+#   Latency Panel
 ###############################
-def listen_thread():
-    global driver, listening_active
-    while listening_active:
-        update_log("🟢 Waiting for wake word... (Say 'Computer')")
-        
-        # 1) Create a fresh Porcupine, detect 'computer' once
-        if detect_wake_word():
-            update_log("✅ Wake word detected! Now speak your command...")
-
-            # 2) Listen for the actual command
-            command = listen()
-            if command is None:
-                update_log("❌ No command detected. Please try again.")
-            else:
-                update_log(f"🎤 Recognized Command: {command}")
-
-                # 3) GPT-4 interpretation
-                action = interpret_command(command).strip('"').strip()
-                update_log(f"🔍 AI Interpretation: {action}")
-
-                # 4) Browser if needed
-                if driver is None:
-                    update_log("🌐 Opening browser...")
-                    driver = get_driver()
-
-                # 5) Perform the interpreted action
-                if action.startswith("open "):
-                    url = action.replace("open ", "").strip()
-                    if not url.startswith("http"):
-                        url = "https://" + url
-                    update_log(f"🌍 Opening {url}...")
-                    driver.get(url)
-                # elif action.startswith("search "):
-                #     query = action.replace("search ", "").strip()
-                #     search_url = f"https://www.google.com/search?q={query}"
-                #     update_log(f"🔎 Searching Google for: {query}")
-                #     driver.get(search_url)
-                    
-                # elif action.startswith("search "):
-                #     query = action.replace("search ", "").strip()
-                #     domain = urlparse(driver.current_url).netloc.lower()
-                #     if "amazon" in domain:
-                #         update_log(f"🔎 Searching Amazon for: {query}")
-                #         search_amazon(driver, query)
-                #     else:
-                #         update_log(f"🔎 Searching Google for: {query}")
-                #         driver.get(f"https://www.google.com/search?q={query}")
-
-                # elif action.startswith("search_amazon "):
-                #     query = action.replace("search_amazon ", "").strip()
-                #     update_log(f"🔎 Searching Amazon for: {query}")
-                #     search_amazon(driver, query)
-                    
-
-                elif action.startswith("search "):
-                    query = action.replace("search ", "").strip()
-                    domain = urlparse(driver.current_url).netloc.lower()
-
-                    # 1) Check if the user said "below $X" or "under $X"
-                    max_price = parse_price_filter(command)  # e.g. 50
-                    if max_price and "amazon" in domain:
-                        # The user is on Amazon, and we found a "below $X" phrase
-                        item_only = re.sub(r"(?:below|under)\s*\$\d+", "", query, flags=re.IGNORECASE).strip()
-                        # e.g. "crossbody bags below $50" -> "crossbody bags"
-                        update_log(f"🔎 Searching Amazon for: {item_only} under ${max_price}")
-                        search_amazon_price_filter(driver, item_only, max_price)
-
-                    elif "amazon" in domain:
-                        # Normal Amazon search (no price filter)
-                        update_log(f"🔎 Searching Amazon for: {query}")
-                        search_amazon(driver, query)
-                    else:
-                        # Fallback to Google
-                        update_log(f"🔎 Searching Google for: {query}")
-                        driver.get(f"https://www.google.com/search?q={query}")
-
-                elif action.startswith("search_amazon "):
-                    query = action.replace("search_amazon ", "").strip()
-
-                    # 2) If GPT-4 specifically said "search_amazon"
-                    max_price = parse_price_filter(query)
-                    if max_price:
-                        # We found 'below $X' in the user query
-                        item_only = re.sub(r"(?:below|under)\s*\$\d+", "", query, flags=re.IGNORECASE).strip()
-                        update_log(f"🔎 Searching Amazon for: {item_only} under ${max_price}")
-                        search_amazon_price_filter(driver, item_only, max_price)
-                    else:
-                        # Normal Amazon search
-                        update_log(f"🔎 Searching Amazon for: {query}")
-                        search_amazon(driver, query)
-
-
-
-                elif action.startswith("play_video "):
-                    index_str = action.replace("play_video", "").strip()  # e.g. "3"
-                    try:
-                        video_index = int(index_str)
-                    except ValueError:
-                        video_index = 1
-                    update_log(f"🎬 Playing video at index: {video_index}")
-
-                    # call the `handle_play_video` from browser_control.py
-                    from browser_control import handle_play_video
-                    handle_play_video({"video_index": video_index}, driver)   
-                elif action.startswith("pause_video"):
-                    from browser_control import handle_pause_video
-                    # If needed, you can pass parameters, but we likely have none
-                    update_log("⏸ Pausing the current video...")
-                    handle_pause_video({}, driver)
-                else:
-                    fallback_query = action
-                    update_log(f"⚠ Unknown action. Using fallback Google search for: {fallback_query}")
-                    driver.get(f"https://www.google.com/search?q={fallback_query}")
-
-        # 6) Short pause before next loop
-        time.sleep(1)  
-        # Then the loop continues, calling `detect_wake_word()` again
+PANEL_ORDER = ["detect_wake_word", "capture_command", "recognize_command", "interpret_command", "interpret_command_stream",
+               "perform_action", "capture_screenshot"]
+
+
+def refresh_latency_panel():
+    """Redraw per-stage latencies from the tracer once a second (runs on the Tk thread)."""
+    if PROFILE_STARTUP and "ready" in profile.marks:
+        root.destroy()
+        return
+    summary = tracer.summary()
+    names = [n for n in PANEL_ORDER if n in summary] + sorted(n for n in summary if n not in PANEL_ORDER)
+    lines = [f"{'stage':<26}{'last':>7}{'p50':>7}{'p95':>7}{'n':>5}"]
+    for name in names:
+        stats = summary[name]
+        cells = [f"{stats[k]:7.2f}" if stats[k] is not None else f"{'-':>7}" for k in ("last", "p50", "p95")]
+        lines.append(f"{name[:25]:<26}{''.join(cells)}{stats['count']:>5}")
+    queues = pipeline.stats()
+    lines.append("queues " + "  ".join(f"{name} {queues[name]['depth']}/{queues[name]['capacity']}"
+                                       for name in pipeline.stages) + f"  running {queues['inflight']}")
+    warming = [name for name, state in subsystems.status().items() if state == "warming"]
+    if warming:
+        lines.append("warming up: " + ", ".join(warming))
+    latency_panel.config(text="\n".join(lines) if names else "Latency (s): no commands yet")
+    root.after(1000, refresh_latency_panel)
+
+
+###############################
+#   Command Pipeline
+###############################
+# Wake word + capture, recognition, interpretation and execution run on their
+# own threads (see command_pipeline.py), so the next command, or "stop", is
+# heard while the browser is still busy with the last one.
+def capture_stage():
+    """Wait for the wake word and capture one utterance."""
+    try:
+        subsystems.get("wake_word")  # Porcupine + microphone, opened by the warm-up
+    except Exception as e:
+        update_log(f"⚠ Wake word detection is unavailable: {e}")
+        return END_OF_INPUT
+    update_log("🟢 Waiting for wake word... (Say 'Computer')")
+    if not detect_wake_word():
+        return END_OF_INPUT  # A recorded source ran out
+    update_log("✅ Wake word detected! Now speak your command...")
+    speculations = {}
+    session = capture_command(on_partial=lambda partial: speculate(partial, speculations))
+    if session is None:
+        update_log("❌ No command detected. Please try again.")
+        return None
+    return session, speculations
+
+
+def recognize_stage(audio):
+    session, _ = audio
+    return recognize_command(session)
+
+
+def interpret_stage(job, emit):
+    """Local fast path first, GPT-4 only when the grammar is unsure; emit() queues the result."""
+    command = job.command
+    _, speculations = job.audio
+    fast_match = match_intent(command)
+    if PLAN_MODE and is_multi_step(command):
+        update_log("🧭 Multi-step command, asking for a plan...")
+        emit(("plan", command))
+    elif fast_match:
+        action = fast_match.action
+        update_log(f"⚡ Fast-path Interpretation: {action}")
+        emit(("action", action))
+    elif normalize_command(command) in speculations:
+        # The final transcript matched a stable partial already sent to GPT-4
+        action = speculations[normalize_command(command)].result().strip('"').strip()
+        update_log(f"🔍 AI Interpretation (started early): {action}")
+        emit(("action", action))
+    elif STREAMING_INTERPRETATION:
+        # The action is queued as soon as GPT-4 has committed to it
+        def on_action(action):
+            update_log(f"🔍 AI Interpretation: {action}")
+            emit(("action", action))
+
+        result = interpret_command_stream(command, on_action)
+        if result.first_token is not None:
+            update_log(f"⏱ First token {result.first_token:.2f}s, "
+                       f"dispatched {result.dispatched:.2f}s, done {result.completed:.2f}s")
+    else:
+        action = interpret_command(command).strip('"').strip()
+        update_log(f"🔍 AI Interpretation: {action}")
+        emit(("action", action))
+
+
+def execute_stage(job, item):
+    """Run an action or plan on its browser session and wait for it (cancellable)."""
+    kind, payload = item
+    if kind == "plan":
+        dispatch_plan(payload).result()
+    else:
+        dispatch_action(payload, job.command).result()
+
+
+def on_pipeline_event(kind, job, detail=None):
+    if kind == "recognized":
+        update_log(f"🎤 Recognized Command: {job.command} [trace {job.trace_id}]")
+    elif kind == "unrecognized":
+        update_log("❌ No command detected. Please try again.")
+    elif kind == "stopped":
+        update_log(f"⏹ Stopped ({detail} command(s) cancelled)")
+    elif kind == "cancelled":
+        update_log(f"⏹ Cancelled: {job.command}")
+
+
+# One execution worker per browser session keeps sites loading side by side
+pipeline = CommandPipeline(capture_stage, recognize_stage, interpret_stage, execute_stage,
+                           execute_workers=POOL_SIZE, on_event=on_pipeline_event)
+tracer.register_gauge("browser_llm_queue_depth", "Commands waiting in front of each pipeline stage.", "stage",
+                      lambda: {name: stage.inbox.qsize() for name, stage in pipeline.stages.items()})
+tracer.register_gauge("browser_llm_queue_blocked_seconds", "Time stages spent waiting on a full queue.", "stage",
+                      lambda: {name: stage.blocked_seconds for name, stage in pipeline.stages.items()})
+
+###############################
+#   Startup
+###############################
+# The window comes up on light modules only; once the Tk loop is running, the
+# heavy subsystems warm up side by side on background threads (see startup.py)
+# and the first command waits only for the ones it actually needs.
+def start_browser_warmup():
+    """Launch the browser in the background so the first command doesn't pay for it."""
+    def report(future):
+        if future.exception() is None:
+            update_log(f"🌐 Browser ready ({browser_manager.timings['cold_start']:.1f}s cold start)")
+        else:
+            update_log(f"⚠ Browser warm-up failed: {future.exception()}")
+
+    subsystems.start("browser", lambda: browser_manager.warm_up().result()).add_done_callback(report)
+
+def warm_actions():
+    """Import what the first browser action needs (Selenium, page capture, action handlers)."""
+    for module in WARM_MODULES:
+        timed_import(module)
+
+def warm_tts():
+    """Render the stock spoken phrases, then the action error prompts, into the TTS cache."""
+    tts.prerender(COMMON_PHRASES)
+    subsystems.get("actions")
+    from browser_control import ACTION_HANDLERS, ERROR_PHRASE
+
+    tts.prerender(ERROR_PHRASE.format(intent=intent) for intent in ACTION_HANDLERS)
 
 def start_wake_word_detection():
-    """Start the wake word detection in a separate thread."""
+    """Start the command pipeline; it waits for the wake word engine's warm-up."""
     update_log("Starting wake word detection...")
-    detection_thread = threading.Thread(target=listen_thread, daemon=True)
-    detection_thread.start()
+    subsystems.start("wake_word", start_capture_engine)
+    pipeline.start()
+
+def report_startup():
+    profile.mark("ready")
+    logging.info(profile.report())
+    update_log(f"🚀 All subsystems ready in {profile.marks['ready']:.1f}s "
+               f"(interactive after {profile.marks['interactive'] * 1e3:.0f} ms)")
+    try:
+        profile.save()
+    except OSError as e:
+        logging.warning(f"Could not save the startup report: {e}")
+    if PROFILE_STARTUP:
+        print(profile.report())  # refresh_latency_panel closes the window
+
+def on_interactive():
+    """First turn of the Tk loop: the window is up, so start everything heavy."""
+    profile.mark("interactive")
+    start_browser_warmup()
+    subsystems.start("actions", warm_actions)
+    subsystems.start("llm", lambda: llm_client.client)  # Imports openai/httpx, opens the pool
+    subsystems.start("tts", warm_tts)
+    start_wake_word_detection()
+    subsystems.when_all_ready(report_startup)
 
-start_wake_word_detection()
+log_pipeline.start(root)
+tracer.start_metrics_server()
+refresh_latency_panel()
+root.after(0, on_interactive)
 
 ##############################
 #   Run the GUI Main Loop
@@ -0,0 +1,173 @@
+import re
+from collections import namedtuple
+
+###############################
+#   Local Fast-Path Grammar   #
+###############################
+# Utterances that map unambiguously onto an action string are resolved here
+# in microseconds; anything below MIN_CONFIDENCE goes to GPT-4 as before.
+MIN_CONFIDENCE = 0.8
+
+IntentMatch = namedtuple("IntentMatch", ["action", "confidence", "rule"])
+
+KNOWN_SITES = {
+    "youtube": "https://www.youtube.com",
+    "amazon": "https://www.amazon.com",
+    "google": "https://www.google.com",
+    "gmail": "https://mail.google.com",
+    "wikipedia": "https://www.wikipedia.org",
+    "netflix": "https://www.netflix.com",
+    "spotify": "https://open.spotify.com",
+    "weather": "https://weather.com",
+    "the weather": "https://weather.com",
+    "google news": "https://news.google.com",
+    "the news": "https://news.google.com",
+}
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+}
+# Sites a bare "search ..." may be aimed at; naming one makes the query ambiguous
+SITE_NAMES = {"youtube", "amazon", "google", "gmail", "wikipedia", "netflix", "spotify"}
+RESULT_WORDS = {"video", "videos", "result", "results"}
+
+# Common STT homophones; only read as numbers where a number must follow ("play video to")
+NUMBER_HOMOPHONES = {"to": 2, "too": 2, "for": 4}
+
+
+def parse_number(word, homophones=False):
+    """'3', '3rd', 'three' and 'third' all become 3 (and 'to' 2 with homophones). Returns None if unknown."""
+    word = word.lower().strip()
+    digits = re.fullmatch(r"(\d+)(?:st|nd|rd|th)?", word)
+    if digits:
+        return int(digits.group(1))
+    return NUMBER_WORDS.get(word) or (NUMBER_HOMOPHONES.get(word) if homophones else None)
+
+
+def parse_price_filter(command):
+    """
+    Looks for patterns like 'below $50', 'under $30' or 'under 30 dollars'.
+    Returns an integer price (e.g., 50) if found, otherwise None.
+    """
+    pattern = r"(?:below|under)\s*\$?(\d+)"
+    match = re.search(pattern, command)
+    if match:
+        return int(match.group(1))  # e.g. "50" -> 50
+    return None
+
+
+def _normalize_price(query):
+    """'desk lamps under 30 dollars' -> 'desk lamps under $30' (the form GPT-4 emits)."""
+    return re.sub(r"\b(below|under)\s*\$?(\d+)(?:\s*dollars?)?", r"\1 $\2", query)
+
+
+########################
+#  Rule Builders
+########################
+def _pause(match):
+    return "pause_video"
+
+
+def _play_video(match):
+    index = parse_number(match.group("n"))
+    return f"play_video {index}" if index else None
+
+
+def _play_video_number(match):
+    """'play video to': the slot after 'video' can only be a number, so homophones count."""
+    index = parse_number(match.group("n"), homophones=True)
+    return f"play_video {index}" if index else None
+
+
+def _open_site(match):
+    site = match.group("site").strip()
+    if site in KNOWN_SITES:
+        return KNOWN_SITES[site]
+    if re.fullmatch(r"[\w-]+(?:\.[\w-]+)+", site):
+        return site if site.startswith("http") else f"https://{site}"
+    return None
+
+
+def _open(match):
+    url = _open_site(match)
+    return f"open {url}" if url else None
+
+
+def _youtube_query(match):
+    query = match.group("q").strip()
+    if re.fullmatch(r"(?:the )?\w+ (?:video|result)", query) and parse_number(query.split()[-2]):
+        return None  # "find the second video on youtube" picks a result, it is not a query
+    return f"open https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
+
+
+def _search_amazon(match):
+    return f"search_amazon {_normalize_price(match.group('q').strip())}"
+
+
+def _open_cheapest(match):
+    price = match.group("price")
+    return f"open_cheapest {price}" if price else "open_cheapest"
+
+
+def _next_page(match):
+    return "next_page"
+
+
+def _search(match):
+    return f"search {match.group('q').strip()}"
+
+
+def _search_confidence(match):
+    """A plain query is a web search; one naming a site or a result ("search youtube videos") is ambiguous."""
+    words = set(match.group("q").split())
+    return 0.6 if words & (SITE_NAMES | RESULT_WORDS) else 0.9
+
+
+# Playing a result may name the site it is on ("play the second video on youtube")
+ON_YOUTUBE = r"(?: (?:on|in) youtube)?"
+
+# (name, compiled pattern, builder, confidence or confidence(match)), tried in order
+RULES = [
+    ("pause", re.compile(r"(?:please )?(?:pause|stop)(?: the)?(?: current)? (?:video|playback)"), _pause, 1.0),
+    ("play_video", re.compile(r"(?:play|click(?: on)?|open|watch|start)(?: the)? (?P<n>\w+) (?:video|result)" + ON_YOUTUBE),
+     _play_video, 1.0),
+    ("play_video", re.compile(r"(?:play|click(?: on)?|open|watch|start) (?:video|result)(?: number)? (?P<n>\w+)" + ON_YOUTUBE),
+     _play_video_number, 1.0),
+    ("youtube_search", re.compile(r"(?:open|play|find|search(?: for)?) (?P<q>.+?) (?:in|on) youtube"), _youtube_query, 0.9),
+    ("search_amazon", re.compile(r"search(?: for)? (?P<q>.+?) (?:on|in) amazon"), _search_amazon, 1.0),
+    ("search_amazon", re.compile(r"search(?: on)? amazon for (?P<q>.+)"), _search_amazon, 1.0),
+    ("youtube_search", re.compile(r"search(?: on)? youtube for (?P<q>.+)"), _youtube_query, 1.0),
+    ("open_cheapest", re.compile(r"(?:(?:open|show me|pick|buy|get|click(?: on)?|go to) )?(?:the )?cheapest"
+                                 r"(?: one| item| result| option| product)?"
+                                 r"(?: (?:below|under) \$?(?P<price>\d+)(?: dollars?)?)?"), _open_cheapest, 1.0),
+    ("next_page", re.compile(r"(?:(?:go to|open|show(?: me)?) )?(?:the )?next (?:page|results|page of results)"), _next_page, 1.0),
+    ("open", re.compile(r"(?:open|go to|launch|visit|check)(?: up)? (?P<site>[\w .-]+)"), _open, 1.0),
+    ("search", re.compile(r"search(?: for)? (?P<q>.+)"), _search, _search_confidence),
+]
+
+
+def match_intent(command, min_confidence=MIN_CONFIDENCE):
+    """
+    Match the command against the local grammar.
+    Returns an IntentMatch with the same action string GPT-4 would produce,
+    or None when no rule is confident enough (caller should fall back to GPT-4).
+    """
+    text = re.sub(r"[^\w\s$.-]", " ", command.lower())
+    text = re.sub(r"\s+", " ", text).strip(" .")
+    for name, pattern, build, confidence in RULES:
+        if not callable(confidence) and confidence < min_confidence:
+            continue
+        match = pattern.fullmatch(text)
+        if not match:
+            continue
+        if callable(confidence):
+            confidence = confidence(match)
+            if confidence < min_confidence:
+                continue
+        action = build(match)
+        if action:
+            return IntentMatch(action, confidence, name)
+    return None
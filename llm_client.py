@@ -0,0 +1,221 @@
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+###############################
+#   OpenAI Client Config      #
+###############################
+# One keep-alive connection pool for every GPT call, with per-request
+# timeouts, jittered retries on 429/5xx, a hedge request when the first one
+# is unusually slow, a token bucket instead of fixed cooldown sleeps, a cap
+# on concurrent calls, and coalescing of identical in-flight prompts.
+CONNECT_TIMEOUT = 5.0
+REQUEST_TIMEOUT = 30.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5        # Seconds; full jitter over base * 2**attempt
+BACKOFF_MAX = 8.0
+HEDGE_AFTER = 4.0         # Fire a duplicate request if no reply by then; None disables
+REQUESTS_PER_SECOND = 2.0
+BURST = 4
+MAX_CONCURRENCY = 4
+POOL_CONNECTIONS = 8
+KEEPALIVE_SECONDS = 60
+
+
+
+def retryable_errors():
+    """Errors worth retrying (openai is imported on first use rather than at app start-up)."""
+    import openai
+
+    return (openai.RateLimitError, openai.InternalServerError,
+            openai.APITimeoutError, openai.APIConnectionError)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of `capacity`."""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def retry_delay(error, attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Server-requested Retry-After when present, otherwise full-jitter exponential backoff."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return min(cap, float(response.headers.get("retry-after")))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class LLMClient:
+    """
+    Drop-in for `openai.chat.completions.create` (use `client.chat.completions.create`)
+    backed by a shared connection pool and the resilience policies above.
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES,
+                 hedge_after=HEDGE_AFTER, rate=REQUESTS_PER_SECOND, burst=BURST,
+                 max_concurrency=MAX_CONCURRENCY, backoff_base=BACKOFF_BASE):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.backoff_base = backoff_base
+        self.limiter = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="llm")
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._client = None
+        self.counters = {"requests": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                         "coalesced": 0, "errors": 0, "throttled_seconds": 0.0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def client(self):
+        """The underlying OpenAI client, created on first use with a keep-alive pool."""
+        if self._client is None:
+            import httpx
+            import openai
+
+            if self.api_key is None:
+                import config  # Holds your OpenAI API key
+
+                self.api_key = config.OPENAI_API_KEY
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=POOL_CONNECTIONS,
+                                    max_keepalive_connections=POOL_CONNECTIONS,
+                                    keepalive_expiry=KEEPALIVE_SECONDS),
+            )
+            self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                         http_client=http_client, max_retries=0)
+        return self._client
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _send(self, kwargs, rate_limited=True):
+        """One HTTP attempt, inside the rate limit and concurrency cap."""
+        if rate_limited:
+            self._count("throttled_seconds", self.limiter.acquire())
+        with self._slots:
+            self._count("attempts")
+            return self.client.chat.completions.create(timeout=self.timeout, **kwargs)
+
+    def _send_hedged(self, kwargs):
+        """Send once; if no reply within hedge_after, race a second copy and take the first answer."""
+        first = self._executor.submit(self._send, kwargs)
+        if self.hedge_after is None:
+            return first.result()
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done or not self.limiter.try_acquire():
+            return first.result()
+        self._count("hedges")
+        hedge = self._executor.submit(self._send, kwargs, False)
+        pending = {first, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _with_retries(self, send, kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return send(kwargs)
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    self._count("errors")
+                    raise
+                delay = retry_delay(e, attempt, self.backoff_base)
+                self._count("retries")
+                logging.warning(f"OpenAI call failed ({type(e).__name__}); retry {attempt + 1} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def create(self, **kwargs):
+        """chat.completions.create with pooling, retries, hedging, rate limiting and coalescing."""
+        self._count("requests")
+        if kwargs.get("stream"):
+            # Retries cover the request itself; a stream is not hedged or shared
+            return self._with_retries(self._send, kwargs)
+
+        key = json.dumps(kwargs, sort_keys=True, default=str)
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                shared = self._inflight[key] = Future()
+                owner = True
+            else:
+                self.counters["coalesced"] += 1
+                owner = False
+        if not owner:
+            return shared.result()
+
+        try:
+            result = self._with_retries(self._send_hedged, kwargs)
+            shared.set_result(result)
+            return result
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+# Shared by voice_control and plan_mode
+llm_client = LLMClient()
@@ -0,0 +1,137 @@
+import logging
+import os
+import queue
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from config import DATA_DIR
+
+###############################
+#   GUI Log Pipeline Config   #
+###############################
+# Worker threads never touch Tk: they push lines onto a queue, and the Tk main
+# loop drains it in batches on a timer. The widget keeps only the newest
+# MAX_VISIBLE_LINES; older lines are spilled to a rotating file.
+MAX_VISIBLE_LINES = 500
+DRAIN_INTERVAL_MS = 100
+MAX_BATCH = 5000          # Lines taken from the queue per tick
+SPILL_PATH = os.path.join(DATA_DIR, "gui.log")
+SPILL_MAX_BYTES = 1_000_000
+SPILL_BACKUPS = 3
+
+
+def open_spill_log(path=SPILL_PATH, max_bytes=SPILL_MAX_BYTES, backups=SPILL_BACKUPS):
+    """Logger that appends evicted GUI lines to a size-rotated file."""
+    spill = logging.getLogger(f"gui_log_spill.{path}")
+    spill.propagate = False
+    spill.setLevel(logging.INFO)
+    if not spill.handlers:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        spill.addHandler(handler)
+    return spill
+
+
+class LogPipeline:
+    """
+    Thread-safe front end for a Tk text widget: push() from any thread,
+    start() once on the Tk thread to render batches every interval_ms.
+    """
+
+    def __init__(self, widget=None, max_lines=MAX_VISIBLE_LINES, spill_path=SPILL_PATH,
+                 interval_ms=DRAIN_INTERVAL_MS, max_batch=MAX_BATCH):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self.visible = deque()
+        self.spill = open_spill_log(spill_path) if spill_path else None
+        self.pushed = 0
+        self.rendered = 0
+        self.spilled = 0
+        self.max_depth = 0
+        self._queue = queue.SimpleQueue()  # put() never blocks and needs no extra lock
+        self._root = None
+
+    def push(self, message):
+        """Queue one message for display; safe to call from any thread."""
+        self._queue.put((time.time(), str(message)))
+        self.pushed += 1
+
+    def drain(self):
+        """Take up to max_batch queued lines: [(timestamp, line), ...]."""
+        lines = []
+        try:
+            while len(lines) < self.max_batch:
+                stamp, message = self._queue.get_nowait()
+                lines.extend((stamp, line) for line in message.split("\n"))
+        except queue.Empty:
+            pass
+        return lines
+
+    def flush(self):
+        """Render everything queued so far; must run on the Tk thread."""
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        batch = self.drain()
+        if not batch:
+            return 0
+        self.visible.extend(batch)
+        overflow = len(self.visible) - self.max_lines if self.max_lines else 0
+        evicted = [self.visible.popleft() for _ in range(max(0, overflow))]
+        self._spill(evicted)
+
+        if self.widget is not None:
+            shown = batch[-self.max_lines:] if self.max_lines else batch
+            if self.max_lines and len(shown) == self.max_lines:
+                self.widget.delete("1.0", "end")
+            elif overflow > 0:
+                self.widget.delete("1.0", f"{overflow + 1}.0")
+            self.widget.insert("end", "".join(line + "\n" for _, line in shown))
+            self.widget.yview("end")
+        self.rendered += len(batch)
+        return len(batch)
+
+    def _spill(self, evicted):
+        if not evicted:
+            return
+        self.spilled += len(evicted)
+        if self.spill is not None:
+            text = "\n".join(f"{time.strftime('%H:%M:%S', time.localtime(stamp))} {line}"
+                             for stamp, line in evicted)
+            self.spill.info(text)
+
+    def _tick(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Log rendering failed: {e}")
+        self._root.after(self.interval_ms, self._tick)
+
+    def start(self, root):
+        """Begin draining on root's event loop."""
+        self._root = root
+        root.after(self.interval_ms, self._tick)
+        return self
+
+    def stats(self):
+        return {"pushed": self.pushed, "rendered": self.rendered, "spilled": self.spilled,
+                "visible": len(self.visible), "queued": self._queue.qsize(), "max_depth": self.max_depth}
+
+    def close(self):
+        """Write the visible and still-queued lines to the spill file, flush it and release it."""
+        remaining = list(self.visible)
+        while True:
+            batch = self.drain()
+            if not batch:
+                break
+            remaining.extend(batch)
+        self.visible.clear()
+        self._spill(remaining)
+        if self.spill is not None:
+            for handler in list(self.spill.handlers):
+                handler.flush()
+                handler.close()
+                self.spill.removeHandler(handler)
+            self.spill = None
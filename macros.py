@@ -0,0 +1,335 @@
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from config import DATA_DIR
+from command_cache import normalize_command
+from tracing import annotate, traced
+
+###############################
+#   Macro Record / Replay     #
+###############################
+# The first time a multi-step command succeeds, the resolved trace is stored:
+# every step's intent and parameters plus the concrete element it acted on
+# (a CSS selector and its text) and the page it ended on. Later runs of the
+# same command replay that trace directly, checking each step cheaply, and
+# only fall back to element lookup or, if a step still fails, to the model. A
+# recorded element that now reads differently always goes back to the model.
+# Values typed into password and card fields are never stored.
+MACRO_PATH = os.path.join(DATA_DIR, "macros.db")
+
+# Intents whose handlers resolve a page element (and report it via note_target)
+ELEMENT_INTENTS = {"click", "fill_form", "search", "play_video"}
+
+_recording = contextvars.ContextVar("macro_recording", default=None)
+
+LOCATOR_SCRIPT = """
+const el = arguments[0];
+const unique = (e) => e.id && document.querySelectorAll('#' + CSS.escape(e.id)).length === 1;
+const parts = [];
+for (let e = el; e && e.nodeType === 1 && e !== document.documentElement; e = e.parentElement) {
+    if (unique(e)) { parts.unshift('#' + CSS.escape(e.id)); break; }
+    let i = 1;
+    for (let s = e.previousElementSibling; s; s = s.previousElementSibling) if (s.tagName === e.tagName) i++;
+    parts.unshift(e.tagName.toLowerCase() + ':nth-of-type(' + i + ')');
+}
+// Fields are described by their label, never by what was typed into them
+const field = /^(INPUT|TEXTAREA|SELECT)$/.test(el.tagName);
+const label = el.labels && el.labels.length ? el.labels[0].innerText : '';
+const text = ((field ? '' : el.innerText) || el.getAttribute('aria-label') || el.getAttribute('placeholder') ||
+              label || el.getAttribute('name') || '');
+const secret = el.type === 'password' ||
+    /(password|one-time-code|cc-number|cc-csc|cc-exp)/.test(el.getAttribute('autocomplete') || '');
+return {selector: parts.join(' > '), text: text.trim().slice(0, 80), secret: secret};
+"""
+
+
+def note_target(driver, element):
+    """Called by action handlers with the element they resolved; a no-op unless recording."""
+    targets = _recording.get()
+    if targets is None:
+        return
+    try:
+        targets.append(driver.execute_script(LOCATOR_SCRIPT, element))
+    except Exception as e:
+        logging.debug(f"Could not describe macro target: {e}")
+
+
+@contextmanager
+def recording():
+    """Collect the targets handlers report while the block runs (per thread/context)."""
+    targets = []
+    token = _recording.set(targets)
+    try:
+        yield targets
+    finally:
+        _recording.reset(token)
+
+
+def page_key(url):
+    """Host and path of a URL, the part a replayed step must land on again."""
+    parsed = urlparse(url or "")
+    return f"{parsed.netloc}{parsed.path}"
+
+
+###############################
+#   Macro Store               #
+###############################
+class MacroStore:
+    """
+    Recorded traces keyed on the normalized command, in memory and in a
+    SQLite file so they survive restarts. Pass path=None for memory only.
+    """
+
+    def __init__(self, path=MACRO_PATH):
+        self.path = path
+        self._memory = {}  # key -> {"steps": [...], "replays": n, "failures": n}
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS macros (key TEXT PRIMARY KEY, steps TEXT NOT NULL, "
+                "created REAL NOT NULL, replays INTEGER NOT NULL DEFAULT 0, failures INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, command):
+        """The recorded steps for the command, or None."""
+        key = normalize_command(command)
+        with self._lock:
+            macro = self._memory.get(key)
+            if macro is None:
+                db = self._connection()
+                row = db.execute("SELECT steps, replays, failures FROM macros WHERE key = ?",
+                                 (key,)).fetchone() if db is not None else None
+                if row is None:
+                    return None
+                macro = self._memory[key] = {"steps": json.loads(row[0]), "replays": row[1], "failures": row[2]}
+            return macro["steps"]
+
+    def put(self, command, steps):
+        """Store (or re-record) the steps for the command, keeping its replay counters."""
+        key = normalize_command(command)
+        with self._lock:
+            previous = self._memory.get(key) or {"replays": 0, "failures": 0}
+            macro = self._memory[key] = {"steps": steps, "replays": previous["replays"],
+                                         "failures": previous["failures"]}
+            db = self._connection()
+            if db is not None:
+                db.execute("INSERT OR REPLACE INTO macros (key, steps, created, replays, failures) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           (key, json.dumps(steps), time.time(), macro["replays"], macro["failures"]))
+                db.commit()
+
+    def mark(self, command, needed_model):
+        """Count a replay, and whether it had to fall back to the model."""
+        key = normalize_command(command)
+        with self._lock:
+            macro = self._memory.get(key)
+            if macro is None:
+                return
+            macro["replays"] += 1
+            macro["failures"] += bool(needed_model)
+            db = self._connection()
+            if db is not None:
+                db.execute("UPDATE macros SET replays = ?, failures = ? WHERE key = ?",
+                           (macro["replays"], macro["failures"], key))
+                db.commit()
+
+    def stats(self, command):
+        """{"replays": n, "failures": n} for a recorded command, or None."""
+        if self.get(command) is None:
+            return None
+        with self._lock:
+            macro = self._memory[normalize_command(command)]
+            return {"replays": macro["replays"], "failures": macro["failures"]}
+
+    def delete(self, command):
+        key = normalize_command(command)
+        with self._lock:
+            self._memory.pop(key, None)
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM macros WHERE key = ?", (key,))
+                db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+macro_store = MacroStore()
+
+
+###############################
+#   Record                    #
+###############################
+def record_step(step, targets, url):
+    """One stored macro step from a plan step that just succeeded (password/card values are not kept)."""
+    target = targets[0] if targets else None
+    parameters = step.parameters
+    if target and target.get("secret") and "value" in parameters:
+        parameters = dict(parameters, value=None)
+    return {"intent": step.intent, "parameters": parameters, "expect": step.expect,
+            "target": target, "page": page_key(url)}
+
+
+def record_plan(command, driver, client=None, on_step=None, done=(), failure=None):
+    """
+    execute_plan, keeping the resolved trace. Returns (PlanResult, steps), where
+    steps are the macro steps of everything that succeeded.
+    """
+    from plan_mode import execute_plan
+
+    recorded = [dict(step) for step in done]
+    with recording() as targets:
+        def observe(step, failure):
+            if not failure:
+                recorded.append(record_step(step, targets, driver.current_url))
+            targets.clear()
+            if on_step:
+                on_step(step, failure)
+
+        result = execute_plan(command, driver, client, on_step=observe,
+                              done=[plan_step(step) for step in done], failure=failure)
+    return result, recorded
+
+
+def plan_step(macro_step):
+    from plan_mode import PlanStep
+
+    return PlanStep(macro_step["intent"], macro_step["parameters"], macro_step.get("expect") or {})
+
+
+###############################
+#   Replay                    #
+###############################
+def locate(driver, step):
+    """
+    The recorded element: (element, None) if it is still there and still
+    reads the same, (None, None) if it is gone, (None, reason) if something
+    else now sits where it was.
+    """
+    from selenium.webdriver.common.by import By
+
+    target = step.get("target")
+    if not target or not target.get("selector"):
+        return None, None
+    elements = driver.find_elements(By.CSS_SELECTOR, target["selector"])
+    if not elements or not elements[0].is_displayed():
+        return None, None
+    found = driver.execute_script(LOCATOR_SCRIPT, elements[0]).get("text")
+    if target.get("text") and found != target["text"]:
+        return None, f"{step['intent']} target is now '{found}' instead of '{target['text']}'"
+    return elements[0], None
+
+
+def act_on(driver, step, element):
+    """Perform a recorded element step directly on the located element."""
+    from selenium.webdriver.common.keys import Keys
+    from page_readiness import POLICIES, current_page, wait_until_ready
+
+    intent, parameters = step["intent"], step["parameters"]
+    policy = intent if intent in POLICIES else "default"
+    if intent in ("click", "play_video"):
+        element.click()
+        wait_until_ready(driver, policy)
+        return
+    element.clear()
+    element.send_keys(parameters.get("value") if intent == "fill_form" else parameters.get("query"))
+    if intent == "search" or parameters.get("submit"):
+        page = current_page(driver)
+        element.send_keys(Keys.RETURN)
+        wait_until_ready(driver, "search", after_page=page)
+
+
+def replay_step(step, driver):
+    """
+    Run one recorded step: on the recorded element when it is still valid,
+    otherwise through the normal handler. Returns a failure reason or None.
+    """
+    from browser_control import ACTION_HANDLERS
+    from page_readiness import POLICIES, wait_until_ready
+    from plan_mode import check_postcondition
+
+    if step["intent"] == "fill_form" and step["parameters"].get("value") is None:
+        return "fill_form value was not stored (password or card field)"
+    element = None
+    if step["intent"] in ELEMENT_INTENTS:
+        try:
+            element, mismatch = locate(driver, step)
+        except Exception as e:
+            element, mismatch = None, None
+            logging.debug(f"Recorded target lookup failed: {e}")
+        if mismatch:
+            return mismatch  # Acting by ID or position now would hit the wrong element
+        if element is None and "element_id" in step["parameters"]:
+            return "recorded element is gone and its digest ID may now be another element"
+    try:
+        if element is not None:
+            act_on(driver, step, element)
+        else:
+            ACTION_HANDLERS[step["intent"]](step["parameters"], driver)
+            wait_until_ready(driver, step["intent"] if step["intent"] in POLICIES else "default")
+    except Exception as e:
+        return f"{step['intent']} raised {e}"
+
+    failure = check_postcondition(driver, step.get("expect"))
+    if failure is None and step.get("page") and page_key(driver.current_url) != step["page"]:
+        failure = f"landed on {page_key(driver.current_url)} instead of {step['page']}"
+    return failure
+
+
+@traced("execute_with_macro")
+def execute_with_macro(command, driver, client=None, on_step=None, store=None):
+    """
+    Run a multi-step command: replay its recorded macro when there is one,
+    otherwise plan it with the model and record the result. If a replayed step
+    fails, the model re-plans from that point and the macro is re-recorded.
+    Returns a PlanResult (model_calls is 0 for a clean replay).
+    """
+    from plan_mode import PlanResult
+
+    store = store or macro_store
+    steps = store.get(command)
+    if steps is None:
+        result, recorded = record_plan(command, driver, client, on_step)
+        annotate(replayed=False)
+        if result.ok:
+            store.put(command, recorded)
+        return result
+
+    start = time.perf_counter()
+    done = []
+    for step in steps:
+        failure = replay_step(step, driver)
+        if on_step:
+            on_step(plan_step(step), failure)
+        if failure:
+            logging.warning(f"Macro step {step['intent']} failed ({failure}); asking the model")
+            break
+        done.append(step)
+    else:
+        store.mark(command, needed_model=False)
+        annotate(replayed=True)
+        return PlanResult(True, [plan_step(s) for s in done], 0, 0, time.perf_counter() - start, None, None)
+
+    result, recorded = record_plan(command, driver, client, on_step, done, failure)
+    store.mark(command, needed_model=True)
+    annotate(replayed=True, fell_back=True)
+    if result.ok:
+        store.put(command, recorded)  # Re-recorded from the point the page changed
+    return result._replace(elapsed=time.perf_counter() - start)
@@ -1,5 +1,10 @@
+from startup import WINDOW_MODULES, timed_import  # First, so the startup clock starts with the process
+
 # import threading
-import gui  # This will launch the GUI
+if __name__ == "__main__":  # OCR pool processes re-import this module under spawn
+    for module in WINDOW_MODULES:
+        timed_import(module)  # Per-subsystem import times for the startup report
+    import gui  # This will launch the GUI
 # from voice_control import listen, speak
 # from browser_control import get_driver, execute_command
 
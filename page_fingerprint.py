@@ -0,0 +1,274 @@
+import base64
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from page_readiness import INSTRUMENT_JS
+from page_snapshot import IMAGE_FORMAT, IMAGE_QUALITY, TARGET_IMAGE_BYTES, encode_image, take_snapshot
+
+###############################
+#   Page Fingerprinting       #
+###############################
+# Before a turn re-captures the page, one cheap script call fingerprints it: the
+# document id and mutation counter from page_readiness (bumped by any child,
+# attribute or text change), the URL, scroll offset and viewport. If that
+# matches the last capture of the tab and nothing on it repaints by itself
+# (canvas, playing video), the cached snapshot is reused: no screenshot, no DOM
+# digest, no re-encode. Otherwise the page is captured, and the screenshot is
+# compared with the cached one tile by tile using perceptual hashes; when only
+# a little changed, just the changed elements and a crop of the changed region
+# are sent.
+MAX_TABS = 8               # Tabs whose last snapshot is kept
+TILE_GRID = 8              # Screenshot split into TILE_GRID x TILE_GRID tiles
+TILE_DISTANCE = 6          # Hamming distance (of 64 bits) above which a tile changed
+DELTA_MAX_AREA = 0.4       # Larger changed regions are sent as a full screenshot
+DELTA_MAX_ELEMENTS = 40    # More changed digest lines than this are sent in full
+
+FINGERPRINT_SCRIPT = INSTRUMENT_JS + """
+const st = window.__pageState;
+return {
+    document: st.id, version: st.version, url: location.href,
+    scroll: [Math.round(window.scrollX), Math.round(window.scrollY)],
+    viewport: [window.innerWidth, window.innerHeight],
+    // Canvases and playing videos repaint without any DOM mutation
+    live: document.getElementsByTagName('canvas').length +
+          Array.from(document.getElementsByTagName('video')).filter(v => !v.paused && !v.ended).length
+};
+"""
+
+
+def average_hash(img, size=8):
+    """64-bit perceptual hash: each bit says whether a cell is brighter than the mean."""
+    pixels = list(img.convert("L").resize((size, size)).getdata())
+    mean = sum(pixels) / len(pixels)
+    bits = 0
+    for value in pixels:
+        bits = (bits << 1) | (value > mean)
+    return bits
+
+
+def tile_hashes(img, grid=TILE_GRID):
+    """average_hash of every tile, row by row, plus the tile boxes."""
+    boxes = []
+    for row in range(grid):
+        for col in range(grid):
+            boxes.append((img.width * col // grid, img.height * row // grid,
+                          img.width * (col + 1) // grid, img.height * (row + 1) // grid))
+    return [average_hash(img.crop(box)) for box in boxes], boxes
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def changed_region(old_hashes, new_hashes, boxes, threshold=TILE_DISTANCE):
+    """Bounding box of the tiles whose hashes moved apart, or None if none did."""
+    changed = [box for old, new, box in zip(old_hashes, new_hashes, boxes) if hamming(old, new) > threshold]
+    if not changed:
+        return None
+    return (min(b[0] for b in changed), min(b[1] for b in changed),
+            max(b[2] for b in changed), max(b[3] for b in changed))
+
+
+def digest_delta(old_digest, new_digest):
+    """(changed or added lines, removed lines) between two digests of the same document."""
+    old = {element["id"]: line for element, line in zip(old_digest.elements, old_digest.text.splitlines())}
+    new = {element["id"]: line for element, line in zip(new_digest.elements, new_digest.text.splitlines())}
+    added = [line for element_id, line in new.items() if old.get(element_id) != line]
+    removed = [line for element_id, line in old.items() if element_id not in new]
+    return added, removed
+
+
+class PageUpdate:
+    """
+    What to send the model about the page this turn.
+
+    status is "new" (first capture of the tab), "changed" (sent in full),
+    "delta" (only changed elements and the changed screenshot region) or
+    "unchanged" (nothing new to send; `snapshot` is the cached one).
+    """
+
+    def __init__(self, status, snapshot, elements, image=None, region=None, timings=None):
+        self.status = status
+        self.snapshot = snapshot    # Full PageSnapshot of the page as it is now
+        self.elements = elements    # Digest text to send: all of it, the delta or ""
+        self.image = image          # Encoded image to send: whole, a crop, or None
+        self.region = region        # (left, top, right, bottom) of a cropped image
+        self.timings = timings or {}
+        self.ocr_text = ""          # Text read from canvases/images (page_ocr), set by the caller
+
+    @property
+    def full(self):
+        return self.status in ("new", "changed")
+
+    @property
+    def text(self):
+        if not self.full:
+            return ""
+        return self.snapshot.text + (f"\nText in images: {self.ocr_text}" if self.ocr_text else "")
+
+    @property
+    def image_base64(self):
+        return base64.b64encode(self.image).decode("utf-8") if self.image else None
+
+    def context(self):
+        """snapshot.context() on a full update, a one-line note otherwise."""
+        if self.full:
+            return self.snapshot.context()
+        header = f"Current Page: {self.snapshot.title}\nURL: {self.snapshot.url}\n"
+        if self.status == "unchanged":
+            return header + "(Unchanged since the previous turn.)"
+        note = "(Changed slightly since the previous turn: the element list shows only changed '+' and removed '-' elements"
+        if self.region:
+            note += f"; the screenshot is the changed region at {self.region} of the page"
+        return header + note + ".)"
+
+    def payload_bytes(self):
+        """Approximate size of what is sent to the model this turn (as PageSnapshot.payload_bytes)."""
+        image_chars = len(self.image) * 4 // 3 if self.image else 0
+        return image_chars + len(self.text.encode("utf-8")) + len(self.elements.encode("utf-8"))
+
+    def capture_seconds(self):
+        return sum(self.timings.values())
+
+
+class TabCache:
+    """Last snapshot sent for one tab, with its fingerprint and screenshot tile hashes."""
+
+    def __init__(self, fingerprint, snapshot, hashes=None):
+        self.fingerprint = fingerprint
+        self.snapshot = snapshot  # After a delta its image is left unencoded (snapshot.pixels)
+        self.hashes = hashes
+
+
+class PageTracker:
+    """Per-tab fingerprints and last snapshots, bounded to MAX_TABS tabs (least recently used out)."""
+
+    def __init__(self, max_tabs=MAX_TABS, image_format=IMAGE_FORMAT, quality=IMAGE_QUALITY,
+                 target_bytes=TARGET_IMAGE_BYTES):
+        self.max_tabs = max_tabs
+        self.image_format = image_format
+        self.quality = quality
+        self.target_bytes = target_bytes
+        self._tabs = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"unchanged": 0, "delta": 0, "changed": 0, "new": 0}
+
+    def tab_key(self, driver):
+        try:
+            handle = driver.current_window_handle
+        except Exception:
+            handle = None
+        return getattr(driver, "session_id", None) or id(driver), handle
+
+    def get(self, key):
+        with self._lock:
+            entry = self._tabs.get(key)
+            if entry is not None:
+                self._tabs.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._tabs[key] = entry
+            self._tabs.move_to_end(key)
+            while len(self._tabs) > self.max_tabs:
+                self._tabs.popitem(last=False)
+
+    def forget(self, driver=None):
+        """Drop one tab's cached snapshot (or every tab's)."""
+        with self._lock:
+            if driver is None:
+                self._tabs.clear()
+            else:
+                self._tabs.pop(self.tab_key(driver), None)
+
+    def fingerprint(self, driver):
+        """One script call: document, mutation version, URL, scroll, viewport and live media count."""
+        return driver.execute_script(FINGERPRINT_SCRIPT) or {}
+
+    def capture(self, driver, include_image=True, full=False):
+        """
+        A PageUpdate for the tab's current page. full=True always sends the whole
+        page (the start of a new conversation) but still skips re-capturing an
+        unchanged page; otherwise the update is relative to the last capture.
+        """
+        key = self.tab_key(driver)
+        cached = self.get(key)
+        timings = {}
+        start = time.perf_counter()
+        fp = self.fingerprint(driver)
+        timings["fingerprint"] = time.perf_counter() - start
+
+        has_image = cached and (cached.snapshot.image or cached.snapshot.pixels)
+        if cached and same_page(cached.fingerprint, fp) and (has_image or not include_image):
+            status = "new" if full else "unchanged"
+            self.count(status)
+            if full:
+                image = self.full_image(cached.snapshot, timings) if include_image else None
+                return PageUpdate(status, cached.snapshot, cached.snapshot.digest.text, image, timings=timings)
+            return PageUpdate(status, cached.snapshot, "", timings=timings)
+
+        snapshot = take_snapshot(driver, include_image=include_image, keep_pixels=include_image)
+        timings.update(snapshot.timings)
+        hashes = image = region = None
+        if include_image:
+            start = time.perf_counter()
+            hashes, boxes = tile_hashes(snapshot.pixels)
+            timings["hash"] = time.perf_counter() - start
+
+        same_document = cached is not None and cached.fingerprint.get("document") == fp.get("document")
+        status = "new" if cached is None or full else "changed"
+        elements = snapshot.digest.text
+        if status == "changed" and same_document:
+            added, removed = digest_delta(cached.snapshot.digest, snapshot.digest)
+            small_dom = len(added) + len(removed) <= min(DELTA_MAX_ELEMENTS, len(snapshot.digest.elements) // 2 + 1)
+            if include_image and cached.hashes and len(cached.hashes) == len(hashes):
+                region = changed_region(cached.hashes, hashes, boxes)
+                area = 0 if region is None else (region[2] - region[0]) * (region[3] - region[1])
+                small_image = area <= DELTA_MAX_AREA * snapshot.pixels.width * snapshot.pixels.height
+            else:
+                small_image = not include_image
+            if small_dom and small_image:
+                status = "delta"
+                elements = "\n".join([f"+ {line}" for line in added] + [f"- {line}" for line in removed])
+
+        if include_image:
+            snapshot.image_format = self.image_format
+            if status != "delta":
+                image = self.full_image(snapshot, timings)
+            elif region:
+                start = time.perf_counter()
+                image = encode_image(snapshot.pixels.crop(region), self.image_format, self.quality, self.target_bytes)
+                timings["encode"] = time.perf_counter() - start
+
+        self.put(key, TabCache(fp, snapshot, hashes))
+        self.count(status)
+        logging.debug(f"Page {status}: {snapshot.url}")
+        return PageUpdate(status, snapshot, elements, image, region, timings)
+
+    def full_image(self, snapshot, timings):
+        """The snapshot's whole screenshot, encoded on first use (a delta turn only encodes its crop)."""
+        if snapshot.image is None and snapshot.pixels is not None:
+            start = time.perf_counter()
+            snapshot.image = encode_image(snapshot.pixels, self.image_format, self.quality, self.target_bytes)
+            snapshot.pixels = None
+            timings["encode"] = time.perf_counter() - start
+        return snapshot.image
+
+    def count(self, status):
+        with self._lock:
+            self.counters[status] += 1
+
+
+PAGE_FIELDS = ("document", "version", "url", "scroll", "viewport")
+
+
+def same_page(old, new):
+    """Nothing the model would see can have changed: no mutation, navigation, scroll or repainting media."""
+    return not new.get("live") and all(old.get(f) == new.get(f) for f in PAGE_FIELDS)
+
+
+# Shared by the turn-by-turn loop and plan mode
+page_tracker = PageTracker()
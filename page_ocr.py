@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from element_index import _normalize, match_score, MIN_SCORE
+from page_fingerprint import PAGE_FIELDS, page_tracker
+from page_snapshot import load_screenshot
+
+###############################
+#   Tiled OCR                 #
+###############################
+# Text drawn in canvases and images never reaches innerText, so the model and
+# the element index cannot see it. The screenshot is cut into horizontal bands
+# (overlapping, so a line of text is always whole in the band that owns it)
+# and the bands are OCR'd in a process pool across cores. Results are cached
+# twice: per band by a hash of its pixels, so after a small change only the
+# changed bands are read again, and per page by its fingerprint
+# (page_fingerprint), so an unchanged page is not even screenshotted.
+OCR_TILE_HEIGHT = 200      # Screenshot pixels each band owns
+OCR_TILE_OVERLAP = 24      # Extra pixels above and below each band
+MIN_CONFIDENCE = 50        # Tesseract word confidence (0-100)
+OCR_TILE_CACHE = 512       # Bands kept by pixel hash
+OCR_PAGE_CACHE = 16        # Pages kept by fingerprint
+OCR_PAGE_SECONDS = 10      # Canvases redraw without touching the DOM, so page results expire
+OCR_MIN_PAGE_TEXT = 200    # Pages with less innerText than this get OCR text in the model context
+MAX_OCR_CHARS = 1500
+
+TextBox = namedtuple("TextBox", ["text", "x", "y", "w", "h", "conf"])  # One line, in CSS pixels
+OcrResult = namedtuple("OcrResult", ["boxes", "tiles", "reused", "elapsed"])
+
+
+def ocr_tile(mode, size, data, min_conf=MIN_CONFIDENCE):
+    """
+    OCR one band (runs in a pool process): [(text, x, y, w, h, conf)] per line,
+    in band pixels.
+    """
+    import pytesseract
+    from PIL import Image
+
+    data = pytesseract.image_to_data(Image.frombytes(mode, size, data), output_type=pytesseract.Output.DICT)
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if not word.strip() or conf < min_conf:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append((word, data["left"][i], data["top"][i],
+                                          data["width"][i], data["height"][i], conf))
+    boxes = []
+    for words in lines.values():
+        left = min(w[1] for w in words)
+        top = min(w[2] for w in words)
+        right = max(w[1] + w[3] for w in words)
+        bottom = max(w[2] + w[4] for w in words)
+        boxes.append((" ".join(w[0] for w in words), left, top, right - left, bottom - top,
+                      sum(w[5] for w in words) / len(words)))
+    return boxes
+
+
+def center(box):
+    return round(box.x + box.w / 2), round(box.y + box.h / 2)
+
+
+def ocr_text(boxes, limit=MAX_OCR_CHARS):
+    """The recognized lines in reading order, as plain text."""
+    lines = sorted(boxes, key=lambda b: (round(b.y / 10), b.x))
+    return "\n".join(box.text for box in lines)[:limit]
+
+
+def find_text(boxes, query):
+    """Best-matching TextBox for a spoken target, or None."""
+    query = _normalize(query)
+    scored = [(match_score(query, box.text), box) for box in boxes]
+    scored = [pair for pair in scored if pair[0] >= MIN_SCORE]
+    return max(scored, key=lambda pair: pair[0])[1] if scored else None
+
+
+class OcrEngine:
+    """Tiled, cached OCR over a process pool (created on first use)."""
+
+    def __init__(self, workers=None, tile_height=OCR_TILE_HEIGHT, overlap=OCR_TILE_OVERLAP):
+        self.workers = workers or os.cpu_count() or 1
+        self.tile_height = tile_height
+        self.overlap = overlap
+        self._pool = None
+        self._tiles = OrderedDict()   # pixel hash -> boxes in band pixels
+        self._pages = OrderedDict()   # fingerprint -> (time, OcrResult)
+        self._lock = threading.Lock()
+
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Not fork: the app process already runs Tk, Selenium and TTS threads
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self._pages.clear()
+
+    def bands(self, height):
+        """(owned top, owned bottom, crop top, crop bottom) for each band."""
+        bands = []
+        for top in range(0, height, self.tile_height):
+            bottom = min(height, top + self.tile_height)
+            bands.append((top, bottom, max(0, top - self.overlap), min(height, bottom + self.overlap)))
+        return bands
+
+    def read_image(self, img, scale=1.0):
+        """OCR a screenshot; boxes are scaled by `scale` (screenshot to CSS pixels)."""
+        start = time.perf_counter()
+        gray = img.convert("L")
+        pending, results, reused = {}, {}, 0
+        bands = self.bands(gray.height)
+        for i, (_, _, crop_top, crop_bottom) in enumerate(bands):
+            crop = gray.crop((0, crop_top, gray.width, crop_bottom))
+            data = crop.tobytes()
+            key = hashlib.blake2b(data, digest_size=16).digest() + repr(crop.size).encode()
+            with self._lock:
+                cached = self._tiles.get(key)
+                if cached is not None:
+                    self._tiles.move_to_end(key)
+            if cached is not None:
+                results[i] = cached
+                reused += 1
+            else:
+                pending[i] = (key, self.pool().submit(ocr_tile, crop.mode, crop.size, data))
+
+        for i, (key, future) in pending.items():
+            results[i] = future.result()
+            with self._lock:
+                self._tiles[key] = results[i]
+                while len(self._tiles) > OCR_TILE_CACHE:
+                    self._tiles.popitem(last=False)
+
+        boxes = []
+        for i, (top, bottom, crop_top, _) in enumerate(bands):
+            for text, x, y, w, h, conf in results[i]:
+                if top <= crop_top + y + h / 2 < bottom:  # The band owning the line's center reports it
+                    boxes.append(TextBox(text, round(x * scale), round((crop_top + y) * scale),
+                                         round(w * scale), round(h * scale), conf))
+        return OcrResult(boxes, len(bands), reused, time.perf_counter() - start)
+
+    def read_page(self, driver):
+        """OCR the current viewport, reusing the result while the page fingerprint is unchanged."""
+        fp = page_tracker.fingerprint(driver)
+        key = tuple(repr(fp.get(f)) for f in PAGE_FIELDS)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached and not fp.get("live") and time.monotonic() - cached[0] < OCR_PAGE_SECONDS:
+                self._pages.move_to_end(key)
+                return cached[1]
+        img = load_screenshot(driver.get_screenshot_as_png(), max_width=None)
+        viewport_width = (fp.get("viewport") or [img.width])[0]
+        result = self.read_image(img, scale=viewport_width / img.width)
+        with self._lock:
+            self._pages[key] = (time.monotonic(), result)
+            while len(self._pages) > OCR_PAGE_CACHE:
+                self._pages.popitem(last=False)
+        logging.info(f"OCR: {len(result.boxes)} lines from {result.tiles} bands "
+                     f"({result.reused} unchanged) in {result.elapsed * 1e3:.0f} ms")
+        return result
+
+
+def image_text(driver, snapshot, min_text=OCR_MIN_PAGE_TEXT):
+    """OCR text for pages whose innerText is too sparse to describe them (canvas/image-heavy), else ""."""
+    if len(snapshot.text) >= min_text:
+        return ""
+    try:
+        return ocr_text(ocr_engine.read_page(driver).boxes)
+    except Exception as e:
+        logging.warning(f"OCR unavailable: {e}")
+        return ""
+
+
+# Shared engine: its caches are what make repeated reads cheap
+ocr_engine = OcrEngine()
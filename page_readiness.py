@@ -0,0 +1,193 @@
+import contextvars
+import logging
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+###############################
+#   Page Readiness Engine     #
+###############################
+# A page counts as settled once document.readyState is far enough along, no
+# fetch/XHR requests are in flight and the DOM has been quiet for a while.
+# Every action waits on its own policy instead of a fixed sleep.
+
+ReadinessPolicy = namedtuple("ReadinessPolicy", ["ready_state", "quiet_ms", "max_inflight", "timeout"])
+ReadinessResult = namedtuple("ReadinessResult", ["ready", "elapsed", "state"])
+
+POLICIES = {
+    "default": ReadinessPolicy("interactive", 300, 0, 10),
+    "open": ReadinessPolicy("interactive", 400, 0, 15),
+    "search": ReadinessPolicy("interactive", 400, 0, 15),
+    "search_amazon": ReadinessPolicy("interactive", 500, 0, 15),
+    "click": ReadinessPolicy("interactive", 250, 0, 8),
+    "play_video": ReadinessPolicy("interactive", 300, 1, 8),  # Video pages keep streaming
+    "snapshot": ReadinessPolicy("interactive", 200, 1, 5),
+}
+POLL_INTERVAL = 0.05
+READY_STATES = {"loading": 0, "interactive": 1, "complete": 2}
+
+# Optional url -> url mapping applied to every navigation (batch_runner.py uses
+# it to send real site URLs to local fixture servers)
+url_rewriter = None
+
+# Counts in-flight fetch/XHR requests and DOM mutations. Idempotent per document.
+INSTRUMENT_JS = """
+(function () {
+    if (window.__pageState) return;
+    const st = window.__pageState = {
+        id: Math.random().toString(36).slice(2), inflight: 0, version: 0,
+        lastActivity: performance.now()
+    };
+    const begin = () => { st.inflight++; st.lastActivity = performance.now(); };
+    const end = () => { st.inflight = Math.max(0, st.inflight - 1); st.lastActivity = performance.now(); };
+    if (window.fetch) {
+        const fetch = window.fetch;
+        window.fetch = function () {
+            begin();
+            return fetch.apply(this, arguments).finally(end);
+        };
+    }
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        begin();
+        this.addEventListener('loadend', end, {once: true});
+        return send.apply(this, arguments);
+    };
+    const observe = () => new MutationObserver(() => {
+        st.version++;
+        st.lastActivity = performance.now();
+    }).observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+    if (document.documentElement) observe();
+    else document.addEventListener('readystatechange', observe, {once: true});
+})();
+"""
+
+STATUS_SCRIPT = INSTRUMENT_JS + """
+const st = window.__pageState;
+return {
+    document: st.id,
+    ready_state: document.readyState,
+    inflight: st.inflight,
+    quiet_ms: performance.now() - st.lastActivity,
+    version: st.version,
+    url: location.href
+};
+"""
+
+
+def install(driver):
+    """
+    Register the instrumentation to run at the start of every new document, so
+    requests fired during page load are counted too (Chrome only; elsewhere it
+    is injected on first poll).
+    """
+    if getattr(driver, "_readiness_installed", False):
+        return
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": INSTRUMENT_JS})
+    except Exception as e:
+        logging.debug(f"Readiness instrumentation falls back to on-demand injection: {e}")
+    driver._readiness_installed = True
+
+
+def page_state(driver):
+    """Current readiness state of the page (installs instrumentation if needed)."""
+    return driver.execute_script(STATUS_SCRIPT)
+
+
+def current_page(driver):
+    """
+    (document id, URL) of the current page. The document id changes on every
+    full navigation and the URL on in-app (pushState) navigation.
+    """
+    try:
+        state = page_state(driver)
+        return state["document"], state["url"]
+    except Exception:
+        return None
+
+
+###############################
+#   Cancellation              #
+###############################
+# Actions run inside cancellable(event); once the event is set, the next
+# readiness poll stops the page load (window.stop()) and raises
+# ActionCancelled on the thread that owns the driver. It derives from
+# BaseException so handlers' `except Exception` blocks don't swallow it.
+_cancel_event = contextvars.ContextVar("action_cancel_event", default=None)
+
+
+class ActionCancelled(BaseException):
+    """The browser action was cancelled (e.g. the user said "stop")."""
+
+
+@contextmanager
+def cancellable(event):
+    """Make browser actions in this block (and in threads started via tracing.bind) cancellable."""
+    token = _cancel_event.set(event)
+    try:
+        yield event
+    finally:
+        _cancel_event.reset(token)
+
+
+def check_cancelled(driver=None):
+    """Raise ActionCancelled if the current action was cancelled, stopping the page load first."""
+    event = _cancel_event.get()
+    if event is None or not event.is_set():
+        return
+    if driver is not None:
+        try:
+            driver.execute_script("window.stop();")
+        except Exception as e:
+            logging.debug(f"window.stop() failed: {e}")
+    raise ActionCancelled()
+
+
+def navigate(driver, url, policy="open"):
+    """
+    driver.get(url) that can be cancelled: the navigation starts from script
+    and the wait for the new document is a (cancellable) readiness poll.
+    """
+    check_cancelled()
+    if url_rewriter is not None:
+        url = url_rewriter(url)
+    page = current_page(driver)
+    if page is None:
+        driver.get(url)  # No scriptable document yet (e.g. a crashed tab)
+        return wait_until_ready(driver, policy)
+    driver.execute_script("window.location.assign(arguments[0]);", url)
+    return wait_until_ready(driver, policy, after_page=page)
+
+
+def wait_until_ready(driver, policy="default", after_page=None):
+    """
+    Poll until the page satisfies `policy` (a POLICIES key or ReadinessPolicy).
+    With after_page (from current_page), also wait for the browser to leave that
+    page, for actions such as pressing Enter in a search box that navigate
+    asynchronously. Never raises on timeout; returns ready=False instead.
+    Raises ActionCancelled if the surrounding cancellable() scope is cancelled.
+    """
+    if isinstance(policy, str):
+        policy = POLICIES.get(policy, POLICIES["default"])
+    install(driver)
+    start = time.perf_counter()
+    deadline = start + policy.timeout
+    state = None
+    while True:
+        check_cancelled(driver)
+        try:
+            state = page_state(driver)
+        except Exception:
+            state = None  # Mid-navigation: the old document is gone
+        if state is not None and (
+            READY_STATES.get(state["ready_state"], 0) >= READY_STATES[policy.ready_state]
+            and state["inflight"] <= policy.max_inflight
+            and state["quiet_ms"] >= policy.quiet_ms
+            and (after_page is None or (state["document"], state["url"]) != tuple(after_page))
+        ):
+            return ReadinessResult(True, time.perf_counter() - start, state)
+        if time.perf_counter() >= deadline:
+            logging.warning(f"Page not settled after {policy.timeout}s: {state}")
+            return ReadinessResult(False, time.perf_counter() - start, state)
+        time.sleep(POLL_INTERVAL)
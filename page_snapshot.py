@@ -0,0 +1,130 @@
+import base64
+import io
+import time
+
+from PIL import Image
+
+from dom_digest import COLLECT_ELEMENTS_JS, MAX_ELEMENTS, TOKEN_BUDGET, distill
+
+###############################
+#    Snapshot Configuration   #
+###############################
+MAX_IMAGE_WIDTH = 1024     # Screenshots are downscaled to this width before sending
+IMAGE_FORMAT = "JPEG"      # JPEG or WEBP; PNG keeps the lossless original
+IMAGE_QUALITY = 70
+TARGET_IMAGE_BYTES = 150_000  # Quality is stepped down until the image fits
+MAX_TEXT_CHARS = 2000
+
+# URL, title, visible text and the DOM digest elements in ONE WebDriver round trip
+SNAPSHOT_SCRIPT = COLLECT_ELEMENTS_JS + """
+const maxText = arguments[0];
+const body = document.body;
+return {
+    url: location.href,
+    title: document.title,
+    text: body ? body.innerText.replace(/\\s+/g, ' ').trim().slice(0, maxText) : '',
+    elements: collectElements(arguments[1])
+};
+"""
+
+
+class PageSnapshot:
+    """Everything the interpreter needs about the current page, held in memory."""
+
+    def __init__(self, url, title, text, digest, image=None, image_format=None, timings=None, pixels=None):
+        self.url = url
+        self.title = title
+        self.text = text
+        self.digest = digest              # dom_digest.DomDigest
+        self.image = image                # Encoded image bytes (None if not captured)
+        self.image_format = image_format
+        self.timings = timings or {}      # Seconds spent per capture step
+        self.pixels = pixels              # Downscaled PIL image, kept only with keep_pixels=True
+
+    @property
+    def image_base64(self):
+        return base64.b64encode(self.image).decode("utf-8") if self.image else None
+
+    def context(self):
+        """Same text format as browser_control.get_browser_context."""
+        return f"Current Page: {self.title}\nURL: {self.url}\nVisible Text: {self.text[:500]}"
+
+    def payload_bytes(self):
+        """Approximate size of what is sent to the model for this page."""
+        image_chars = len(self.image) * 4 // 3 if self.image else 0
+        return image_chars + len(self.text.encode("utf-8")) + len(self.digest.text.encode("utf-8"))
+
+
+def encode_screenshot(png_bytes, max_width=MAX_IMAGE_WIDTH, image_format=IMAGE_FORMAT,
+                      quality=IMAGE_QUALITY, target_bytes=TARGET_IMAGE_BYTES):
+    """
+    Downscale a PNG screenshot and re-encode it as JPEG/WebP, lowering the
+    quality in steps until it fits in `target_bytes` (or quality bottoms out).
+    """
+    if image_format.upper() == "PNG" and not max_width:
+        return png_bytes
+    return encode_image(load_screenshot(png_bytes, max_width), image_format, quality, target_bytes)
+
+
+def load_screenshot(png_bytes, max_width=MAX_IMAGE_WIDTH):
+    """Decode a PNG screenshot into a PIL image, downscaled to max_width."""
+    img = Image.open(io.BytesIO(png_bytes))
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+    return img
+
+
+def encode_image(img, image_format=IMAGE_FORMAT, quality=IMAGE_QUALITY, target_bytes=TARGET_IMAGE_BYTES):
+    """Encode a PIL image (a whole screenshot or a region of one) within target_bytes."""
+    if image_format.upper() in ("JPEG", "JPG"):
+        img = img.convert("RGB")
+
+    while True:
+        out = io.BytesIO()
+        img.save(out, format=image_format, quality=quality, optimize=True)
+        data = out.getvalue()
+        if not target_bytes or len(data) <= target_bytes or quality <= 30:
+            return data
+        quality -= 10
+
+
+def take_snapshot(driver, include_image=True, max_width=MAX_IMAGE_WIDTH, image_format=IMAGE_FORMAT,
+                  quality=IMAGE_QUALITY, target_bytes=TARGET_IMAGE_BYTES, max_text=MAX_TEXT_CHARS,
+                  token_budget=TOKEN_BUDGET, keep_pixels=False):
+    """
+    Capture the page once, entirely in memory: one execute_script call for the
+    DOM-side data and (optionally) one screenshot, downscaled and re-encoded.
+    keep_pixels=True keeps the downscaled screenshot as a PIL image and leaves
+    encoding to the caller (page_fingerprint encodes only what changed).
+    """
+    timings = {}
+    start = time.perf_counter()
+    data = driver.execute_script(SNAPSHOT_SCRIPT, max_text, MAX_ELEMENTS) or {}
+    timings["dom"] = time.perf_counter() - start
+    start = time.perf_counter()
+    digest = distill(data.get("elements") or [], token_budget)
+    timings["distill"] = time.perf_counter() - start
+
+    image = pixels = None
+    if include_image:
+        start = time.perf_counter()
+        png = driver.get_screenshot_as_png()
+        timings["screenshot"] = time.perf_counter() - start
+        start = time.perf_counter()
+        if keep_pixels:
+            pixels = load_screenshot(png, max_width)
+            timings["decode"] = time.perf_counter() - start
+        else:
+            image = encode_screenshot(png, max_width, image_format, quality, target_bytes)
+            timings["encode"] = time.perf_counter() - start
+
+    return PageSnapshot(
+        url=data.get("url", ""),
+        title=data.get("title", ""),
+        text=data.get("text", ""),
+        digest=digest,
+        image=image,
+        image_format=image_format if include_image else None,
+        timings=timings,
+        pixels=pixels,
+    )
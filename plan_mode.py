@@ -0,0 +1,205 @@
+import json
+import logging
+import re
+import time
+from collections import namedtuple
+
+from page_readiness import POLICIES, wait_until_ready
+from llm_client import llm_client
+
+###############################
+#   Multi-Step Plan Mode      #
+###############################
+# One model call turns a compound command ("open Amazon and search crossbody
+# bags under $50") into an ordered list of ACTION_HANDLERS steps, each with an
+# optional postcondition. The executor runs the steps with a readiness wait in
+# between and only calls the model again when a step fails its postcondition.
+# browser_control (Selenium) and the page capture modules are imported on first
+# use, since the GUI imports is_multi_step while its window is coming up.
+
+PLAN_MODEL = "gpt-4o"   # Needs JSON mode
+MAX_REPLANS = 2
+MAX_STEPS = 8
+
+PlanStep = namedtuple("PlanStep", ["intent", "parameters", "expect"])
+PlanResult = namedtuple("PlanResult", ["ok", "steps", "model_calls", "replans", "elapsed", "question", "error"])
+
+# "open amazon and search ...", "search cocomelon then play the second video"
+MULTI_STEP = re.compile(
+    r"\b(?:and|then|and then|after that)\s+(?:open|go|search|play|click|pause|fill|type|enter|scroll|add)\b",
+    re.IGNORECASE,
+)
+
+PAGE_STATE_SCRIPT = """
+return {url: location.href, title: document.title,
+        text: document.body ? document.body.innerText.slice(0, 20000) : ''};
+"""
+
+PLAN_INSTRUCTIONS = """
+You are an AI assistant that turns one voice command into the complete sequence of browser actions needed to carry it out.
+
+Available intents and their parameters:
+- open: {"url": "https://..."}
+- click: {"element_id": <id from the element list>} or {"element_text": "visible text"}
+- scroll: {"direction": "up" | "down", "distance": <pixels>}
+- fill_form: {"field": "name, label or placeholder", "value": "...", "submit": true | false}
+- search: {"query": "..."}  (searches the current site: Amazon, YouTube or Google; YouTube's search box elsewhere)
+- play_video: {"video_index": <1-based index in YouTube results>}
+- pause_video: {}
+- open_cheapest: {"max_price": <number or null>}  (lowest-priced result on the current results page)
+- next_page: {}  (next page of results)
+
+Give every step an "expect" postcondition that can be checked right after it,
+using any of "url_contains", "title_contains" or "text_contains" (omit it if nothing reliable is visible).
+Prefer URLs that go straight to the result (e.g. https://www.amazon.com/s?k=crossbody+bags&rh=p_36%3A-5000 for "under $50").
+
+Reply with JSON only:
+{"steps": [{"intent": "...", "parameters": {...}, "expect": {...}}]}
+or, if the command cannot be done without more information:
+{"missing_info": true, "question": "..."}
+"""
+
+
+def is_multi_step(command):
+    """True for compound commands that need more than one action."""
+    return bool(MULTI_STEP.search(command or ""))
+
+
+def build_plan_messages(command, context="", elements="", done=(), failure=None):
+    """Chat messages asking for a plan, or for the remaining steps after a failure."""
+    prompt = PLAN_INSTRUCTIONS + f"""
+    Current page: {context}
+    Actionable elements:
+    {elements}
+    """
+    if failure is not None:
+        completed = "\n".join(f"- {step.intent} {json.dumps(step.parameters)}" for step in done) or "- none"
+        prompt += f"""
+    Steps already completed:
+    {completed}
+    The next step failed: {failure}
+    Reply with the remaining steps, starting from the current page.
+    """
+    prompt += f"""
+    User Command: "{command}"
+    AI Response:
+    """
+    return [
+        {"role": "system", "content": "You are a helpful assistant that replies in JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_plan(text):
+    """
+    Turn the model's JSON reply into ([PlanStep], question). Unknown intents are
+    dropped; raises ValueError if the reply is not a usable plan.
+    """
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", (text or "").strip())
+    try:
+        data = json.loads(text)
+    except ValueError:
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if not match:
+            raise ValueError(f"Plan is not JSON: {text[:200]}")
+        data = json.loads(match.group(0))
+
+    if data.get("missing_info"):
+        return [], data.get("question") or "Could you give me more details?"
+
+    from browser_control import ACTION_HANDLERS
+
+    steps = []
+    for raw in data.get("steps", [])[:MAX_STEPS]:
+        intent = raw.get("intent")
+        if intent not in ACTION_HANDLERS:
+            logging.warning(f"Dropping plan step with unknown intent: {raw}")
+            continue
+        steps.append(PlanStep(intent, raw.get("parameters") or {}, raw.get("expect") or {}))
+    if not steps:
+        raise ValueError(f"Plan has no executable steps: {text[:200]}")
+    return steps, None
+
+
+def request_plan(command, driver, client=None, done=(), failure=None):
+    """One model call: a plan for `command` given what is on the page now."""
+    from page_fingerprint import page_tracker
+    from page_ocr import image_text
+
+    snapshot = page_tracker.capture(driver, include_image=False, full=True).snapshot  # Reused if unchanged
+    context = snapshot.context()
+    ocr = image_text(driver, snapshot)
+    if ocr:
+        context += f"\nText in images: {ocr}"
+    client = client or llm_client
+    response = client.chat.completions.create(
+        model=PLAN_MODEL,
+        messages=build_plan_messages(command, context, snapshot.digest.text, done, failure),
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+    reply = response.choices[0].message.content.strip()
+    logging.info(f"AI Plan: {reply}")
+    return parse_plan(reply)
+
+
+def check_postcondition(driver, expect):
+    """None if the page satisfies `expect`, otherwise a short reason."""
+    if not expect:
+        return None
+    state = driver.execute_script(PAGE_STATE_SCRIPT)
+    checks = (("url_contains", "url", "URL"), ("title_contains", "title", "title"), ("text_contains", "text", "page"))
+    for key, field, label in checks:
+        wanted = expect.get(key)
+        if wanted and str(wanted).lower() not in (state.get(field) or "").lower():
+            return f"{label} does not contain '{wanted}' (url is {state.get('url')})"
+    return None
+
+
+def run_step(step, driver):
+    """Run one step and wait for the page to settle; returns a failure reason or None."""
+    from browser_control import ACTION_HANDLERS
+
+    try:
+        ACTION_HANDLERS[step.intent](step.parameters, driver)
+    except Exception as e:
+        return f"{step.intent} raised {e}"
+    wait_until_ready(driver, step.intent if step.intent in POLICIES else "default")
+    return check_postcondition(driver, step.expect)
+
+
+def execute_plan(command, driver, client=None, max_replans=MAX_REPLANS, on_step=None, done=(), failure=None):
+    """
+    Plan `command` with one model call and run it. The model is consulted
+    again only when a step raises or misses its postcondition (at most
+    max_replans times). `on_step(step, failure)` is called after each step.
+    Passing the PlanSteps already `done` and the `failure` that stopped them
+    starts with a re-plan of the remaining steps instead.
+    """
+    start = time.perf_counter()
+    done, model_calls, replans = list(done), 0, 0
+    try:
+        steps, question = request_plan(command, driver, client, done, failure)
+        model_calls += 1
+        while question is None:
+            for step in steps:
+                failure = run_step(step, driver)
+                if on_step:
+                    on_step(step, failure)
+                if failure:
+                    logging.warning(f"Plan step {step.intent} failed: {failure}")
+                    break
+                done.append(step)
+            else:
+                return PlanResult(True, done, model_calls, replans, time.perf_counter() - start, None, None)
+
+            if replans >= max_replans:
+                break
+            replans += 1
+            steps, question = request_plan(command, driver, client, done, failure)
+            model_calls += 1
+    except Exception as e:
+        failure = str(e)
+        question = None
+    return PlanResult(False, done, model_calls, replans, time.perf_counter() - start, question,
+                      None if question else failure)
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from browser_lifecycle import BrowserManager
+
+###############################
+#   Browser Session Pool      #
+###############################
+# Each session is its own WebDriver (commands to one session are serialized
+# by WebDriver anyway). A lease holds the session's lock for the duration of a
+# handle_* call, and the scheduler routes work to the session already on the
+# action's site, so "search Amazon" and "open YouTube" can run side by side.
+
+POOL_SIZE = 2
+CURRENT = "current"   # Route to whichever session the user last interacted with
+
+
+def domain_of(url):
+    """'https://www.amazon.com/s?k=x' -> 'amazon.com'."""
+    host = urlparse(url or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host or None
+
+
+def action_domain(action):
+    """Which site an action string belongs to (CURRENT when it depends on context)."""
+    if action.startswith("open "):
+        url = action[len("open "):].strip()
+        return domain_of(url if url.startswith("http") else "https://" + url)
+    if action.startswith("search_amazon "):
+        return "amazon.com"
+    return CURRENT  # play/pause, cheapest, next page: whatever results page the user is on
+
+
+class Session:
+    """One browser session plus the scheduling state the pool keeps for it."""
+
+    def __init__(self, name, manager):
+        self.name = name
+        self.manager = manager
+        self.lock = threading.Lock()
+        self.domain = None
+        self.busy = False
+        self.waiting = 0
+        self.last_used = 0.0
+
+    @property
+    def driver(self):
+        return self.manager.get()  # Health-checked; restarts a crashed session
+
+    def __repr__(self):
+        return f"<Session {self.name} {self.domain or '-'}{' busy' if self.busy else ''}>"
+
+
+class SessionPool:
+    """
+    Hands out leases on browser sessions. New sessions are launched on demand
+    (up to max_sessions) when every existing one is busy.
+    """
+
+    def __init__(self, managers=None, max_sessions=POOL_SIZE, manager_factory=BrowserManager):
+        self.max_sessions = max_sessions
+        self.manager_factory = manager_factory
+        self.sessions = [Session(f"s{i}", m) for i, m in enumerate(managers or [])]
+        self._cond = threading.Condition()
+        self._last = None
+        self._executor = ThreadPoolExecutor(max_workers=max_sessions * 2, thread_name_prefix="session")
+
+    def _choose(self, domain):
+        """Pick a session for `domain`; must be called with self._cond held."""
+        if domain == CURRENT:
+            if self._last is not None:
+                return self._last
+            domain = None
+        if domain is not None:
+            affine = [s for s in self.sessions if s.domain == domain]
+            if affine:
+                return min(affine, key=lambda s: s.busy + s.waiting)
+        idle = [s for s in self.sessions if not s.busy and not s.waiting]
+        if idle:
+            return min(idle, key=lambda s: s.last_used)
+        if len(self.sessions) < self.max_sessions:
+            session = Session(f"s{len(self.sessions)}", self.manager_factory())
+            self.sessions.append(session)
+            logging.info(f"Session pool grew to {len(self.sessions)} sessions")
+            return session
+        return min(self.sessions, key=lambda s: s.busy + s.waiting)
+
+    @contextmanager
+    def lease(self, domain=None, timeout=None):
+        """
+        Exclusive use of one session: `with pool.lease("amazon.com") as s: s.driver...`
+        domain=None takes any free session, CURRENT the last-used one.
+        """
+        with self._cond:
+            session = self._choose(domain)
+            session.waiting += 1
+            if domain not in (None, CURRENT):
+                session.domain = domain  # Claim it now so follow-up actions queue here
+        acquired = session.lock.acquire(timeout=-1 if timeout is None else timeout)
+        with self._cond:
+            session.waiting -= 1
+            if not acquired:
+                raise TimeoutError(f"No browser session free for {domain or 'any site'}")
+            session.busy = True
+            self._last = session
+        try:
+            yield session
+        finally:
+            try:
+                session.domain = domain_of(session.manager.driver.current_url) or session.domain
+            except Exception:
+                pass
+            with self._cond:
+                session.busy = False
+                session.last_used = time.monotonic()
+                session.lock.release()
+                self._cond.notify_all()
+
+    def submit(self, fn, *args, domain=None):
+        """Run fn(driver, *args) on a leased session in the background; returns a Future."""
+        def run():
+            with self.lease(domain) as session:
+                return fn(session.driver, *args)
+        return self._executor.submit(run)
+
+    def stats(self):
+        with self._cond:
+            return [{"name": s.name, "domain": s.domain, "busy": s.busy, "waiting": s.waiting}
+                    for s in self.sessions]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+        for session in self.sessions:
+            session.manager.shutdown()
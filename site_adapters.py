@@ -0,0 +1,210 @@
+import logging
+import re
+import threading
+from collections import namedtuple
+from urllib.parse import parse_qs, quote_plus, urlencode, urlparse, urlunparse
+
+from page_readiness import navigate, page_state
+from session_pool import domain_of
+
+###############################
+#   Site Adapters             #
+###############################
+# Each supported site declares how to build its search, filter and next-page
+# URLs and one script that pulls every result off a results page in a single
+# round trip. Commands such as "play video 3" or "cheapest under $50" are then
+# answered from that list (cached per page) instead of repeated DOM queries,
+# and the next results page is prefetched by the browser in the background.
+RESULTS_CACHE_SIZE = 8    # Extracted result pages kept per adapter
+
+SearchResult = namedtuple("SearchResult", ["index", "title", "price", "link"])
+
+PREFETCH_SCRIPT = """
+if (!document.querySelector('link[rel=prefetch][href="' + arguments[0] + '"]')) {
+    const link = document.createElement('link');
+    link.rel = 'prefetch';
+    link.href = arguments[0];
+    document.head.appendChild(link);
+}
+"""
+
+
+def parse_price(text):
+    """'$1,234.50' -> 1234.5; None when there is no price."""
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", text or "")
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+class SiteAdapter:
+    """
+    Base adapter. Subclasses set the domains they handle, a base URL, a
+    search path and query parameter, optional filter and page parameters,
+    and RESULTS_SCRIPT returning [{title, price, link}, ...].
+    """
+    name = None
+    domains = ()
+    base_url = None
+    search_path = None
+    query_param = None
+    page_param = None          # Query parameter holding the page (or offset) number
+    page_step = 1              # Google counts results (start=10), not pages
+    ready_policy = "search"
+    RESULTS_SCRIPT = None
+
+    def __init__(self, base_url=None):
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        self._results = {}  # (document id, URL, DOM version) -> [SearchResult]
+        self._lock = threading.Lock()  # Adapters are shared by every session's worker thread
+
+    def matches(self, url):
+        domain = domain_of(url)
+        return bool(domain) and any(domain == d or domain.endswith("." + d) for d in self.domains)
+
+    def filters(self, max_price=None):
+        """Extra query parameters for the supported filters."""
+        return {}
+
+    def search_url(self, query, max_price=None, page=1):
+        params = {self.query_param: query}
+        params.update(self.filters(max_price=max_price))
+        if page > 1 and self.page_param:
+            params[self.page_param] = page if self.page_step == 1 else (page - 1) * self.page_step
+        return f"{self.base_url}{self.search_path}?{urlencode(params, quote_via=quote_plus)}"
+
+    def next_page_url(self, url):
+        """The URL of the results page after `url`, or None if the site has no page parameter."""
+        if not self.page_param:
+            return None
+        parsed = urlparse(url)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        current = int(params.get(self.page_param, 1 if self.page_step == 1 else 0))
+        params[self.page_param] = current + self.page_step
+        return urlunparse(parsed._replace(query=urlencode(params, quote_via=quote_plus)))
+
+    def search(self, driver, query, max_price=None):
+        """Load the results page for `query` directly and prefetch the page after it."""
+        url = self.search_url(query, max_price=max_price)
+        logging.info(f"🌐 {self.name}: {url}")
+        navigate(driver, url, self.ready_policy)
+        self.prefetch_next(driver)
+        return url
+
+    def prefetch_next(self, driver):
+        """Have the browser fetch the next results page into its cache while the user reads this one."""
+        url = self.next_page_url(driver.current_url)
+        if url:
+            try:
+                driver.execute_script(PREFETCH_SCRIPT, url)
+            except Exception as e:
+                logging.debug(f"Prefetch of {url} failed: {e}")
+        return url
+
+    def next_page(self, driver):
+        url = self.next_page_url(driver.current_url)
+        if url is None:
+            raise ValueError(f"{self.name} has no next page")
+        navigate(driver, url, self.ready_policy)
+        self.prefetch_next(driver)
+        return url
+
+    def extract(self, driver):
+        """Every result on the current page, from one script call (cached until the page or its DOM changes)."""
+        try:
+            state = page_state(driver)
+            page = state["document"], state["url"], state["version"]  # Lazy/infinite-scroll results bump version
+        except Exception:
+            page = None
+        if page is not None:
+            with self._lock:
+                cached = self._results.get(page)
+            if cached is not None:
+                return cached
+        raw = driver.execute_script(self.RESULTS_SCRIPT) or []
+        results = [SearchResult(i, r.get("title") or "", parse_price(r.get("price")), r["link"])
+                   for i, r in enumerate((r for r in raw if r.get("link")), 1)]
+        if page is not None and results:  # Not rendered yet is not the same as no results
+            with self._lock:
+                self._results[page] = results
+                while len(self._results) > RESULTS_CACHE_SIZE:
+                    self._results.pop(next(iter(self._results)))
+        return results
+
+    def result(self, driver, index):
+        """The index-th (1-based) result on the current page, or None."""
+        results = self.extract(driver)
+        return results[index - 1] if 0 < index <= len(results) else None
+
+    def cheapest(self, driver, max_price=None):
+        """The lowest-priced result on the current page (at most max_price), or None."""
+        priced = [r for r in self.extract(driver)
+                  if r.price is not None and (max_price is None or r.price <= max_price)]
+        return min(priced, key=lambda r: r.price) if priced else None
+
+
+class AmazonAdapter(SiteAdapter):
+    name = "amazon"
+    domains = ("amazon.com",)
+    base_url = "https://www.amazon.com"
+    search_path = "/s"
+    query_param = "k"
+    page_param = "page"
+    ready_policy = "search_amazon"
+    RESULTS_SCRIPT = """
+    return Array.from(document.querySelectorAll('[data-component-type="s-search-result"]')).map(el => {
+        const link = el.querySelector('h2 a, a.s-link-style');
+        const price = el.querySelector('.a-price .a-offscreen');
+        const title = el.querySelector('h2');
+        return {title: title ? title.innerText.trim() : '', price: price ? price.textContent : null,
+                link: link ? link.href : null};
+    });
+    """
+
+    def filters(self, max_price=None):
+        # rh=p_36:-5000 is Amazon's "up to $50.00" price refinement (in cents)
+        return {"rh": f"p_36:-{int(max_price * 100)}"} if max_price else {}
+
+
+class YouTubeAdapter(SiteAdapter):
+    name = "youtube"
+    domains = ("youtube.com",)
+    base_url = "https://www.youtube.com"
+    search_path = "/results"
+    query_param = "search_query"
+    RESULTS_SCRIPT = """
+    return Array.from(document.querySelectorAll('ytd-video-renderer a#video-title')).map(a => ({
+        title: (a.getAttribute('title') || a.textContent).trim(), price: null, link: a.href
+    }));
+    """
+
+
+class GoogleAdapter(SiteAdapter):
+    name = "google"
+    domains = ("google.com",)
+    base_url = "https://www.google.com"
+    search_path = "/search"
+    query_param = "q"
+    page_param = "start"
+    page_step = 10
+    RESULTS_SCRIPT = """
+    return Array.from(document.querySelectorAll('#search .g')).map(el => {
+        const link = el.querySelector('a[href]');
+        const title = el.querySelector('h3');
+        return {title: title ? title.innerText.trim() : '', price: null, link: link ? link.href : null};
+    });
+    """
+
+
+ADAPTERS = {adapter.name: adapter for adapter in (AmazonAdapter(), YouTubeAdapter(), GoogleAdapter())}
+
+
+def get_adapter(name):
+    return ADAPTERS[name]
+
+
+def adapter_for(url):
+    """The adapter for the site `url` is on, or None."""
+    for adapter in ADAPTERS.values():
+        if adapter.matches(url):
+            return adapter
+    return None
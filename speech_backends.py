@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from config import DATA_DIR
+from audio_capture import FRAME_LENGTH, SAMPLE_RATE
+
+###############################
+#   Speech Recognizer Config  #
+###############################
+# listen() talks to a backend through start(sample_rate) -> session, then
+# session.feed(frame) for every captured frame and session.finish() for the
+# final transcript. Batch backends (Google) only do work in finish(); streaming
+# backends (Vosk, offline and CPU-only) decode while the user is speaking and
+# report partial transcripts from feed().
+STT_BACKEND = os.environ.get("BROWSER_LLM_STT", "google")  # "google" or "vosk"
+VOSK_MODEL_PATH = os.path.join(DATA_DIR, "vosk-model-small-en-us-0.15")
+STABLE_SECONDS = 0.4   # A partial unchanged for this much audio counts as stable
+
+# text: best transcript so far; stable: text once it has held for STABLE_SECONDS, else ""
+Partial = namedtuple("Partial", ["text", "stable"])
+
+
+class StabilityTracker:
+    """Reports a partial transcript as stable once it stops changing for hold_seconds of audio."""
+
+    def __init__(self, hold_seconds=STABLE_SECONDS, frame_seconds=FRAME_LENGTH / SAMPLE_RATE):
+        self.hold_frames = max(1, round(hold_seconds / frame_seconds))
+        self.text = ""
+        self.unchanged = 0
+
+    def update(self, text):
+        """Feed the partial for one frame; returns it if stable, otherwise ""."""
+        text = text.strip()
+        if text != self.text:
+            self.text = text
+            self.unchanged = 0
+        else:
+            self.unchanged += 1
+        return text if text and self.unchanged >= self.hold_frames else ""
+
+
+###############################
+#   Batch Backend (Google)    #
+###############################
+class BatchSession:
+    """Buffers the utterance and transcribes it in one go at the end."""
+
+    def __init__(self, backend, sample_rate):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.frames = []
+
+    def feed(self, frame):
+        self.frames.append(frame)
+        return None
+
+    def finish(self):
+        return self.backend.transcribe(b"".join(self.frames), self.sample_rate)
+
+
+class GoogleBackend:
+    """
+    The original network recognizer. Raises sr.UnknownValueError and
+    sr.RequestError like recognize_google; `recognizer` is anything with a
+    recognize_google method (defaults to sr.Recognizer()).
+    """
+    name = "google"
+    streaming = False
+
+    def __init__(self, recognizer=None):
+        if recognizer is None:
+            import speech_recognition as sr  # Not needed until the first command
+
+            recognizer = sr.Recognizer()
+        self.recognizer = recognizer
+
+    def start(self, sample_rate=SAMPLE_RATE):
+        return BatchSession(self, sample_rate)
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        import speech_recognition as sr
+
+        return self.recognizer.recognize_google(sr.AudioData(pcm, sample_rate, 2))
+
+
+###############################
+#   Streaming Backend (Vosk)  #
+###############################
+class VoskSession:
+    """Decodes frame by frame; feed() returns a Partial after every frame."""
+
+    def __init__(self, recognizer, hold_seconds=STABLE_SECONDS, frame_seconds=FRAME_LENGTH / SAMPLE_RATE):
+        self.recognizer = recognizer
+        self.segments = []  # Text of segments Vosk has already finalized
+        self.stability = StabilityTracker(hold_seconds, frame_seconds)
+
+    def _joined(self, *tail):
+        return " ".join(t for t in (*self.segments, *tail) if t)
+
+    def feed(self, frame):
+        if self.recognizer.AcceptWaveform(frame):
+            self.segments.append(json.loads(self.recognizer.Result()).get("text", ""))
+            text = self._joined()
+        else:
+            text = self._joined(json.loads(self.recognizer.PartialResult()).get("partial", ""))
+        return Partial(text, self.stability.update(text))
+
+    def finish(self):
+        text = self._joined(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        if not text:
+            import speech_recognition as sr
+
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskBackend:
+    """
+    Offline, CPU-only streaming recognizer. Needs `pip install vosk` and a
+    model unpacked at model_path (https://alphacephei.com/vosk/models); the
+    model is loaded once, on first use or by load().
+    """
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path=VOSK_MODEL_PATH, hold_seconds=STABLE_SECONDS):
+        self.model_path = model_path
+        self.hold_seconds = hold_seconds
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._model is None:
+                import vosk  # Optional dependency, only needed for this backend
+
+                vosk.SetLogLevel(-1)
+                if not os.path.isdir(self.model_path):
+                    raise FileNotFoundError(f"Vosk model not found at {self.model_path}")
+                self._model = vosk.Model(self.model_path)
+                logging.info(f"Loaded Vosk model from {self.model_path}")
+            return self._model
+
+    def start(self, sample_rate=SAMPLE_RATE):
+        import vosk
+
+        recognizer = vosk.KaldiRecognizer(self.load(), sample_rate)
+        return VoskSession(recognizer, self.hold_seconds, FRAME_LENGTH / sample_rate)
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        session = self.start(sample_rate)
+        step = FRAME_LENGTH * 2
+        for offset in range(0, len(pcm), step):
+            session.feed(pcm[offset:offset + step])
+        return session.finish()
+
+
+BACKENDS = {"google": GoogleBackend, "vosk": VoskBackend}
+_backends = {}
+
+
+def get_backend(name=None):
+    """Shared backend instance by name (default STT_BACKEND); falls back to Google if Vosk is unavailable."""
+    name = name or STT_BACKEND
+    if name not in _backends:
+        backend = BACKENDS[name]()
+        if name == "vosk":
+            try:
+                backend.load()
+            except (ImportError, OSError) as e:
+                print(f"⚠️ Offline recognizer unavailable ({e}); using Google.")
+                logging.warning(f"Vosk backend unavailable: {e}")
+                backend = get_backend("google")
+        _backends[name] = backend
+    return _backends[name]
@@ -0,0 +1,150 @@
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+
+from config import DATA_DIR
+
+###############################
+#   Startup Profile           #
+###############################
+# main.py imports this first, so offsets count from (nearly) process start.
+# The window only waits for light modules; the heavy subsystems (browser,
+# browser actions, LLM client, wake word engine) warm up on background
+# threads behind readiness futures, and every import and init on the way is
+# timed into one report (logged, and saved to ~/.browser_llm/startup.json).
+STARTUP_REPORT_PATH = os.path.join(DATA_DIR, "startup.json")
+
+# What the window imports before it appears (timed one by one by main.py)
+WINDOW_MODULES = ["tkinter", "tracing", "log_pipeline", "command_pipeline", "browser_lifecycle", "session_pool",
+                  "llm_client", "voice_control", "intent_grammar", "plan_mode", "macros", "site_adapters"]
+# What the first command needs; warmed up in the background once the window is up
+WARM_MODULES = ["browser_control", "page_fingerprint", "page_ocr"]
+
+_origin = time.perf_counter()
+
+
+class StartupProfile:
+    """Timed imports/inits per subsystem plus milestones (window shown, interactive, ready)."""
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.records = []   # (name, kind, start offset, seconds, thread name, ok)
+        self.marks = {}     # milestone -> offset
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def measure(self, name, kind="init"):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._lock:
+                self.records.append((name, kind, start - self.origin, time.perf_counter() - start,
+                                     threading.current_thread().name, ok))
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, self.now())
+        return self.marks[name]
+
+    def report(self):
+        """Milestones, then every import/init in start order with its offset, duration and thread."""
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r[2])
+            marks = sorted(self.marks.items(), key=lambda m: m[1])
+        lines = ["Startup: " + "  ".join(f"{name} {offset * 1e3:.0f} ms" for name, offset in marks)]
+        for name, kind, start, seconds, thread, ok in records:
+            lines.append(f"  {start * 1e3:7.0f} ms +{seconds * 1e3:6.0f} ms  {kind:<6} {name:<26} "
+                         f"{thread}{'' if ok else '  FAILED'}")
+        return "\n".join(lines)
+
+    def save(self, path=STARTUP_REPORT_PATH):
+        with self._lock:
+            data = {
+                "marks": dict(self.marks),
+                "records": [dict(name=r[0], kind=r[1], start=r[2], seconds=r[3], thread=r[4], ok=r[5])
+                            for r in self.records],
+            }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+
+def timed_import(module, name=None):
+    """importlib.import_module, recorded in the startup profile."""
+    with profile.measure(name or module, "import"):
+        return importlib.import_module(module)
+
+
+###############################
+#   Background Warm-up        #
+###############################
+class Subsystems:
+    """Heavy subsystems started on their own threads; ready(name) is a Future for each."""
+
+    def __init__(self, startup_profile):
+        self.profile = startup_profile
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def start(self, name, init):
+        """Run init() on a background thread (once per name); returns the readiness Future."""
+        with self._lock:
+            if name in self._futures:
+                return self._futures[name]
+            future = self._futures[name] = Future()
+
+        def run():
+            try:
+                with self.profile.measure(name, "warm"):
+                    result = init()
+                future.set_result(result)
+            except Exception as e:
+                logging.error(f"Warm-up of {name} failed: {e}")
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"warm-{name}", daemon=True).start()
+        return future
+
+    def ready(self, name):
+        """The subsystem's readiness Future (None if it was never started)."""
+        with self._lock:
+            return self._futures.get(name)
+
+    def get(self, name, timeout=None):
+        """Block until the subsystem is ready and return what its init returned (re-raises failures)."""
+        future = self.ready(name)
+        return future.result(timeout) if future is not None else None
+
+    def status(self):
+        """{name: "warming" | "ready" | "failed"}"""
+        with self._lock:
+            futures = dict(self._futures)
+        return {name: "warming" if not f.done() else "failed" if f.exception() else "ready"
+                for name, f in futures.items()}
+
+    def when_all_ready(self, callback):
+        """Call callback() on a background thread once every started subsystem has finished."""
+        with self._lock:
+            futures = list(self._futures.values())
+
+        def run():
+            wait(futures)
+            callback()
+
+        threading.Thread(target=run, name="warm-report", daemon=True).start()
+
+
+# Shared by main.py and the GUI
+profile = StartupProfile(_origin)
+subsystems = Subsystems(profile)
@@ -0,0 +1,304 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+from config import DATA_DIR
+
+###############################
+#   Pipeline Tracing Config   #
+###############################
+# Timed spans around each pipeline stage (wake word, STT, GPT-4, Selenium),
+# tagged with a per-command trace ID so one slow command can be followed from
+# wake word to settled page. Spans feed latency histograms (Prometheus text on
+# METRICS_PORT) and are appended to TRACE_PATH as JSON lines (size-rotated).
+TRACING_ENABLED = True
+TRACE_PATH = os.path.join(DATA_DIR, "traces.jsonl")
+TRACE_MAX_BYTES = 5_000_000   # traces.jsonl rolls over to traces.jsonl.1 ... at this size
+TRACE_BACKUPS = 3
+METRICS_PORT = 9464     # Prometheus scrape endpoint on 127.0.0.1; None to disable
+RECENT_SPANS = 200      # Durations kept per span name for the GUI percentiles
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def new_trace():
+    """Start a new correlation ID for the current command; returns it."""
+    trace_id = os.urandom(6).hex()
+    _trace_id.set(trace_id)
+    _current_span.set(None)
+    return trace_id
+
+
+def current_trace():
+    return _trace_id.get()
+
+
+def bind(fn):
+    """Wrap fn so it runs with the caller's trace ID on whatever thread calls it."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def annotate(**attrs):
+    """Attach attributes (e.g. cached=True) to the innermost open span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.attrs.update(attrs)
+
+
+class Span:
+    """One timed stage; use as a context manager via Tracer.span()."""
+
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id", "start", "_t0", "_token")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.trace_id = parent.trace_id
+        else:
+            self.trace_id = _trace_id.get() or os.urandom(6).hex()
+        self.span_id = os.urandom(4).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        _current_span.reset(self._token)
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(duration * 1e3, 3),
+            "status": "error" if exc_type else "ok",
+            "thread": threading.current_thread().name,
+        }
+        if exc_type:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        if self.attrs:
+            record["attrs"] = self.attrs
+        self.tracer.record(self.name, duration, record)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    """Returned while tracing is off, so a disabled span costs one attribute check."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Histogram:
+    """Bucketed latency histogram plus a window of recent samples."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Per bucket; the last one is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=RECENT_SPANS)
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.errors += error
+        self.recent.append(seconds)
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)] as Prometheus expects."""
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def percentile(self, q):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class Tracer:
+    """Collects spans into per-name histograms and the JSONL trace file."""
+
+    def __init__(self, enabled=TRACING_ENABLED, path=TRACE_PATH):
+        self.enabled = enabled
+        self.path = path
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._server = None
+        self.gauges = {}  # metric name -> (help, label, collect() -> {label value: number})
+
+    def span(self, name, **attrs):
+        """`with tracer.span("listen"):` times the block (no-op while disabled)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    def traced(self, name=None):
+        """Decorator form of span(); the span is named after the function by default."""
+        def decorate(fn):
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds, record):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds, record["status"] == "error")
+            if self.path:
+                try:
+                    # Attributes JSON cannot encode are written as their str()
+                    line = json.dumps(record, default=str)
+                except (TypeError, ValueError) as e:
+                    logging.warning(f"Could not export trace span '{name}': {e}")
+                    return
+                try:
+                    if self._file is None:
+                        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                        self._file = RotatingFileHandler(self.path, maxBytes=TRACE_MAX_BYTES,
+                                                         backupCount=TRACE_BACKUPS, encoding="utf-8")
+                        self._file.setFormatter(logging.Formatter("%(message)s"))
+                    self._file.emit(logging.makeLogRecord({"msg": line}))
+                except OSError as e:
+                    logging.warning(f"Could not open the trace file, trace export is off: {e}")
+                    self.path = None
+
+    def summary(self):
+        """{span name: {count, errors, last, p50, p95}} with times in seconds, for the GUI."""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "errors": h.errors,
+                    "last": h.recent[-1] if h.recent else None,
+                    "p50": h.percentile(50),
+                    "p95": h.percentile(95),
+                }
+                for name, h in self.histograms.items()
+            }
+
+    def register_gauge(self, name, help_text, label, collect):
+        """Export collect() -> {label value: number} as gauge `name` on /metrics."""
+        self.gauges[name] = (help_text, label, collect)
+
+    def prometheus_text(self):
+        """All histograms in the Prometheus text exposition format."""
+        lines = [
+            "# HELP browser_llm_span_duration_seconds Time spent in each pipeline stage.",
+            "# TYPE browser_llm_span_duration_seconds histogram",
+        ]
+        errors = [
+            "# HELP browser_llm_span_errors_total Pipeline stages that raised.",
+            "# TYPE browser_llm_span_errors_total counter",
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                for bound, count in h.cumulative():
+                    lines.append(f'browser_llm_span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+                lines.append(f'browser_llm_span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {h.count}')
+                lines.append(f'browser_llm_span_duration_seconds_sum{{span="{label}"}} {h.total}')
+                lines.append(f'browser_llm_span_duration_seconds_count{{span="{label}"}} {h.count}')
+                errors.append(f'browser_llm_span_errors_total{{span="{label}"}} {h.errors}')
+        gauges = []
+        for name, (help_text, label_name, collect) in sorted(self.gauges.items()):
+            gauges += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for key, value in sorted(collect().items()):
+                gauges.append(f'{name}{{{label_name}="{key}"}} {value}')
+        return "\n".join(lines + errors + gauges) + "\n"
+
+    def start_metrics_server(self, port=METRICS_PORT):
+        """Serve prometheus_text() at http://127.0.0.1:<port>/metrics on a daemon thread."""
+        if port is None or self._server is not None:
+            return self._server
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = tracer.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            logging.warning(f"Metrics endpoint not started on port {port}: {e}")
+            return None
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        logging.info(f"📈 Metrics at http://127.0.0.1:{port}/metrics")
+        return self._server
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Shared by voice_control, browser_control and the GUI
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
@@ -0,0 +1,379 @@
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from config import DATA_DIR
+
+###############################
+#   Text-to-Speech Worker     #
+###############################
+# One thread owns the speech engine and plays messages from a priority queue,
+# so nothing is dropped while another message is playing. Each phrase is
+# rendered to PCM once and kept in an LRU cache (and on disk), so fixed and
+# templated prompts play back with no synthesis delay. Playback stops within
+# one chunk on barge-in (the user says the wake word) or when a more urgent
+# message arrives.
+PRIORITY_URGENT = 0       # Questions and errors; interrupt whatever is playing
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2          # Status chatter
+_PRIORITY_PRERENDER = 9   # Background rendering, never played
+
+PHRASE_CACHE_DIR = os.path.join(DATA_DIR, "tts_cache")
+PHRASE_CACHE_SIZE = 64    # Rendered phrases kept in memory
+PLAYBACK_CHUNK_SECONDS = 0.05
+
+# Played as soon as they are needed; rendered in the background at startup
+COMMON_PHRASES = [
+    "Sorry, I couldn't read the current page.",
+    "No additional information provided. Aborting command.",
+    "Sorry, I couldn't determine the required action.",
+    "Sorry, I couldn't finish that command.",
+]
+
+
+###############################
+#   Renderers and Sinks       #
+###############################
+class Pyttsx3Renderer:
+    """Renders text to 16-bit mono PCM with pyttsx3; must be used from one thread."""
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._engine = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from startup import profile
+
+            with profile.measure("tts engine"):  # On the TTS thread, off the start-up path
+                import pyttsx3
+
+                self._engine = pyttsx3.init()
+            if self.rate:
+                self._engine.setProperty("rate", self.rate)
+        return self._engine
+
+    @property
+    def voice(self):
+        """Identifies the voice settings, so cached audio is not reused across voices."""
+        engine = self.engine
+        return f"{engine.getProperty('voice')}:{engine.getProperty('rate')}"
+
+    def render(self, text):
+        """Returns (pcm, sample_rate)."""
+        import speech_recognition as sr
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "phrase.wav")
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            # AudioFile reads the WAV/AIFF the platform driver writes and downmixes it
+            with sr.AudioFile(path) as source:
+                audio = sr.Recognizer().record(source)
+        return audio.get_raw_data(convert_width=2), audio.sample_rate
+
+    def say(self, text):
+        """Speak directly, for drivers that cannot render to a file (not cached or interruptible)."""
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+
+class PyAudioSink:
+    """Plays PCM on the default output device in short chunks so it can be stopped mid-phrase."""
+
+    def __init__(self, chunk_seconds=PLAYBACK_CHUNK_SECONDS):
+        self.chunk_seconds = chunk_seconds
+        self._pa = None
+
+    def play(self, pcm, sample_rate, stop, text=None):
+        """Play until done or `stop` (a threading.Event) is set; returns True if played to the end."""
+        import pyaudio
+
+        if self._pa is None:
+            self._pa = pyaudio.PyAudio()
+        stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, output=True)
+        step = max(2, int(sample_rate * self.chunk_seconds) * 2)
+        try:
+            for offset in range(0, len(pcm), step):
+                if stop.is_set():
+                    return False
+                stream.write(pcm[offset:offset + step])
+            return True
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def close(self):
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+class NullSink:
+    """
+    Discards audio, for headless runs and tests. With realtime=True it takes
+    as long as the audio lasts (in chunks, so barge-in still works).
+    Keeps the text of everything played in `played`.
+    """
+
+    def __init__(self, realtime=False, chunk_seconds=PLAYBACK_CHUNK_SECONDS):
+        self.realtime = realtime
+        self.chunk_seconds = chunk_seconds
+        self.played = []
+
+    def play(self, pcm, sample_rate, stop, text=None):
+        remaining = len(pcm) / 2 / sample_rate if self.realtime else 0.0
+        while remaining > 0:
+            if stop.wait(min(self.chunk_seconds, remaining)):
+                return False
+            remaining -= self.chunk_seconds
+        if stop.is_set():
+            return False
+        self.played.append(text)
+        return True
+
+    def close(self):
+        pass
+
+
+###############################
+#   Phrase Cache              #
+###############################
+class PhraseCache:
+    """Rendered phrases: an in-memory LRU in front of WAV files keyed by voice and text."""
+
+    def __init__(self, cache_dir=PHRASE_CACHE_DIR, max_entries=PHRASE_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".wav")
+
+    def get(self, voice, text):
+        """(pcm, sample_rate) or None."""
+        key = f"{voice}\n{text}"
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if not self.cache_dir:
+            return None
+        try:
+            with wave.open(self._path(key), "rb") as wav:
+                entry = (wav.readframes(wav.getnframes()), wav.getframerate())
+        except (OSError, EOFError, wave.Error):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, voice, text, pcm, sample_rate):
+        key = f"{voice}\n{text}"
+        self._remember(key, (pcm, sample_rate))
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with wave.open(self._path(key), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(sample_rate)
+                wav.writeframes(pcm)
+        except OSError as e:
+            logging.warning(f"Could not write TTS cache: {e}")
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+###############################
+#   Worker                    #
+###############################
+class _Message:
+    __slots__ = ("text", "priority", "future", "enqueued", "prerender")
+
+    def __init__(self, text, priority, prerender=False):
+        self.text = text
+        self.priority = priority
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+        self.prerender = prerender
+
+
+class TTSWorker:
+    """
+    Queued text-to-speech. say() returns a Future that resolves to True when
+    the message has been played, or False if it was cancelled, interrupted
+    or could not be spoken; no message is dropped silently.
+    """
+
+    def __init__(self, renderer=None, sink=None, cache=None):
+        self.renderer = renderer or Pyttsx3Renderer()
+        self.sink = sink or PyAudioSink()
+        self.cache = cache if cache is not None else PhraseCache()
+        self.queue_latencies = deque(maxlen=1000)  # Seconds from say() to the start of playback
+        self.counters = {"enqueued": 0, "played": 0, "cancelled": 0, "interrupted": 0, "failed": 0,
+                         "cache_hits": 0, "rendered": 0, "fallbacks": 0}
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()  # FIFO within a priority
+        self._stop_playback = threading.Event()
+        self._playing = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+                self._thread.start()
+        return self
+
+    def say(self, text, priority=PRIORITY_NORMAL, interrupt=None):
+        """
+        Queue `text`. Messages play in priority order, FIFO within a priority.
+        interrupt=True (the default for PRIORITY_URGENT) cuts off a less
+        urgent message that is playing.
+        """
+        message = _Message(text, priority)
+        self._enqueue(message)
+        self._count("enqueued")
+        if interrupt is None:
+            interrupt = priority == PRIORITY_URGENT
+        if interrupt:
+            with self._lock:
+                playing = self._playing
+            if playing is not None and playing.priority > priority:
+                self._stop_playback.set()
+        return message.future
+
+    def prerender(self, phrases):
+        """Render phrases into the cache in the background, behind any real messages."""
+        for text in phrases:
+            self._enqueue(_Message(text, _PRIORITY_PRERENDER, prerender=True))
+
+    def barge_in(self):
+        """The user started talking: stop playback now and drop everything queued."""
+        self.cancel()
+
+    def cancel(self):
+        """Stop the current message and cancel every queued one (prerendering continues)."""
+        keep = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            message = item[2]
+            if message.prerender:
+                keep.append(item)
+            else:
+                self._finish(message, "cancelled")
+        for item in keep:
+            self._queue.put(item)
+        with self._lock:
+            playing = self._playing
+        if playing is not None:
+            self._stop_playback.set()
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued message has finished; returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def _enqueue(self, message):
+        self.start()
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+        self._queue.put((message.priority, next(self._order), message))
+
+    def _finish(self, message, outcome):
+        """Resolve a message as played, interrupted, cancelled or failed."""
+        if not message.prerender:
+            self._count(outcome)
+            message.future.set_result(outcome == "played")
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _audio(self, text):
+        voice = self.renderer.voice
+        cached = self.cache.get(voice, text)
+        if cached is not None:
+            self._count("cache_hits")
+            return cached
+        pcm, sample_rate = self.renderer.render(text)
+        self._count("rendered")
+        self.cache.put(voice, text, pcm, sample_rate)
+        return pcm, sample_rate
+
+    def _run(self):
+        while True:
+            _, _, message = self._queue.get()
+            if message.prerender:
+                try:
+                    self._audio(message.text)
+                except Exception as e:
+                    logging.warning(f"Could not pre-render '{message.text}': {e}")
+                self._finish(message, "played")
+                continue
+
+            with self._lock:
+                self._playing = message
+            self._stop_playback.clear()
+            outcome = self._play(message)
+            with self._lock:
+                self._playing = None
+            self._finish(message, outcome)
+
+    def _play(self, message):
+        try:
+            pcm, sample_rate = self._audio(message.text)
+            self.queue_latencies.append(time.perf_counter() - message.enqueued)
+            played = self.sink.play(pcm, sample_rate, self._stop_playback, text=message.text)
+            return "played" if played else "interrupted"
+        except Exception as e:
+            # Drivers that cannot render to a file still get to speak, uncached
+            logging.warning(f"TTS rendering failed ({e}); speaking directly.")
+            self._count("fallbacks")
+            try:
+                self.renderer.say(message.text)
+                return "played"
+            except Exception as e:
+                print(f"⚠️ Speech engine error: {e}")
+                return "failed"
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        self.cancel()
+        self.sink.close()
+
+
+# Shared by voice_control and everything that speaks
+tts = TTSWorker()
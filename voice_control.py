@@ -1,21 +1,31 @@
-import speech_recognition as sr
-import pyttsx3
 import time
 import threading
-import openai
-import config  # Holds your OpenAI API key
+import config  # Holds your Porcupine access key
+from command_cache import InterpretationCache
+from action_stream import StreamingActionParser, StreamResult
+from tracing import annotate, bind, traced
+from llm_client import llm_client
+from speech_backends import GoogleBackend, get_backend
+from tts_worker import PRIORITY_NORMAL, tts
 
-import pvporcupine
-import pyaudio
-import struct
+import re
 
-openai.api_key = config.OPENAI_API_KEY
+from audio_capture import (
+    BUFFER_SECONDS,
+    AudioCaptureEngine,
+    MicrophoneSource,
+    WakeWordDetector,
+    capture_utterance,
+)
+
+# Repeated phrases ("open youtube", "pause the video") skip the GPT-4 round trip
+interpretation_cache = InterpretationCache()
 
 ###############################
 #     GPT-4 Interpretation    #
 ###############################
-def interpret_command(command):
-    """Uses GPT-4 to analyze the command and return an action response."""
+def build_messages(command):
+    """Chat messages asking GPT-4 to turn the command into an action string."""
     prompt = f"""
     You are an AI assistant that converts user voice commands into actionable browser automation tasks.
     The user might ask you to open websites, search for information, or perform other browser-based tasks.
@@ -30,117 +40,277 @@ def interpret_command(command):
     - "Play the third video" → "play_video 3"
     - "Pause the video" → "pause_video"
     - "Search crossbody bags on Amazon" → "search_amazon crossbody bags"
+    - "Open the cheapest one under $50" → "open_cheapest 50"
+    - "Go to the next page" → "next_page"
     - "Search for Python tutorials" → "search Python tutorials"
 
     User Command: "{command}"
     AI Response:
     """
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
 
-    response = openai.chat.completions.create(
+@traced("interpret_command")
+def interpret_command(command, client=None, use_cache=True):
+    """
+    Uses GPT-4 to analyze the command and return an action response.
+    `client` defaults to the shared pooled llm_client; pass a stub to run offline.
+    """
+    if use_cache:
+        cached = interpretation_cache.get(command)
+        annotate(cached=cached is not None)
+        if cached is not None:
+            print(f"⚡ Cached Response: {cached}")
+            return cached
+
+    client = client or llm_client
+    response = client.chat.completions.create(
         model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
+        messages=build_messages(command),
         temperature=0.5  
     )
 
     result = response.choices[0].message.content.strip()
     print(f"🔍 GPT-4 Response: {result}")
+    if use_cache:
+        interpretation_cache.put(command, result)
     return result
 
-###############################
-#     Text-to-Speech (TTS)    #
-###############################
-engine = pyttsx3.init()
-is_speaking = False
 
+@traced("interpret_command_stream")
+def interpret_command_stream(command, on_action, client=None, use_cache=True):
+    """
+    Streaming variant of interpret_command. `on_action(action)` is started on a
+    worker thread as soon as the action prefix is unambiguous (e.g. the URL of
+    an `open` is complete), while the rest of the reply is still arriving.
+    Returns a StreamResult with time-to-first-token and time-to-dispatch.
+    """
+    start = time.perf_counter()
+    worker = None
 
+    def dispatch(action):
+        nonlocal worker
+        worker = threading.Thread(target=bind(on_action), args=(action,), daemon=True)
+        worker.start()
+        return time.perf_counter() - start
 
+    if use_cache:
+        cached = interpretation_cache.get(command)
+        annotate(cached=cached is not None)
+        if cached is not None:
+            print(f"⚡ Cached Response: {cached}")
+            dispatched = dispatch(cached)
+            worker.join()
+            return StreamResult(cached, None, dispatched, dispatched, True)
 
-def speak(text):
-    """Convert text to speech while preventing overlap."""
-    global is_speaking
-    if is_speaking:
-        print("⚠️ Already speaking. Skipping duplicate speech request.")
-        return
+    client = client or llm_client
+    stream = client.chat.completions.create(
+        model="gpt-4",
+        messages=build_messages(command),
+        temperature=0.5,
+        stream=True
+    )
 
-    is_speaking = True
-    def _speak():
-        global is_speaking
-        engine.say(text)
-        try:
-            engine.runAndWait()
-        except RuntimeError:
-            print("⚠️ Speech engine error.")
-        time.sleep(0.5)
-        is_speaking = False
+    parser = StreamingActionParser()
+    first_token = dispatched = None
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        action = parser.feed(delta)
+        if action is not None:
+            print(f"🚀 Early dispatch: {action}")
+            dispatched = dispatch(action)
 
-    threading.Thread(target=_speak, daemon=True).start()
+    early = dispatched is not None
+    action = parser.finish()
+    completed = time.perf_counter() - start
+    print(f"🔍 GPT-4 Response: {parser.buffer.strip()}")
+    if not early and action:
+        dispatched = dispatch(action)
+    if worker is not None:
+        worker.join()
+    if use_cache:
+        interpretation_cache.put(command, action)
+    annotate(first_token=first_token, dispatched=dispatched, early=early)
+    return StreamResult(action, first_token, dispatched, completed, early)
 
 ###############################
-#      Speech Recognition     #
+#     Text-to-Speech (TTS)    #
 ###############################
-def listen():
-    """Use the microphone to listen for a command via SpeechRecognition."""
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening... Speak now!")
-        recognizer.adjust_for_ambient_noise(source, duration=1)
-        try:
-            audio = recognizer.listen(source, timeout=5)
-            command = recognizer.recognize_google(audio)
-            print(f"Recognized: {command}")
-            return command.lower()
-        except sr.UnknownValueError:
-            print("Sorry, could not understand the audio.")
-            return None
-        except sr.RequestError:
-            print("Error: Could not request results. Check your internet connection.")
-            return None
-        except sr.WaitTimeoutError:
-            print("Error: Listening timed out while waiting for phrase to start.")
-            return None
+# One worker thread speaks queued messages; nothing is dropped while it talks
+
+
+def speak(text, priority=PRIORITY_NORMAL, wait=False):
+    """
+    Queue text for speech; returns a Future that resolves once it has been
+    played (True) or cut off (False). wait=True blocks until then, e.g. before
+    listening for the answer to a question.
+    """
+    future = tts.say(text, priority)
+    if wait:
+        future.result()
+    return future
 
 ###############################
-#  Re-Initialize Porcupine    #
+#   Shared Audio Capture      #
 ###############################
+WAKE_WORD = "computer"
+
+_capture_lock = threading.Lock()
+_capture_engine = None
+_wake_detector = None
+_replaying = False   # True when fed from a recording rather than the microphone
+_resume_seq = None   # Where a recording is picked up by the next consumer
+_wake_seq = None     # Buffer position right after the last wake word
+
+
 def create_porcupine():
-    """Create a fresh Porcupine instance each time for repeated detection."""
+    """Create the Porcupine instance used for the lifetime of the app."""
+    import pvporcupine  # Loaded by the wake word warm-up, not at app start-up
+
     return pvporcupine.create(
         access_key=config.PORCUPINE_ACCESS_KEY,
-        keywords=["computer"]
+        keywords=[WAKE_WORD]
     )
 
+
+def start_capture_engine(source=None, buffer_seconds=BUFFER_SECONDS, porcupine=None):
+    """
+    Start the persistent capture thread shared by wake word detection and STT.
+    `source` defaults to the microphone; pass a WavFileSource to drive the
+    whole pipeline from recorded audio instead (with a non-realtime source,
+    size buffer_seconds to hold the whole file). `porcupine` replaces the
+    wake word engine, e.g. with an offline stand-in.
+    """
+    global _capture_engine, _wake_detector, _replaying, _resume_seq, _wake_seq
+    with _capture_lock:
+        if _capture_engine is not None:
+            _capture_engine.stop()
+        if porcupine is None:
+            porcupine = _wake_detector.porcupine if _wake_detector else create_porcupine()
+        if source is None:
+            source = MicrophoneSource(porcupine.sample_rate, porcupine.frame_length)
+        _replaying = not isinstance(source, MicrophoneSource)
+        _resume_seq = 0 if _replaying else None
+        _wake_seq = None
+        _capture_engine = AudioCaptureEngine(source, buffer_seconds).start()
+        _wake_detector = WakeWordDetector(_capture_engine, porcupine)
+        print("🔹 Audio capture engine started.")
+        return _capture_engine
+
+
+def get_capture_engine():
+    """Return the running capture engine, starting the microphone on first use."""
+    if _capture_engine is None:
+        start_capture_engine()
+    return _capture_engine
+
+
+###############################
+#      Speech Recognition     #
+###############################
+@traced("listen")
+def listen(recognizer=None, backend=None, on_partial=None):
+    """
+    Recognize the next command from the shared capture buffer
+    (capture_command followed by recognize_command).
+    """
+    session = capture_command(recognizer, backend, on_partial)
+    return recognize_command(session) if session is not None else None
+
+
+@traced("capture_command")
+def capture_command(recognizer=None, backend=None, on_partial=None):
+    """
+    Capture the next utterance from the shared capture buffer into a
+    recognizer session; returns None if nobody spoke. Finish it with
+    recognize_command, possibly on another thread while capture goes on.
+    After a wake word the audio starts with a short pre-roll, so nothing said
+    straight after "Computer" is lost and no calibration pause is needed.
+    `backend` defaults to the configured speech backend (STT_BACKEND); a
+    streaming backend decodes while the user speaks and calls
+    `on_partial(text)` each time a new partial transcript becomes stable.
+    `recognizer` (anything with recognize_google) forces the Google backend.
+    """
+    global _resume_seq, _wake_seq
+    engine = get_capture_engine()
+    if _wake_seq is not None:
+        start_seq = _wake_seq
+    else:
+        # Follow-up question: live audio starts now, a recording where it left off
+        start_seq = _resume_seq if _replaying else engine.position
+    _wake_seq = None
+
+    if recognizer is not None:
+        backend = GoogleBackend(recognizer)
+    session = (backend or get_backend()).start(engine.sample_rate)
+    last_stable = ""
+
+    def on_frame(frame):
+        nonlocal last_stable
+        partial = session.feed(frame)
+        if partial is None or not partial.stable or partial.stable == last_stable:
+            return
+        last_stable = partial.stable
+        annotate(stable_partial=last_stable)
+        if on_partial is not None:
+            on_partial(strip_wake_word(last_stable).lower())
+
+    print("Listening... Speak now!")
+    pcm, _resume_seq = capture_utterance(engine, start_seq, on_frame=on_frame)
+    if pcm is None:
+        print("Error: Listening timed out while waiting for phrase to start.")
+        return None
+    return session
+
+
+@traced("recognize_command")
+def recognize_command(session):
+    """The command text of a captured utterance, or None if it could not be recognized."""
+    import speech_recognition as sr
+
+    try:
+        command = session.finish()
+    except sr.UnknownValueError:
+        print("Sorry, could not understand the audio.")
+        return None
+    except sr.RequestError:
+        print("Error: Could not request results. Check your internet connection.")
+        return None
+
+    command = strip_wake_word(command)
+    print(f"Recognized: {command}")
+    return command.lower() or None
+
+
+def strip_wake_word(text):
+    """The pre-roll may catch the tail of the wake word itself."""
+    return re.sub(rf"^\s*{WAKE_WORD}\b[\s,.]*", "", text, flags=re.IGNORECASE)
+
+
+###############################
+#    Wake Word Detection      #
+###############################
+@traced("detect_wake_word")
 def detect_wake_word():
     """
-    Creates a fresh Porcupine + stream.
     Returns True after hearing the wake word 'computer' ONCE.
-    Then cleans up the stream & Porcupine so we can do it again later.
+    Porcupine and the audio stream stay open between calls, so there is no
+    per-cycle setup cost; returns False if a recorded source runs out.
     """
-    print("🔹 Creating new Porcupine instance for wake word detection.")
-    porcupine = create_porcupine()
-
-    pa = pyaudio.PyAudio()
-    stream = pa.open(
-        format=pyaudio.paInt16,
-        channels=1,
-        rate=porcupine.sample_rate,
-        input=True,
-        frames_per_buffer=porcupine.frame_length
-    )
-    stream.start_stream()
-
-    while True:
-        pcm = stream.read(porcupine.frame_length, exception_on_overflow=False)
-        pcm = struct.unpack_from("h" * porcupine.frame_length, pcm)
-        keyword_index = porcupine.process(pcm)
-        if keyword_index >= 0:
-            print("👂 Wake Word Detected!")
-            # Clean up for next cycle
-            stream.stop_stream()
-            stream.close()
-            pa.terminate()
-            porcupine.delete()
-            return True
-
+    global _wake_seq
+    get_capture_engine()
+    _wake_seq = _wake_detector.wait(_resume_seq if _replaying else None)
+    if _wake_seq is None:
+        return False
+    tts.barge_in()  # Stop talking over the user
+    print("👂 Wake Word Detected!")
+    return True